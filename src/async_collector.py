@@ -0,0 +1,262 @@
+"""
+asyncio API for embedding cookie collection in async services.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Optional, Tuple
+from .browser_pool import BrowserPool
+from .gui.controller import BrowserController
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCookieCollector(BrowserController):
+    """
+    Collect cookies from an asyncio event loop.
+
+    Selenium's WebDriver protocol is blocking, so browsers are driven from
+    one thread each and the event loop itself never blocks. Page loads in
+    flight are bounded by the browsers: ``settings["workers"]`` pages by
+    default, or ``workers * settings["tabs"]`` when every browser loads
+    several pages at once in its own tabs, still on one thread per browser.
+    URLs beyond that wait on an asyncio semaphore rather than on threads, so
+    a ``concurrency`` of hundreds costs no extra OS threads, but only gets
+    hundreds of pages loading with enough browsers and tabs.
+
+    Example::
+
+        async with AsyncCookieCollector() as collector:
+            await collector.initialize(settings)
+            async for url, result in collector.collect_many(urls, concurrency=100):
+                ...
+    """
+
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        super().__init__(browser_pool)
+        self._executor = None
+        # SQLite writes stay on one thread
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cookie-db")
+        self._browser_slots = None
+        # Tabs mode: URLs for the stream workers, and the futures waiting on each URL
+        self._tab_urls = None
+        self._tab_waiters = {}
+        self._tab_thread = None
+        # Set once every stream worker has exited, e.g. because no browser could start
+        self._tabs_ended = False
+
+    async def initialize(self, settings: Dict):
+        """Start the browser pool for ``settings`` (same keys as the GUI settings)"""
+        loop = asyncio.get_running_loop()
+        success, message = await loop.run_in_executor(None, self.initialize_browser, settings)
+        if not success:
+            raise RuntimeError(message)
+
+        workers = self._worker_count(settings)
+        tabs = self._tab_count(settings)
+        await self._stop_tabs()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="browser-call")
+        self._browser_slots = asyncio.Semaphore(workers * tabs)
+        await loop.run_in_executor(self._db_executor, self._prepare_run)
+        if tabs > 1:
+            self._start_tabs(loop, workers)
+
+    async def collect(self, url: str, timeout: Optional[float] = None) -> Dict:
+        """
+        Collect cookies from one URL.
+
+        Returns the same result dictionary as one entry of
+        ``BrowserController.collect_cookies``, including skipped fresh URLs.
+        A URL that exceeds ``timeout`` seconds is reported as failed; its
+        browser finishes the page in the background and goes back to the pool
+        before the slot is reused.
+        """
+        if not self._executor:
+            raise RuntimeError("Call initialize() before collecting")
+
+        try:
+            url = self._normalize_url(url)
+        except ValueError as e:
+            return self._failed_result(url, e)
+        loop = asyncio.get_running_loop()
+        fresh = await loop.run_in_executor(self._db_executor, self._fresh_urls, [url])
+        if fresh:
+            return await loop.run_in_executor(self._db_executor, self._skipped_result, url, fresh[url])
+
+        if self._tab_urls is not None and self._tabs_ended:
+            return self._failed_result(url, RuntimeError("No browser workers available"))
+        await self._browser_slots.acquire()
+        if self._tab_urls is not None:
+            waiter = loop.create_future()
+            self._tab_waiters.setdefault(url, []).append(waiter)
+            self._tab_urls.put(url)
+        else:
+            future = self._executor.submit(self._collect_with_pooled_browser, url)
+            future.add_done_callback(lambda _: self._release_slot(loop))
+            waiter = asyncio.wrap_future(future)
+
+        try:
+            payload = await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return self._failed_result(url, TimeoutError(f"Timed out after {timeout}s"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return self._failed_result(url, e)
+
+        return await loop.run_in_executor(self._db_executor, self._record_result, url, payload)
+
+    async def collect_many(self, urls, concurrency: int = 10,
+                           timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Collect cookies from many URLs, yielding ``(url, result)`` as each finishes.
+
+        Args:
+            urls: Iterable or async iterable of URLs, consumed lazily
+            concurrency: Maximum number of URLs in flight
+            timeout: Optional per-URL timeout in seconds
+
+        Leaving the loop early cancels the URLs still in flight.
+        """
+        pending = set()
+
+        async def run(url):
+            return url, await self.collect(url, timeout)
+
+        async def next_finished():
+            nonlocal pending
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            return [task.result() for task in done]
+
+        async def url_stream():
+            if hasattr(urls, "__aiter__"):
+                async for url in urls:
+                    yield url
+            else:
+                for url in urls:
+                    yield url
+
+        try:
+            async for url in url_stream():
+                if len(pending) >= concurrency:
+                    for item in await next_finished():
+                        yield item
+                pending.add(asyncio.ensure_future(run(url)))
+
+            while pending:
+                for item in await next_finished():
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def aclose(self):
+        """Shut down the thread pools and the browser pool"""
+        await self._stop_tabs()
+        if self.browser_pool:
+            self._log_run_summary()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.cleanup)
+        self._db_executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def _collect_with_pooled_browser(self, url: str) -> Dict:
+        """Blocking part of ``collect``, run on the browser thread pool"""
+        browser = self.browser_pool.checkout()
+        try:
+            attempt = 1
+            while True:
+                # Also replaces a browser that crashed on the previous attempt
+                browser = self.browser_pool.renew(browser)
+                try:
+                    return self._collect_url(browser, url, lambda progress_fraction, message: None)
+                except Exception as e:
+                    delay = self._retry_delay(browser, url, e, attempt)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+        finally:
+            self.browser_pool.checkin(browser)
+
+    def _start_tabs(self, loop, workers: int):
+        """Start the stream workers that load queued URLs in several tabs per browser"""
+        self._tab_urls = queue.Queue()
+        self._tab_waiters = {}
+        self._tabs_ended = False
+        events = self._run_workers(iter(self._tab_urls.get, None), workers)
+        self._tab_thread = threading.Thread(target=self._dispatch_tab_results, args=(loop, events),
+                                            name="tab-results", daemon=True)
+        self._tab_thread.start()
+
+    async def _stop_tabs(self):
+        """Let the stream workers finish their queued URLs and wait for them to exit"""
+        if self._tab_urls is None:
+            return
+        self._tab_urls.put(None)
+        self._tab_urls = None
+        await asyncio.get_running_loop().run_in_executor(None, self._tab_thread.join)
+        self._tab_thread = None
+
+    def _dispatch_tab_results(self, loop, events):
+        """Hand results of the stream workers to the event loop, run on its own thread"""
+        for event, url, payload in events:
+            if event == "progress":
+                continue
+            try:
+                loop.call_soon_threadsafe(self._finish_tab_url, url, event, payload)
+            except RuntimeError:
+                # The event loop is already closed
+                return
+        try:
+            loop.call_soon_threadsafe(self._end_tabs)
+        except RuntimeError:
+            pass
+
+    def _end_tabs(self):
+        """Fail the URLs still waiting once no stream worker is left to load them"""
+        self._tabs_ended = True
+        error = RuntimeError("No browser workers available")
+        for url in list(self._tab_waiters):
+            while url in self._tab_waiters:
+                self._finish_tab_url(url, "error", error)
+
+    def _finish_tab_url(self, url: str, event: str, payload):
+        """Resolve the oldest future waiting on ``url`` and free its slot"""
+        self._browser_slots.release()
+        waiters = self._tab_waiters.get(url)
+        if not waiters:
+            return
+        waiter = waiters.pop(0)
+        if not waiters:
+            del self._tab_waiters[url]
+        # A timed out or cancelled caller has stopped waiting
+        if waiter.done():
+            return
+        if event == "done":
+            waiter.set_result(payload)
+        else:
+            waiter.set_exception(payload)
+
+    def _release_slot(self, loop):
+        """Free a browser slot once its thread has really finished"""
+        try:
+            loop.call_soon_threadsafe(self._browser_slots.release)
+        except RuntimeError:
+            # The event loop is already closed
+            pass
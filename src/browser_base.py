@@ -1,9 +1,8 @@
 from abc import ABC, abstractmethod
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from .consent import ConsentHandler
+from .readiness import PageReadiness
+from .watchdog import kill_process_tree
 import logging
-import time
 
 # Set up logging
 logging.basicConfig(
@@ -12,9 +11,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Released once the page has loaded and gone quiet
+PAGE_LOAD_READINESS = PageReadiness(max_wait=10)
+# After the consent click only new cookies matter
+POST_CONSENT_READINESS = PageReadiness(network_idle_ms=None, cookie_stable_ms=1000, max_wait=5)
+
 class BrowserBase(ABC):
     def __init__(self):
         self.driver = None
+        # Set once the browser was killed; it must not be reused
+        self.broken = False
     
     @abstractmethod
     def setup_driver(self):
@@ -26,33 +32,9 @@ class BrowserBase(ABC):
         if not self.driver:
             raise Exception("Driver not initialized")
             
-        common_selectors = [
-            'button[id*="cookie"]',
-            'button[id*="consent"]',
-            'button[class*="cookie"]',
-            'button[class*="consent"]',
-            'button[data-testid*="cookie"]',
-            'button[data-testid*="consent"]',
-            'button:contains("Accept")',
-            'button:contains("Allow")',
-            'button:contains("Agree")'
-        ]
-        
-        for selector in common_selectors:
-            try:
-                logger.debug(f"Trying to find cookie consent button with selector: {selector}")
-                button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                )
-                button.click()
-                logger.info("Successfully clicked cookie consent button")
-                time.sleep(2)  # Wait for the popup to disappear
-                return True
-            except Exception:
-                continue
-        
-        logger.info("No cookie consent button found or needed")
-        return False
+        # All candidate selectors are checked in one in-page pass, and the
+        # outcome is remembered per domain for later visits
+        return ConsentHandler(self.driver).handle()
     
     def collect_cookies(self, url):
         """Visit a URL, handle cookie consent, and collect cookies"""
@@ -62,13 +44,13 @@ class BrowserBase(ABC):
         try:
             logger.info(f"Navigating to {url}")
             self.driver.get(url)
-            time.sleep(5)  # Initial wait for page load
+            PAGE_LOAD_READINESS.wait(self.driver)
             
             # Try to handle cookie consent
             self.handle_cookie_consent()
             
-            # Wait for any dynamic content to load
-            time.sleep(3)
+            # Wait for cookies set by dynamic content
+            POST_CONSENT_READINESS.wait(self.driver)
             
             # Get all cookies
             cookies = self.driver.get_cookies()
@@ -101,8 +83,40 @@ class BrowserBase(ABC):
             logger.error(f"Error loading cookies: {str(e)}")
             return False
     
+    def is_alive(self):
+        """Check that the WebDriver session still responds"""
+        if not self.driver:
+            return False
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+    
+    def reset(self):
+        """Clear cookies and leave the current page so the browser can be reused"""
+        if not self.driver:
+            raise Exception("Driver not initialized")
+        self.driver.delete_all_cookies()
+        self.driver.get("about:blank")
+    
+    def process_ids(self):
+        """PIDs of the processes this browser started; the WebDriver is the parent of the browser"""
+        process = getattr(getattr(self.driver, "service", None), "process", None)
+        return [process.pid] if process else []
+    
+    def kill(self):
+        """Force-kill the WebDriver and the browser it started, e.g. when a page hangs the driver"""
+        self.broken = True
+        for pid in self.process_ids():
+            killed = kill_process_tree(pid)
+            logger.warning(f"Killed {killed} browser processes")
+    
     def close(self):
         """Clean up resources"""
+        if self.broken:
+            # The processes are gone, so quitting would only wait for a dead driver
+            return
         if self.driver:
             try:
                 self.driver.quit()
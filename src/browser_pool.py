@@ -0,0 +1,254 @@
+"""
+Long-lived pool of warm browsers shared between collection runs.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+from .supervisor import BrowserSupervisor
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolEntry:
+    """Bookkeeping for one pooled browser"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Keep ready-to-use browsers alive between collection runs.
+
+    Browsers are checked out by workers and checked back in when a run ends
+    instead of being closed, so the next run skips driver resolution and the
+    Chrome cold start. Idle browsers are closed after ``idle_timeout`` seconds
+    and every browser is replaced after ``max_uses`` pages, or earlier when
+    the supervisor finds it has outgrown its memory limit.
+    """
+
+    def __init__(self, factory: Callable, max_size: int = 4, idle_timeout: float = 300,
+                 max_uses: int = 200, supervisor: Optional[BrowserSupervisor] = None):
+        """
+        Args:
+            factory: Callable creating a new browser
+            max_size: Maximum number of browsers alive at once
+            idle_timeout: Seconds an unused browser stays alive
+            max_uses: Pages a browser may load before it is replaced
+            supervisor: Optional memory supervisor; one without a memory
+                limit is used by default, which still reaps orphaned processes
+        """
+        self.factory = factory
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.supervisor = supervisor or BrowserSupervisor()
+        self._idle = []
+        self._in_use: Dict[int, _PoolEntry] = {}
+        self._creating = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {"created": 0, "reused": 0, "retired": 0, "failed_health_checks": 0,
+                       "recycled_pages": 0, "recycled_memory": 0, "recycled_killed": 0}
+        # Seconds spent starting browsers, reported as an average
+        self._startup_seconds = 0.0
+        self._reaper = threading.Thread(target=self._reap_idle, name="browser-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def checkout(self, timeout: Optional[float] = None):
+        """Get a healthy browser, starting a new one if none is idle"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size() < self.max_size:
+                    entry = None
+                    self._creating += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a pooled browser")
+                self._condition.wait(remaining)
+
+        if entry is not None:
+            if entry.browser.is_alive():
+                entry.last_used = time.monotonic()
+                with self._condition:
+                    self._stats["reused"] += 1
+                    self._in_use[id(entry.browser)] = entry
+                return entry.browser
+            logger.warning("Pooled browser failed its health check, starting a new one")
+            with self._condition:
+                self._stats["failed_health_checks"] += 1
+                self._creating += 1
+            self._retire(entry)
+        return self._create().browser
+
+    def checkin(self, browser):
+        """Return a browser to the pool so the next run can reuse it"""
+        with self._condition:
+            entry = self._in_use.pop(id(browser), None)
+        if entry is None:
+            logger.warning("Ignoring a browser that was not checked out from the pool")
+            return
+        reason = None if self._closed else self._recycle_reason(browser, entry)
+        if reason:
+            with self._condition:
+                self._stats[f"recycled_{reason}"] += 1
+        if self._closed or reason or not self._reset(entry):
+            self._retire(entry)
+            return
+        entry.last_used = time.monotonic()
+        with self._condition:
+            self._idle.append(entry)
+            self._condition.notify()
+
+    def renew(self, browser, pages: int = 1):
+        """
+        Count ``pages`` upcoming page loads on a checked-out browser.
+
+        Returns the same browser, or a fresh one once it has reached
+        ``max_uses``, outgrown the supervisor's memory limit or was killed.
+        """
+        reason = self._recycle_reason(browser)
+        with self._condition:
+            entry = self._in_use[id(browser)]
+            if reason is None:
+                entry.uses += pages
+                return browser
+            del self._in_use[id(browser)]
+            self._creating += 1
+            self._stats[f"recycled_{reason}"] += 1
+        logger.info(f"Replacing browser after {entry.uses} pages ({reason})")
+        self._retire(entry)
+        new_entry = self._create()
+        new_entry.uses += pages
+        return new_entry.browser
+
+    def discard(self, browser):
+        """Close a checked-out browser instead of returning it to the pool"""
+        with self._condition:
+            entry = self._in_use.pop(id(browser), None)
+        if entry is not None:
+            self._retire(entry)
+
+    def warm(self, count: int) -> int:
+        """Start browsers in parallel until ``count`` are idle; returns how many are ready"""
+        with self._condition:
+            missing = min(count, self.max_size) - len(self._idle)
+            missing = min(missing, self.max_size - self._size())
+            self._creating += max(missing, 0)
+        if missing <= 0:
+            return len(self._idle)
+
+        errors = []
+
+        def start():
+            try:
+                self._create(lend=False)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=start, daemon=True) for _ in range(missing)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors and len(errors) == missing:
+            raise errors[0]
+        return len(self._idle)
+
+    def stats(self) -> Dict:
+        """Pool counters, current sizes and the supervisor's memory figures"""
+        with self._condition:
+            stats = dict(self._stats, idle=len(self._idle), in_use=len(self._in_use))
+            if self._stats["created"]:
+                stats["avg_startup_s"] = round(self._startup_seconds / self._stats["created"], 2)
+        stats.update(self.supervisor.stats())
+        return stats
+
+    def close(self):
+        """Close every idle browser; checked-out ones are closed when returned"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for entry in idle:
+            self._retire(entry)
+        self.supervisor.reap_orphans()
+
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._creating
+
+    def _create(self, lend=True):
+        """Start a browser; the caller must have reserved a slot in ``_creating``"""
+        started = time.monotonic()
+        try:
+            entry = _PoolEntry(self.factory())
+            self.supervisor.register(entry.browser)
+        except Exception:
+            with self._condition:
+                self._creating -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._creating -= 1
+            self._stats["created"] += 1
+            self._startup_seconds += time.monotonic() - started
+            if lend:
+                self._in_use[id(entry.browser)] = entry
+            else:
+                self._idle.append(entry)
+            self._condition.notify()
+        return entry
+
+    def _reset(self, entry):
+        try:
+            entry.browser.reset()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to reset pooled browser: {str(e)}")
+            return False
+
+    def _recycle_reason(self, browser, entry=None) -> Optional[str]:
+        """Why a browser should be replaced ("killed", "pages" or "memory"), or None"""
+        if getattr(browser, "broken", False):
+            return "killed"
+        with self._condition:
+            entry = entry or self._in_use[id(browser)]
+            uses = entry.uses
+        if uses >= self.max_uses:
+            return "pages"
+        if self.supervisor.over_limit(browser):
+            return "memory"
+        return None
+
+    def _retire(self, entry):
+        self.supervisor.unregister(entry.browser)
+        try:
+            entry.browser.close()
+        except Exception as e:
+            logger.error(f"Error closing pooled browser: {str(e)}")
+        with self._condition:
+            self._stats["retired"] += 1
+            self._condition.notify()
+
+    def _reap_idle(self):
+        """Close browsers that have been idle longer than ``idle_timeout``"""
+        while not self._closed:
+            time.sleep(min(self.idle_timeout, 30))
+            now = time.monotonic()
+            with self._condition:
+                expired = [e for e in self._idle if now - e.last_used >= self.idle_timeout]
+                self._idle = [e for e in self._idle if e not in expired]
+            for entry in expired:
+                logger.info("Closing idle pooled browser")
+                self._retire(entry)
@@ -1,27 +1,80 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from ...browser_base import BrowserBase
+from ...cdp_cookies import from_cdp_cookie, set_cookies
+from ...consent import ConsentPresets
+from ...driver_cache import resolve_driver
+from ...load_profile import LoadProfile
+from ...profile_template import ProfileTemplate
+from ...url_utils import registrable_domain
+from ...readiness import NETWORK_TRACKER_SCRIPT, STALE_DOCUMENT_MARKER, PageReadiness
+from ...watchdog import DeadlineExceeded
+from ...web_storage import WebStorageCapture
 import time
 import logging
 import os
 import sys
 import subprocess
 import psutil
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Chrome and ChromeDriver process names on Windows, Linux and macOS
+CHROME_PROCESS_NAMES = {
+    'chrome.exe', 'chromedriver.exe',
+    'chrome', 'google-chrome', 'chromium', 'chromium-browser', 'chromedriver',
+    'Google Chrome', 'Chromium',
+}
+
 class ChromeBrowser(BrowserBase):
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, kill_existing=True, load_profile: Optional[LoadProfile] = None,
+                 page_load_strategy: str = "normal", page_load_timeout: Optional[float] = None,
+                 user_data_dir: Optional[str] = None, profile_template: Optional[ProfileTemplate] = None,
+                 isolation: Optional[str] = None):
         super().__init__()
         self.chrome_process = None
         self.headless = headless
+        # Parallel workers must not kill each other's Chrome processes
+        self.kill_existing = kill_existing
+        # Resources to skip while loading pages (None loads everything)
+        self.load_profile = load_profile
+        # "normal" waits for the load event, "eager" for DOMContentLoaded, "none" for nothing
+        self.page_load_strategy = page_load_strategy
+        # Navigation is aborted after this many seconds (None keeps the driver default)
+        self.page_load_timeout = page_load_timeout
+        # Readiness criterion and timing of the last page loaded
+        self.last_readiness = None
+        # Blocked requests and bytes saved on the last page, or over the last
+        # ``iter_cookies_from_tabs`` stream (lean profile only)
+        self.last_load_stats = None
+        # Consent preset matched on the last page (consent presets only)
+        self.last_consent = None
+        # Web storage of the last page (web storage capture only)
+        self.last_storage = None
+        # Headless only: an existing profile directory, or a template cloned per browser
+        self.user_data_dir = user_data_dir
+        self.profile_template = profile_template
+        self._profile_clone = None
+        # None shares one cookie jar; "url" or "site" collects in a fresh browser context per URL or site
+        if isolation not in (None, "url", "site"):
+            raise ValueError(f"Unknown isolation mode: {isolation}")
+        self.isolation = isolation
+        # (browser context id, target id, URL or site) of the current isolated context
+        self._context = None
+        self._home_handle = None
+        # Set once creating a context failed, so it is not tried (and logged) for every URL
+        self._contexts_unavailable = False
+        # Set once consent presets were refused on the user's profile, so it is logged once
+        self._presets_refused = False
+        started = time.monotonic()
         self.setup_driver()
+        self.startup_seconds = time.monotonic() - started
     
     def setup_driver(self):
         """Set up Chrome WebDriver with optimized settings"""
@@ -29,7 +82,8 @@ class ChromeBrowser(BrowserBase):
             logger.info("Setting up Chrome browser...")
             
             # Kill any existing Chrome instances
-            self._kill_existing_chrome()
+            if self.kill_existing:
+                self._kill_existing_chrome()
             
             # Create Chrome options
             options = ChromeOptions()
@@ -38,10 +92,12 @@ class ChromeBrowser(BrowserBase):
             options.add_argument('--enable-javascript')
             options.add_argument('--enable-cookies')
             options.add_argument('--start-maximized')
+            options.page_load_strategy = self.page_load_strategy
+            if self.load_profile:
+                self.load_profile.configure(options)
             
-            # Get Chrome driver
-            driver_manager = ChromeDriverManager()
-            driver_path = driver_manager.install()
+            # Get Chrome driver (cached per installed Chrome version)
+            driver_path = resolve_driver("chrome")
             
             # Ensure we're using the correct executable
             if sys.platform == 'win32':
@@ -56,12 +112,20 @@ class ChromeBrowser(BrowserBase):
                 options.add_argument('--no-sandbox')
                 options.add_argument('--disable-dev-shm-usage')
                 options.add_argument('--window-size=1920,1080')
+                options.add_argument('--no-first-run')
+                options.add_argument('--no-default-browser-check')
+                if self.profile_template:
+                    self._profile_clone = self.profile_template.clone()
+                    self.user_data_dir = self._profile_clone
+                if self.user_data_dir:
+                    options.add_argument(f'--user-data-dir={self.user_data_dir}')
                 
                 # Create service
                 service = ChromeService(executable_path=driver_path)
                 
                 # Initialize driver directly in headless mode
                 self.driver = webdriver.Chrome(service=service, options=options)
+                self._install_page_hooks()
                 logger.info("Chrome WebDriver setup successful in headless mode")
                 return
             
@@ -92,6 +156,7 @@ class ChromeBrowser(BrowserBase):
             
             # Initialize driver
             self.driver = webdriver.Chrome(service=service, options=options)
+            self._install_page_hooks()
             logger.info("Chrome WebDriver setup successful")
             
         except Exception as e:
@@ -99,11 +164,88 @@ class ChromeBrowser(BrowserBase):
             self._cleanup()
             raise
     
+    def _install_page_hooks(self):
+        """Inject scripts that must run before any page script, such as the in-flight request tracker"""
+        if self.page_load_timeout:
+            self.driver.set_page_load_timeout(self.page_load_timeout)
+        self._install_tab_hooks()
+    
+    def _install_tab_hooks(self):
+        """DevTools setup that only applies to the current tab, so every new tab needs it"""
+        try:
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": NETWORK_TRACKER_SCRIPT})
+        except Exception as e:
+            logger.warning(f"Could not install network tracker, network-idle detection will be less precise: {str(e)}")
+        if self.load_profile:
+            try:
+                self.load_profile.apply(self.driver)
+            except Exception as e:
+                logger.warning(f"Could not apply the lean load profile, loading all resources: {str(e)}")
+    
+    def _open_context(self):
+        """
+        Open a blank tab in a new browser context and switch to it.
+        
+        A browser context is Chrome's incognito profile: its own cookie jar,
+        storage and cache inside the running browser, created in milliseconds.
+        
+        Returns:
+            ``(browser context id, target id)``; the target id is the tab's window handle
+        """
+        context_id = self.driver.execute_cdp_cmd("Target.createBrowserContext", {"disposeOnDetach": True})["browserContextId"]
+        try:
+            target_id = self.driver.execute_cdp_cmd(
+                "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+            )["targetId"]
+            self.driver.switch_to.window(target_id)
+        except Exception:
+            self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+            raise
+        self._install_tab_hooks()
+        return context_id, target_id
+    
+    def _discard_context(self, context_id: str, target_id: str, home_handle: str):
+        """Close a context's tab and drop the context with all its cookies and storage"""
+        try:
+            # Commands go through the current tab, which must not be the one being closed
+            self.driver.switch_to.window(home_handle)
+            self.driver.execute_cdp_cmd("Target.closeTarget", {"targetId": target_id})
+            self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except Exception as e:
+            logger.warning(f"Could not dispose browser context: {str(e)}")
+    
+    def _enter_context(self, url: str, isolation: Optional[str] = None):
+        """Switch to a fresh context for ``url``, keeping the current one for the same site in "site" mode"""
+        isolation = isolation or self.isolation
+        key = registrable_domain(url) if isolation == "site" else url
+        if self._context and isolation == "site" and self._context[2] == key:
+            return
+        self._leave_context()
+        if not self._contexts_unavailable:
+            self._home_handle = self.driver.current_window_handle
+            try:
+                context_id, target_id = self._open_context()
+                self._context = (context_id, target_id, key)
+                return
+            except Exception as e:
+                self._contexts_unavailable = True
+                logger.warning(f"Could not create an isolated browser context, collecting in the shared cookie jar: {str(e)}")
+        # Without contexts pages share the jar, which may only be wiped when this browser owns it
+        if self.owns_cookie_jar:
+            self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    
+    def _leave_context(self):
+        """Discard the current isolated context, if any, and go back to the main tab"""
+        if self._context:
+            context_id, target_id, _ = self._context
+            self._context = None
+            self._discard_context(context_id, target_id, self._home_handle)
+    
     def _kill_existing_chrome(self):
-        """Kill any existing Chrome processes"""
+        """Kill any existing Chrome and ChromeDriver processes"""
         try:
             for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'] == 'chrome.exe':
+                if proc.info['name'] in CHROME_PROCESS_NAMES:
                     try:
                         proc.kill()
                     except:
@@ -112,6 +254,24 @@ class ChromeBrowser(BrowserBase):
         except:
             pass
     
+    @property
+    def owns_cookie_jar(self) -> bool:
+        """
+        Whether the cookie jar belongs to this browser alone and may be wiped.
+        
+        Only headless browsers on a temporary profile or a clone of the
+        profile template qualify; visible mode runs on the user's own Chrome
+        profile, and a given ``user_data_dir`` may be a real profile too.
+        """
+        return self.headless and (not self.user_data_dir or self._profile_clone is not None)
+    
+    def process_ids(self):
+        """PIDs of the WebDriver and, in visible mode, the Chrome it attached to"""
+        pids = super().process_ids()
+        if self.chrome_process:
+            pids.append(self.chrome_process.pid)
+        return pids
+    
     def _cleanup(self):
         """Clean up resources"""
         if self.chrome_process:
@@ -121,30 +281,173 @@ class ChromeBrowser(BrowserBase):
             except:
                 pass
             self.chrome_process = None
+        self._release_profile()
+    
+    def _release_profile(self):
+        """Delete this browser's clone of the profile template"""
+        if self._profile_clone:
+            self.profile_template.release(self._profile_clone)
+            self._profile_clone = None
+    
+    def close(self):
+        if self.driver and not self.broken:
+            self._leave_context()
+        super().close()
+        self._release_profile()
+    
+    def reset(self):
+        """
+        Clear the cookies and go to a blank page.
+        
+        The whole jar is cleared when this browser owns it; on a user's
+        profile only the current domain's cookies go, as WebDriver does.
+        """
+        if not self.driver:
+            raise Exception("Driver not initialized")
+        self._leave_context()
+        if self.owns_cookie_jar:
+            self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        else:
+            self.driver.delete_all_cookies()
+        self.driver.get("about:blank")
+    
+    def load_cookies(self, url, cookies):
+        """
+        Restore a stored cookie jar, then load the URL once.
+        
+        All cookies, including ones for other domains, are set through DevTools
+        before the first navigation, so the page sees the session on its first
+        load. Falls back to WebDriver's per-cookie path if DevTools fails.
+        """
+        if not self.driver:
+            raise Exception("Driver not initialized")
+        if not cookies:
+            logger.info("No cookies provided")
+            return False
+        
+        try:
+            restored = set_cookies(self.driver, cookies)
+        except Exception as e:
+            logger.warning(f"DevTools cookie restore failed, adding cookies one by one: {str(e)}")
+            return super().load_cookies(url, cookies)
+        logger.info(f"Restored {restored} of {len(cookies)} cookies through DevTools")
+        
+        try:
+            self.driver.get(url)
+            return True
+        except Exception as e:
+            logger.error(f"Error loading cookies: {str(e)}")
+            return False
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         super().__exit__(exc_type, exc_val, exc_tb)
         self._cleanup()
 
-    def get_cookies_from_url(self, url: str, wait_time: int = 3, progress_callback=None) -> List[Dict]:
-        """Get cookies from a specific URL with proper waiting and error handling"""
+    def get_all_cookies(self) -> List[Dict]:
+        """
+        Read the whole browser cookie store in one DevTools call.
+        
+        Unlike ``driver.get_cookies()`` this includes third-party and partitioned
+        cookies, plus size, priority, session and partition key attributes.
+        """
         try:
+            params = {"browserContextId": self._context[0]} if self._context else {}
+            cdp_cookies = self.driver.execute_cdp_cmd("Storage.getCookies", params)["cookies"]
+        except Exception:
+            # Chrome versions before Storage.getCookies
+            cdp_cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        return [from_cdp_cookie(cookie) for cookie in cdp_cookies]
+    
+    def get_cookies_from_url(self, url: str, wait_time: int = 3, progress_callback=None,
+                             readiness: Optional[PageReadiness] = None,
+                             capture_mode: str = "document",
+                             consent_presets: Optional[ConsentPresets] = None,
+                             web_storage: Optional[WebStorageCapture] = None) -> List[Dict]:
+        """
+        Get cookies from a specific URL with proper waiting and error handling.
+        
+        The page is released as soon as ``readiness`` says it has settled;
+        ``wait_time`` is only the upper bound when no readiness is given.
+        
+        ``capture_mode`` "document" returns the cookies visible to the page,
+        "devtools" the whole cookie jar filled by this page load (the jar is
+        cleared before navigating so earlier URLs do not leak in). A jar this
+        browser does not own, such as the user's profile in visible mode, is
+        never cleared: the page loads in a throwaway browser context instead.
+        
+        With ``isolation`` set, the page loads in a fresh browser context
+        instead, which is discarded after the URL ("url") or once the next
+        URL belongs to another site ("site").
+        
+        ``consent_presets`` sets consent cookies before navigating, unless the
+        jar is the user's profile, and the preset that matched the page is
+        kept in ``last_consent``. With
+        ``web_storage`` the page's storage is read in the same visit and kept
+        in ``last_storage``.
+        
+        A navigation that runs past ``page_load_timeout`` is stopped and the
+        cookies set so far are read as usual. If the browser is killed
+        mid-page (see ``kill``), ``DeadlineExceeded`` is raised carrying the
+        cookies seen before the kill.
+        """
+        tracker = None
+        isolation = self.isolation
+        if capture_mode == "devtools" and not isolation and not self.owns_cookie_jar:
+            isolation = "url"
+        try:
+            if isolation:
+                self._enter_context(url, isolation)
+            elif capture_mode == "devtools":
+                self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            if self.load_profile:
+                # Drop network events from earlier pages
+                self.load_profile.page_stats(self.driver)
+            self.last_consent = None
+            self.last_storage = None
+            if consent_presets and not self._presets_allowed(bool(self._context)):
+                consent_presets = None
+            injected = consent_presets.apply(self.driver, url) if consent_presets else []
+            
+            if self.page_load_strategy == "none":
+                # get() returns at once, so polls must not mistake the old page for the new one
+                self.driver.execute_script(STALE_DOCUMENT_MARKER)
+            
             logger.info(f"Navigating to {url}")
-            self.driver.get(url)
+            try:
+                self.driver.get(url)
+            except TimeoutException:
+                logger.warning(f"{url} did not load within {self.page_load_timeout}s, using what has loaded")
+                self.driver.execute_script("window.stop();")
             
             if progress_callback:
                 progress_callback(0.5, f"Loading {url}")  # 50% progress after page starts loading
             
-            # Wait for the page to load
-            logger.info(f"Waiting {wait_time} seconds for page load")
-            time.sleep(wait_time)  # Basic wait
+            # Wait for the page to settle
+            readiness = readiness or PageReadiness(max_wait=wait_time)
+            tracker = readiness.tracker()
+            while tracker.check(self.driver) is None:
+                time.sleep(readiness.poll_interval)
+            self.last_readiness = tracker.result()
             
             if progress_callback:
                 progress_callback(0.8, f"Getting cookies from {url}")  # 80% progress before getting cookies
             
             # Get cookies
-            cookies = self.driver.get_cookies()
+            if capture_mode == "devtools":
+                cookies = self.get_all_cookies()
+            else:
+                cookies = self.driver.get_cookies()
+            if consent_presets:
+                self.last_consent = consent_presets.detect(self.driver, url, injected)
+                cookies = consent_presets.strip(cookies, injected)
             logger.info(f"Found {len(cookies)} cookies")
+            if web_storage:
+                self.last_storage = web_storage.capture(self.driver)
+            
+            if self.load_profile:
+                self.last_load_stats = self.load_profile.page_stats(self.driver)
+                logger.info(f"Lean profile blocked {self.last_load_stats['blocked_requests']} requests "
+                            f"(~{self.last_load_stats['estimated_bytes_saved'] // 1024} KB saved, estimated)")
             
             if progress_callback:
                 progress_callback(1.0, f"Completed {url}")  # 100% progress after getting cookies
@@ -152,5 +455,230 @@ class ChromeBrowser(BrowserBase):
             return cookies
             
         except Exception as e:
+            if self.broken:
+                partial_cookies = tracker.last_cookies if tracker else None
+                raise DeadlineExceeded(f"{url} exceeded its deadline and the browser was killed",
+                                       partial_cookies) from e
             logger.error(f"Error getting cookies from {url}: {str(e)}")
-            raise 
\ No newline at end of file
+            raise 
+        finally:
+            if isolation == "url" and not self.broken:
+                self._leave_context()
+    
+    def iter_cookies_from_tabs(self, urls: Iterable[str], tabs: int = 4, wait_time: int = 3,
+                               progress_callback: Optional[Callable] = None,
+                               readiness: Optional[PageReadiness] = None,
+                               capture_mode: str = "document",
+                               consent_presets: Optional[ConsentPresets] = None,
+                               web_storage: Optional[WebStorageCapture] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Load URLs in up to ``tabs`` tabs of this browser at once.
+        
+        A tab takes the next URL as soon as its page has settled, so one slow
+        page does not hold up the others. Navigation is started with a script
+        so it does not block, and every tab is polled with its own readiness
+        tracker.
+        
+        Cookies are read per tab: "document" mode returns the cookies visible
+        to the tab's page, "devtools" mode the cookies the browser holds for
+        the page and every origin it loaded resources from. The jar is shared
+        by all tabs, so unlike ``get_cookies_from_url`` it is not cleared
+        between pages, unless ``isolation`` is set: then every URL loads in a
+        tab of its own browser context, discarded once its cookies are read.
+        "devtools" mode would pick up cookies other tabs set for the same
+        origins, so it always isolates tabs; where this Chrome cannot create
+        contexts its results are flagged with "shared_jar".
+        
+        Yields:
+            ``(url, result)`` pairs as pages finish, where result is a
+            dictionary with "cookies", "readiness" and, with
+            ``consent_presets`` or ``web_storage``, "consent" or "storage",
+            or the exception that made the URL fail.
+            ``progress_callback(url, fraction, message)`` reports progress.
+        
+        Tabs share one network log, so with a load profile the blocked
+        requests cannot be told apart per page: ``last_load_stats`` holds
+        the totals of the whole stream once it ends, with its "pages".
+        """
+        readiness = readiness or PageReadiness(max_wait=wait_time)
+        url_iter = iter(urls)
+        main_handle = self.driver.current_window_handle
+        free_handles = [main_handle]
+        opened_handles = []
+        # Window handle -> browser context id of isolated tabs
+        contexts = {}
+        # Window handle -> (url, readiness tracker, injected consent cookies) for pages still loading
+        active = {}
+        exhausted = False
+        load_totals = None
+        if self.load_profile:
+            # Drop network events from earlier pages
+            self.load_profile.page_stats(self.driver)
+            load_totals = {"pages": 0, "blocked_requests": 0, "estimated_bytes_saved": 0, "bytes_loaded": 0}
+        self.last_load_stats = None
+        
+        def report(url, fraction, message):
+            if progress_callback:
+                progress_callback(url, fraction, message)
+        
+        def isolating():
+            return self._isolating_tabs() or (capture_mode == "devtools" and not self._contexts_unavailable)
+        
+        try:
+            while True:
+                # Hand out URLs to idle tabs, opening tabs up to the limit
+                while not exhausted and (len(active) < tabs if isolating()
+                                         else free_handles or len(opened_handles) + 1 < tabs):
+                    url = next(url_iter, None)
+                    if url is None:
+                        exhausted = True
+                        break
+                    handle = None
+                    if isolating():
+                        try:
+                            context_id, handle = self._open_context()
+                            contexts[handle] = context_id
+                        except Exception as e:
+                            self._contexts_unavailable = True
+                            logger.warning(f"Could not create an isolated browser context, "
+                                           f"collecting in the shared cookie jar: {str(e)}")
+                            self.driver.switch_to.window(main_handle)
+                    if handle is None and free_handles:
+                        handle = free_handles.pop()
+                        self.driver.switch_to.window(handle)
+                    elif handle is None:
+                        self.driver.switch_to.new_window("tab")
+                        handle = self.driver.current_window_handle
+                        opened_handles.append(handle)
+                        self._install_tab_hooks()
+                    try:
+                        injected = []
+                        if consent_presets and self._presets_allowed(handle in contexts):
+                            injected = consent_presets.apply(self.driver, url)
+                        self._start_navigation(url)
+                    except Exception as e:
+                        logger.error(f"Error navigating to {url}: {str(e)}")
+                        self._release_tab(handle, free_handles, contexts, main_handle)
+                        yield url, e
+                        continue
+                    active[handle] = (url, readiness.tracker(), injected)
+                    report(url, 0.5, f"Loading {url}")
+                
+                if not active:
+                    break
+                
+                for handle in list(active):
+                    url, tracker, injected = active[handle]
+                    self.driver.switch_to.window(handle)
+                    if tracker.check(self.driver) is None:
+                        continue
+                    
+                    del active[handle]
+                    shared_jar = capture_mode == "devtools" and handle not in contexts
+                    report(url, 0.8, f"Getting cookies from {url}")
+                    try:
+                        cookies = self._tab_cookies(capture_mode)
+                        consent = None
+                        storage = web_storage.capture(self.driver) if web_storage else None
+                        if consent_presets:
+                            consent = consent_presets.detect(self.driver, url, injected)
+                            cookies = consent_presets.strip(cookies, injected)
+                    except Exception as e:
+                        logger.error(f"Error getting cookies from {url}: {str(e)}")
+                        yield url, e
+                        continue
+                    finally:
+                        self._release_tab(handle, free_handles, contexts, main_handle)
+                    if load_totals is not None:
+                        load_totals["pages"] += 1
+                        # Drain the log as pages finish so it never grows with the stream
+                        self._add_load_stats(load_totals)
+                    logger.info(f"Found {len(cookies)} cookies on {url}")
+                    report(url, 1.0, f"Completed {url}")
+                    result = {"cookies": cookies, "readiness": tracker.result()}
+                    if consent:
+                        result["consent"] = consent
+                    if storage:
+                        result["storage"] = storage
+                    if shared_jar:
+                        # Other tabs' pages may have added cookies for the same origins
+                        result["shared_jar"] = True
+                    yield url, result
+                
+                if active:
+                    time.sleep(readiness.poll_interval)
+        except Exception as e:
+            # The browser itself failed: every page still loading fails with it
+            for url, _, _ in active.values():
+                yield url, e
+            active.clear()
+            raise
+        finally:
+            for handle, context_id in contexts.items():
+                self._discard_context(context_id, handle, main_handle)
+            self._close_tabs(opened_handles, main_handle)
+            if load_totals is not None:
+                self._add_load_stats(load_totals)
+                self.last_load_stats = load_totals
+                logger.info(f"Lean profile blocked {load_totals['blocked_requests']} requests over "
+                            f"{load_totals['pages']} pages (~{load_totals['estimated_bytes_saved'] // 1024} KB saved, estimated)")
+    
+    def _presets_allowed(self, in_context: bool) -> bool:
+        """Consent presets write year-long cookies, so never into a jar the user browses with"""
+        if self.owns_cookie_jar or in_context:
+            return True
+        if not self._presets_refused:
+            self._presets_refused = True
+            logger.warning("Consent presets are only set on headless or isolated profiles, "
+                           "not on the user's Chrome profile; collecting without them")
+        return False
+    
+    def _isolating_tabs(self) -> bool:
+        """Whether tabs mode opens a browser context per URL"""
+        return bool(self.isolation) and not self._contexts_unavailable
+    
+    def _release_tab(self, handle: str, free_handles: List[str], contexts: Dict[str, str], main_handle: str):
+        """Make a finished tab available again, or discard it with its context when isolating"""
+        context_id = contexts.pop(handle, None)
+        if context_id:
+            self._discard_context(context_id, handle, main_handle)
+        else:
+            free_handles.append(handle)
+    
+    def _start_navigation(self, url: str):
+        """Navigate the current tab without waiting for the page to load"""
+        self.driver.execute_script(
+            STALE_DOCUMENT_MARKER + "window.location.href = arguments[0];", url
+        )
+    
+    def _tab_cookies(self, capture_mode: str) -> List[Dict]:
+        """Cookies belonging to the page in the current tab"""
+        if capture_mode != "devtools":
+            return self.driver.get_cookies()
+        
+        # The page URL plus every origin it loaded resources from
+        page_urls = self.driver.execute_script(
+            "return [location.href].concat("
+            "performance.getEntriesByType('resource').map(e => e.name));"
+        )
+        cookie_urls = list(dict.fromkeys(u for u in page_urls if u.startswith(("http://", "https://"))))
+        cdp_cookies = self.driver.execute_cdp_cmd("Network.getCookies", {"urls": cookie_urls})["cookies"]
+        return [from_cdp_cookie(cookie) for cookie in cdp_cookies]
+    
+    def _add_load_stats(self, totals: Dict):
+        """Add the network log drained since the last call to ``totals``"""
+        for key, value in self.load_profile.page_stats(self.driver).items():
+            totals[key] += value
+    
+    def _close_tabs(self, handles: List[str], main_handle: str):
+        """Close extra tabs and return to the main tab"""
+        for handle in handles:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception as e:
+                logger.warning(f"Could not close tab: {str(e)}")
+        try:
+            self.driver.switch_to.window(main_handle)
+        except Exception as e:
+            logger.warning(f"Could not switch back to the main tab: {str(e)}")
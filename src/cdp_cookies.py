@@ -0,0 +1,105 @@
+"""
+Conversion between DevTools protocol cookies and the WebDriver cookie format.
+"""
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def from_cdp_cookie(cookie: Dict) -> Dict:
+    """
+    Convert a DevTools ``Network.Cookie`` into the dict shape returned by
+    ``driver.get_cookies()``, keeping the extra DevTools attributes
+    (size, priority, session and partitionKey).
+    """
+    result = {
+        'name': cookie.get('name'),
+        'value': cookie.get('value'),
+        'domain': cookie.get('domain'),
+        'path': cookie.get('path', '/'),
+        'secure': cookie.get('secure', False),
+        'httpOnly': cookie.get('httpOnly', False),
+        # Chrome reports unspecified SameSite as Lax through WebDriver
+        'sameSite': cookie.get('sameSite', 'Lax'),
+        'size': cookie.get('size'),
+        'priority': cookie.get('priority'),
+        'session': cookie.get('session', False),
+    }
+
+    if not result['session'] and cookie.get('expires', -1) >= 0:
+        result['expiry'] = int(cookie['expires'])
+
+    # Older Chrome versions report the partition key as the top-level site string
+    partition_key = cookie.get('partitionKey')
+    if isinstance(partition_key, dict):
+        partition_key = partition_key.get('topLevelSite')
+    if partition_key:
+        result['partitionKey'] = partition_key
+
+    return result
+
+
+def to_cdp_cookie(cookie: Dict) -> Dict:
+    """
+    Convert a WebDriver-format cookie (as stored in the database) into a
+    DevTools ``Network.CookieParam``.
+
+    Domains without a leading dot are host-only in WebDriver output; DevTools
+    would turn a plain ``domain`` into a domain cookie, so those are set
+    through ``url`` instead.
+    """
+    domain = cookie.get('domain') or ''
+    path = cookie.get('path') or '/'
+    param = {
+        'name': cookie.get('name'),
+        'value': cookie.get('value', ''),
+        'path': path,
+        'secure': bool(cookie.get('secure', False)),
+        'httpOnly': bool(cookie.get('httpOnly', False)),
+    }
+    if domain.startswith('.'):
+        param['domain'] = domain
+    else:
+        param['url'] = f"{'https' if param['secure'] else 'http'}://{domain}{path}"
+
+    if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+        param['sameSite'] = cookie['sameSite']
+    if cookie.get('expiry') is not None and not cookie.get('session'):
+        param['expires'] = cookie['expiry']
+    if cookie.get('priority') in ('Low', 'Medium', 'High'):
+        param['priority'] = cookie['priority']
+    if cookie.get('partitionKey'):
+        param['partitionKey'] = {'topLevelSite': cookie['partitionKey'], 'hasCrossSiteAncestor': False}
+    return param
+
+
+def set_cookies(driver, cookies: List[Dict]) -> int:
+    """
+    Install WebDriver-format cookies for any domain through DevTools; returns how many were set.
+
+    The whole jar goes in one ``Network.setCookies`` call. Chrome rejects
+    that call outright if a single cookie is invalid, so in that case every
+    cookie is set on its own and the bad ones are skipped. Raises if
+    DevTools accepted none, e.g. in browsers without it.
+    """
+    params = [to_cdp_cookie(cookie) for cookie in cookies]
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+        return len(params)
+    except Exception as e:
+        logger.debug(f"Bulk cookie restore rejected, setting cookies one by one: {str(e)}")
+
+    restored = 0
+    last_error = None
+    for param in params:
+        try:
+            # Older Chrome versions report failure in the result instead of raising
+            if driver.execute_cdp_cmd("Network.setCookie", param).get('success', True):
+                restored += 1
+        except Exception as e:
+            last_error = e
+            logger.warning(f"Failed to set cookie {param['name']}: {str(e)}")
+    if params and not restored:
+        raise RuntimeError(f"DevTools set none of the cookies: {str(last_error)}")
+    return restored
@@ -0,0 +1,128 @@
+"""
+Headless command line collector streaming JSONL results.
+
+Reads URLs, one per line, from files or stdin and writes one JSON record per
+URL to stdout (or ``--output``) as soon as it finishes, so it can sit in a
+pipeline over inputs of any size::
+
+    python -m src.cli urls.txt --workers 4 --tabs 4 > cookies.jsonl
+    cat urls.txt | python -m src.cli - | jq -c 'select(.success) | {url, count}'
+"""
+from typing import Dict, Iterable, Iterator, List, Optional
+from .gui.controller import BrowserController
+import argparse
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "browser": "chrome",
+    "headless": True,
+    "wait_time": 10,
+    "workers": 1,
+    "save_cookies": False,
+}
+
+
+def read_urls(paths: List[str]) -> Iterator[str]:
+    """Lazily yield the URLs in the given files ("-" for stdin), skipping blank lines and # comments"""
+    for path in paths:
+        handle = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+
+def load_settings(args: argparse.Namespace) -> Dict:
+    """Settings file (if present) overlaid with the command line options"""
+    settings = dict(DEFAULT_SETTINGS)
+    if args.settings and os.path.exists(args.settings):
+        with open(args.settings, "r") as f:
+            settings.update(json.load(f))
+    settings.pop("urls", None)
+    # No window to show in a pipeline
+    settings["headless"] = True
+
+    for option, key in (("workers", "workers"), ("tabs", "tabs"), ("wait_time", "wait_time")):
+        if getattr(args, option) is not None:
+            settings[key] = getattr(args, option)
+    if args.save is not None:
+        settings["save_cookies"] = args.save
+    if args.force_refresh:
+        settings["force_refresh"] = True
+    return settings
+
+
+def write_records(results: Iterable, output) -> int:
+    """Write one JSON line per ``(url, result)``, flushed as it arrives; returns how many"""
+    written = 0
+    for url, result in results:
+        output.write(json.dumps({"url": url, **result}, default=str) + "\n")
+        output.flush()
+        written += 1
+    return written
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Collect cookies headlessly, writing one JSON record per URL."
+    )
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="Files with one URL per line; '-' or nothing reads stdin")
+    parser.add_argument("-o", "--output", help="Write JSONL here instead of stdout")
+    parser.add_argument("--settings", default="data/settings.json",
+                        help="Settings file to start from (default: data/settings.json if present)")
+    parser.add_argument("--workers", type=int, help="Browsers collecting in parallel")
+    parser.add_argument("--tabs", type=int, help="Pages each browser loads at once")
+    parser.add_argument("--wait-time", dest="wait_time", type=int, help="Max page load wait in seconds")
+    parser.add_argument("--save", dest="save", action="store_true", default=None,
+                        help="Also store cookies in the database")
+    parser.add_argument("--no-save", dest="save", action="store_false", help="Do not store cookies")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="Recollect URLs that are still inside their freshness window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    settings = load_settings(args)
+
+    controller = BrowserController()
+    success, message = controller.initialize_browser(settings)
+    if not success:
+        logger.error(message)
+        controller.cleanup()
+        return 1
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    results = controller.iter_results(read_urls(args.inputs))
+    try:
+        written = write_records(results, output)
+        logger.info(f"Wrote {written} records")
+        return 0
+    except BrokenPipeError:
+        # The reader went away (e.g. "| head"); keep the final flush from failing again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except KeyboardInterrupt:
+        logger.warning("Interrupted")
+        return 130
+    finally:
+        # Stops the workers still running
+        results.close()
+        if output is not sys.stdout:
+            output.close()
+        controller.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
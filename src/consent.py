@@ -0,0 +1,479 @@
+"""
+Single-pass cookie consent banner detection with per-domain memoization,
+and consent-state cookie presets that keep banners from rendering at all.
+"""
+from .cdp_cookies import set_cookies
+from .url_utils import registrable_domain
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
+import base64
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Accept buttons of common consent-management platforms, then generic patterns
+CONSENT_SELECTORS = [
+    '#onetrust-accept-btn-handler',
+    '#didomi-notice-agree-button',
+    '#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll',
+    '#CybotCookiebotDialogBodyButtonAccept',
+    '.qc-cmp2-summary-buttons button[mode="primary"]',
+    'button.fc-cta-consent',
+    'button[id*="cookie"]',
+    'button[id*="consent"]',
+    'button[class*="cookie"]',
+    'button[class*="consent"]',
+    'button[data-testid*="cookie"]',
+    'button[data-testid*="consent"]',
+]
+
+# Button labels (lower case) matched when no selector hits, most specific first
+CONSENT_TEXTS = [
+    'accept all cookies',
+    'accept all',
+    'allow all cookies',
+    'allow all',
+    'i agree',
+    'i accept',
+    'accept',
+    'allow',
+    'agree',
+    'got it',
+]
+
+# Polls the page for any selector or button text and clicks the first visible
+# match, so detection costs one WebDriver round trip however many candidates
+# there are. Buttons may carry more words after the label ("Accept all and
+# close"); links must match it exactly, so "Accept our terms" in a navigation
+# menu is never clicked.
+_DETECT_SCRIPT = """
+const [selectors, texts, timeoutMs, done] = arguments;
+const visible = (el) => {
+    const rect = el.getBoundingClientRect();
+    const style = window.getComputedStyle(el);
+    return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden'
+        && style.display !== 'none' && !el.disabled;
+};
+const find = () => {
+    for (const selector of selectors) {
+        let elements;
+        try { elements = document.querySelectorAll(selector); } catch (e) { continue; }
+        for (const el of elements) {
+            if (visible(el)) return [selector, el];
+        }
+    }
+    if (!texts.length) return null;
+    const buttons = Array.from(document.querySelectorAll(
+        'button, [role="button"], input[type="button"], input[type="submit"], a'
+    )).filter(visible);
+    for (const text of texts) {
+        for (const el of buttons) {
+            const label = (el.innerText || el.value || '').trim().toLowerCase();
+            const link = el.tagName === 'A' && el.getAttribute('role') !== 'button';
+            if (label === text || (!link && label.startsWith(text + ' ') && label.length <= 40)) {
+                return ['text:' + text, el];
+            }
+        }
+    }
+    return null;
+};
+const started = Date.now();
+const attempt = () => {
+    const hit = find();
+    if (hit) {
+        hit[1].click();
+        done(hit[0]);
+    } else if (Date.now() - started >= timeoutMs) {
+        done(null);
+    } else {
+        setTimeout(attempt, 200);
+    }
+};
+attempt();
+"""
+
+
+class ConsentMemo:
+    """
+    Remember per registrable domain which consent selector worked, or that
+    the site shows no banner.
+
+    A banner can render after the probe gave up, or only on some loads, so a
+    domain counts as having no banner after ``negative_after`` misses in a
+    row, and that answer expires after ``negative_ttl`` seconds. Pass
+    ``path`` to keep the memo across runs.
+    """
+
+    # Stored instead of a selector when a domain has no banner
+    NO_BANNER = ""
+
+    def __init__(self, path: Optional[str] = None, negative_ttl: float = 3600, negative_after: int = 2):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.negative_after = max(1, int(negative_after))
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to load consent memo: {str(e)}")
+
+    def get(self, domain: str) -> Optional[str]:
+        """Known selector, ``NO_BANNER``, or None when the domain must be probed"""
+        with self._lock:
+            entry = self._entries.get(domain)
+            if not entry:
+                return None
+            if entry["key"] == self.NO_BANNER:
+                if time.time() - entry["seen_at"] > self.negative_ttl:
+                    del self._entries[domain]
+                    return None
+                if entry.get("misses", 1) < self.negative_after:
+                    return None
+            return entry["key"]
+
+    def remember(self, domain: str, key: Optional[str]):
+        """Record a working selector, or ``NO_BANNER``; None forgets the domain"""
+        with self._lock:
+            if key is None:
+                self._entries.pop(domain, None)
+            elif key == self.NO_BANNER:
+                entry = self._entries.get(domain)
+                misses = entry.get("misses", 1) + 1 if entry and entry["key"] == self.NO_BANNER else 1
+                # The TTL runs from the first miss, so a banner rolled out later is found again
+                seen_at = entry["seen_at"] if misses > 1 else time.time()
+                self._entries[domain] = {"key": key, "seen_at": seen_at, "misses": misses}
+            else:
+                self._entries[domain] = {"key": key, "seen_at": time.time()}
+            if self.path:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    with open(self.path, "w") as f:
+                        json.dump(self._entries, f, indent=4)
+                except OSError as e:
+                    logger.warning(f"Failed to save consent memo: {str(e)}")
+
+
+# Shared by every browser in this process
+default_memo = ConsentMemo()
+
+
+class ConsentHandler:
+    """Find and click a cookie consent button in one in-page pass"""
+
+    def __init__(self, driver, memo: ConsentMemo = default_memo, timeout: float = 2.0):
+        """
+        Args:
+            driver: WebDriver showing the page
+            memo: Per-domain memo of working selectors
+            timeout: Seconds to keep looking for a banner that renders late
+        """
+        self.driver = driver
+        self.memo = memo
+        self.timeout = timeout
+
+    def handle(self, url: Optional[str] = None) -> bool:
+        """Click the consent button on the current page; returns True if one was clicked"""
+        domain = registrable_domain(url or self.driver.current_url)
+        known = self.memo.get(domain)
+        try:
+            return self._handle(domain, known)
+        except Exception as e:
+            # Leave the memo untouched, the page may just have been navigating
+            logger.warning(f"Cookie consent detection failed on {domain}: {str(e)}")
+            return False
+
+    def _handle(self, domain, known):
+        if known == ConsentMemo.NO_BANNER:
+            logger.info(f"No cookie consent banner expected on {domain}, skipping detection")
+            return False
+
+        if known:
+            # Try the remembered selector alone first, with the full timeout
+            key = self._detect([known])
+            if key:
+                logger.info(f"Clicked remembered cookie consent button on {domain}: {key}")
+                return True
+            logger.info(f"Remembered consent selector no longer matches on {domain}, probing again")
+            self.memo.remember(domain, None)
+
+        key = self._detect(None)
+        self.memo.remember(domain, key or ConsentMemo.NO_BANNER)
+        if key:
+            logger.info(f"Successfully clicked cookie consent button on {domain}: {key}")
+            return True
+        logger.info("No cookie consent button found or needed")
+        return False
+
+    def _detect(self, keys):
+        """Run the detection script for the given memo keys, or all candidates"""
+        if keys is None:
+            selectors, texts = CONSENT_SELECTORS, CONSENT_TEXTS
+        else:
+            selectors = [k for k in keys if not k.startswith("text:")]
+            texts = [k[len("text:"):] for k in keys if k.startswith("text:")]
+        return self.driver.execute_async_script(
+            _DETECT_SCRIPT, selectors, texts, int(self.timeout * 1000)
+        )
+
+
+# Preset platforms in detection order; "tcf" is any other IAB TCF v2 CMP
+PRESET_PLATFORMS = ["onetrust", "didomi", "cookiebot", "quantcast", "tcf"]
+
+# IAB CMP ids written into the TCF strings of the platforms that use them
+TCF_CMP_IDS = {"didomi": 7, "quantcast": 10, "tcf": 10}
+
+# Global Vendor List version claimed by the TCF strings; CMPs prompt again
+# when it is older than the list they were configured with
+DEFAULT_VENDOR_LIST_VERSION = 100
+
+# Vendor ids consented to by the "accept" TCF strings, above the current GVL
+MAX_VENDOR_ID = 1500
+
+# Reports per platform whether its CMP is on the page and whether its banner is showing
+_PRESET_DETECT_SCRIPT = """
+const visible = (selector) => {
+    const el = document.querySelector(selector);
+    if (!el) return false;
+    const rect = el.getBoundingClientRect();
+    const style = window.getComputedStyle(el);
+    return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+};
+const script = (pattern) => !!document.querySelector('script[src*="' + pattern + '"]');
+return {
+    onetrust: [!!(window.OneTrust || window.Optanon || document.getElementById('onetrust-consent-sdk')),
+               visible('#onetrust-banner-sdk')],
+    didomi: [!!(window.Didomi || document.getElementById('didomi-host')),
+             visible('#didomi-notice') || visible('#didomi-popup .didomi-popup-container')],
+    cookiebot: [!!(window.Cookiebot || document.getElementById('CybotCookiebotDialog')),
+                visible('#CybotCookiebotDialog')],
+    quantcast: [script('quantcast.mgr.consensu.org') || script('cmp.inmobi.com') || !!document.querySelector('.qc-cmp2-container'),
+                visible('.qc-cmp2-container')],
+    tcf: [typeof window.__tcfapi === 'function', false],
+};
+"""
+
+
+class _Bits:
+    """Big-endian bit writer for TCF strings"""
+
+    def __init__(self):
+        self.bits = []
+
+    def int(self, value: int, width: int):
+        self.bits.extend((value >> shift) & 1 for shift in range(width - 1, -1, -1))
+
+    def flags(self, enabled: Iterable[int], width: int):
+        """Bit field where bit ``n`` (1-based) is set for every ``n`` in ``enabled``"""
+        enabled = set(enabled)
+        self.bits.extend(1 if n in enabled else 0 for n in range(1, width + 1))
+
+    def letters(self, code: str):
+        for letter in code.upper():
+            self.int(ord(letter) - ord("A"), 6)
+
+    def encode(self) -> str:
+        bits = self.bits + [0] * (-len(self.bits) % 8)
+        data = bytes(int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8))
+        return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def tcf_string(variant: str, now: datetime, cmp_id: int = 10,
+               vendor_list_version: int = DEFAULT_VENDOR_LIST_VERSION) -> str:
+    """
+    IAB TCF v2.2 core string giving (``"accept"``) or refusing (``"reject"``)
+    every purpose, special feature and vendor.
+    """
+    accept = variant == "accept"
+    deciseconds = int(now.timestamp() * 10)
+    bits = _Bits()
+    bits.int(2, 6)                      # Version
+    bits.int(deciseconds, 36)           # Created
+    bits.int(deciseconds, 36)           # LastUpdated
+    bits.int(cmp_id, 12)
+    bits.int(1, 12)                     # CmpVersion
+    bits.int(1, 6)                      # ConsentScreen
+    bits.letters("EN")                  # ConsentLanguage
+    bits.int(vendor_list_version, 12)
+    bits.int(4, 6)                      # TcfPolicyVersion
+    bits.int(1, 1)                      # IsServiceSpecific
+    bits.int(0, 1)                      # UseNonStandardTexts
+    bits.flags([1, 2] if accept else [], 12)                        # SpecialFeatureOptIns
+    bits.flags(range(1, 12) if accept else [], 24)                  # PurposesConsent
+    bits.flags([2, 7, 8, 9, 10, 11] if accept else [], 24)          # PurposesLITransparency
+    bits.int(0, 1)                      # PurposeOneTreatment
+    bits.letters("AA")                  # PublisherCC, unknown
+    # Vendor consents, then vendor legitimate interests: one range 1..MAX_VENDOR_ID, or none
+    for _ in range(2):
+        if accept:
+            bits.int(MAX_VENDOR_ID, 16)
+            bits.int(1, 1)              # IsRangeEncoding
+            bits.int(1, 12)             # NumEntries
+            bits.int(1, 1)              # IsARange
+            bits.int(1, 16)
+            bits.int(MAX_VENDOR_ID, 16)
+        else:
+            bits.int(0, 16)
+            bits.int(0, 1)
+    bits.int(0, 12)                     # NumPubRestrictions
+    return bits.encode()
+
+
+class ConsentPresets:
+    """
+    Consent-state cookies of common consent-management platforms, set before
+    navigation so the banner never renders.
+
+    The site's CMP is not known before its first visit, so every platform's
+    cookies are set then. After the page has loaded, ``detect`` finds which
+    platform the page runs, remembers it per domain (later visits only get
+    that platform's cookies) and reports whether its banner showed anyway.
+    Cookies of the platforms that did not match are dropped from the result.
+
+    The cookies last a year, so browsers only set them in a jar of their own
+    (headless or isolated), never in the user's Chrome profile.
+    """
+
+    VARIANTS = ("accept", "reject")
+
+    def __init__(self, variant: str = "accept", platforms: Optional[List[str]] = None,
+                 vendor_list_version: int = DEFAULT_VENDOR_LIST_VERSION, memo: Optional[ConsentMemo] = None):
+        """
+        Args:
+            variant: "accept" or "reject" every optional category
+            platforms: Preset platforms to use (default: all of ``PRESET_PLATFORMS``)
+            vendor_list_version: Global Vendor List version claimed in TCF strings
+            memo: Per-domain memo of the matching platform
+        """
+        if variant not in self.VARIANTS:
+            raise ValueError(f"Unknown consent preset variant: {variant}")
+        unknown = set(platforms or []) - set(PRESET_PLATFORMS)
+        if unknown:
+            raise ValueError(f"Unknown consent preset platforms: {', '.join(sorted(unknown))}")
+        self.variant = variant
+        self.platforms = [p for p in PRESET_PLATFORMS if p in platforms] if platforms else list(PRESET_PLATFORMS)
+        self.vendor_list_version = vendor_list_version
+        self.memo = memo or default_preset_memo
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> Optional["ConsentPresets"]:
+        """
+        Presets for ``settings["consent_preset"]``: "accept", "reject", or a
+        dictionary with "variant", "platforms" and "vendor_list_version";
+        None when unset.
+        """
+        config = settings.get("consent_preset")
+        if not config:
+            return None
+        if isinstance(config, str):
+            config = {"variant": config}
+        return cls(**config)
+
+    def cookies(self, url: str, platforms: Optional[List[str]] = None) -> List[Dict]:
+        """WebDriver-format consent cookies for the site of ``url``, one per name"""
+        domain = "." + registrable_domain(url)
+        now = datetime.now(timezone.utc)
+        expiry = int(now.timestamp()) + 365 * 24 * 3600
+        cookies = {}
+        for platform in platforms or self.platforms:
+            for name, value in self._values(platform, now).items():
+                cookies.setdefault(name, {"name": name, "value": value, "domain": domain, "path": "/",
+                                          "secure": False, "httpOnly": False, "sameSite": "Lax",
+                                          "expiry": expiry})
+        return list(cookies.values())
+
+    def apply(self, driver, url: str) -> List[Dict]:
+        """Set the consent cookies for ``url`` before navigating to it; returns the cookies set"""
+        known = self.memo.get(registrable_domain(url))
+        cookies = self.cookies(url, [known] if known in self.platforms else None)
+        try:
+            set_cookies(driver, cookies)
+        except Exception as e:
+            logger.warning(f"Could not set consent preset cookies for {url}: {str(e)}")
+            return []
+        return cookies
+
+    def detect(self, driver, url: str, injected: List[Dict]) -> Dict:
+        """
+        Find the platform of the loaded page and whether its banner still showed.
+
+        Returns:
+            Dictionary with "preset" (the matching platform or None),
+            "variant" and "banner_shown"
+        """
+        domain = registrable_domain(url)
+        try:
+            found = driver.execute_script(_PRESET_DETECT_SCRIPT)
+        except Exception as e:
+            logger.warning(f"Consent platform detection failed on {domain}: {str(e)}")
+            return {"preset": None, "variant": self.variant, "banner_shown": None}
+
+        matched = next((p for p in self.platforms if found.get(p, [False])[0]), None)
+        # A CMP script may load after the page counted as ready, so a miss on one load
+        # is not remembered; the next visit sets every platform's cookies again
+        if matched:
+            self.memo.remember(domain, matched)
+        if matched == "tcf":
+            # The generic TCF API does not say whether a banner is showing
+            banner_shown = None
+        else:
+            banner_shown = bool(found[matched][1]) if matched else False
+        if matched and injected:
+            level = logging.WARNING if banner_shown else logging.INFO
+            logger.log(level, f"Consent preset {matched}/{self.variant} on {domain}"
+                              f"{', banner still shown' if banner_shown else ''}")
+        return {"preset": matched if injected else None, "variant": self.variant, "banner_shown": banner_shown}
+
+    def strip(self, cookies: List[Dict], injected: List[Dict]) -> List[Dict]:
+        """
+        Drop the injected cookies the page left as they were set.
+
+        They are the preset's values, not the site's, even for the platform
+        the page uses; the preset applied is reported by ``detect`` instead.
+        A consent cookie the page rewrote is the site's own and is kept.
+        """
+        if not injected:
+            return cookies
+        synthetic = {(c["name"], c["value"]) for c in injected}
+        return [c for c in cookies if (c.get("name"), c.get("value")) not in synthetic]
+
+    def _values(self, platform: str, now: datetime) -> Dict[str, str]:
+        """Cookie name -> value of one platform's preset"""
+        accept = self.variant == "accept"
+        if platform == "onetrust":
+            # C0001 strictly necessary, C0002 performance, C0003 functional, C0004 targeting, C0005 social
+            groups = ",".join(f"C000{n}:{1 if accept or n == 1 else 0}" for n in range(1, 6))
+            stamp = now.strftime("%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)")
+            consent = (f"isGpcEnabled=0&datestamp={quote(stamp, safe='')}&version=202409.1.0&isIABGlobal=false"
+                       f"&hosts=&consentId={uuid.uuid4()}&interactionCount=1&isAnonUser=1"
+                       f"&landingPath=NotLandingPage&groups={quote(groups, safe='')}")
+            return {"OptanonAlertBoxClosed": now.strftime("%Y-%m-%dT%H:%M:%S.000Z"), "OptanonConsent": consent}
+        if platform == "didomi":
+            purposes = ["cookies", "select_basic_ads", "create_ads_profile", "select_personalized_ads",
+                        "create_content_profile", "select_personalized_content", "measure_ad_performance",
+                        "measure_content_performance", "market_research", "improve_products"]
+            stamp = now.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            token = {"user_id": str(uuid.uuid4()), "created": stamp, "updated": stamp, "version": 2,
+                     "purposes": {"enabled" if accept else "disabled": purposes},
+                     "vendors": {"enabled" if accept else "disabled": []}}
+            return {"didomi_token": base64.b64encode(json.dumps(token, separators=(",", ":")).encode()).decode(),
+                    "euconsent-v2": tcf_string(self.variant, now, TCF_CMP_IDS["didomi"], self.vendor_list_version)}
+        if platform == "cookiebot":
+            flag = "true" if accept else "false"
+            consent = (f"{{stamp:'{uuid.uuid4()}',necessary:true,preferences:{flag},statistics:{flag},"
+                       f"marketing:{flag},method:'explicit',ver:1,utc:{int(now.timestamp() * 1000)},region:'eu'}}")
+            return {"CookieConsent": quote(consent, safe="{}:")}
+        # Quantcast Choice and other TCF CMPs keep their state in the TCF string
+        return {"euconsent-v2": tcf_string(self.variant, now, TCF_CMP_IDS[platform], self.vendor_list_version)}
+
+
+# Shared by every browser in this process
+default_preset_memo = ConsentMemo()
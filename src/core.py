@@ -5,17 +5,15 @@ from selenium.webdriver.edge.service import Service as EdgeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.edge.options import Options as EdgeOptions
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from .database import DatabaseManager
+from .driver_cache import resolve_driver
+from .cdp_cookies import set_cookies
+from .browser_base import PAGE_LOAD_READINESS, POST_CONSENT_READINESS
+from .consent import ConsentHandler
+from .load_profile import LoadProfile
 from .browsers.chrome.chrome_browser import ChromeBrowser
 from .gui.controller import BrowserController
-import time
 import json
 from enum import Enum
 import os
@@ -38,9 +36,11 @@ class BrowserType(Enum):
     OPERA = "opera"
 
 class CookieCollector:
-    def __init__(self, browser_type=BrowserType.CHROME):
+    def __init__(self, browser_type=BrowserType.CHROME, load_profile: LoadProfile = None):
         self.db = DatabaseManager()
         self.browser_type = browser_type
+        # Optional lean profile for Chromium-based browsers
+        self.load_profile = load_profile
         self.driver = None
         self.setup_driver()
     
@@ -65,6 +65,9 @@ class CookieCollector:
                 # Add user agent to avoid detection
                 options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
                 
+                if self.load_profile:
+                    self.load_profile.configure(options)
+                
                 if self.browser_type == BrowserType.BRAVE:
                     brave_path = self._find_brave_path()
                     if brave_path:
@@ -82,12 +85,14 @@ class CookieCollector:
                         logger.warning("Opera browser not found. Using Chrome instead.")
                 
                 try:
-                    # Get the latest stable Chrome driver
-                    driver_path = ChromeDriverManager().install()
+                    # Get the Chrome driver matching the installed Chrome (cached)
+                    driver_path = resolve_driver("chrome")
                     logger.info(f"Using Chrome WebDriver at: {driver_path}")
                     
                     service = ChromeService(driver_path)
                     self.driver = webdriver.Chrome(service=service, options=options)
+                    if self.load_profile:
+                        self.load_profile.apply(self.driver)
                     logger.info("Chrome WebDriver setup successful")
                 except Exception as e:
                     logger.error(f"Error setting up Chrome WebDriver: {str(e)}")
@@ -97,7 +102,7 @@ class CookieCollector:
                 logger.info("Setting up Firefox browser...")
                 options = FirefoxOptions()
                 options.add_argument('--headless')
-                service = FirefoxService(GeckoDriverManager().install())
+                service = FirefoxService(resolve_driver("firefox"))
                 self.driver = webdriver.Firefox(service=service, options=options)
                 logger.info("Firefox WebDriver setup successful")
             
@@ -106,7 +111,7 @@ class CookieCollector:
                 options = EdgeOptions()
                 options.add_argument('--headless')
                 options.add_argument('--disable-gpu')
-                service = EdgeService(EdgeChromiumDriverManager().install())
+                service = EdgeService(resolve_driver("edge"))
                 self.driver = webdriver.Edge(service=service, options=options)
                 logger.info("Edge WebDriver setup successful")
             
@@ -153,51 +158,34 @@ class CookieCollector:
     
     def handle_cookie_consent(self):
         """Attempt to handle common cookie consent popups"""
-        common_selectors = [
-            'button[id*="cookie"]',
-            'button[id*="consent"]',
-            'button[class*="cookie"]',
-            'button[class*="consent"]',
-            'button[data-testid*="cookie"]',
-            'button[data-testid*="consent"]',
-            'button:contains("Accept")',
-            'button:contains("Allow")',
-            'button:contains("Agree")'
-        ]
-        
-        for selector in common_selectors:
-            try:
-                logger.debug(f"Trying to find cookie consent button with selector: {selector}")
-                button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                )
-                button.click()
-                logger.info("Successfully clicked cookie consent button")
-                time.sleep(2)  # Wait for the popup to disappear
-                return True
-            except Exception:
-                continue
-        
-        logger.info("No cookie consent button found or needed")
-        return False
+        # All candidate selectors are checked in one in-page pass, and the
+        # outcome is remembered per domain for later visits
+        return ConsentHandler(self.driver).handle()
     
     def collect_cookies(self, url):
         """Visit a URL, handle cookie consent, and collect cookies"""
         try:
+            if self.load_profile:
+                # Drop network events from earlier pages
+                self.load_profile.page_stats(self.driver)
             logger.info(f"Navigating to {url}")
             self.driver.get(url)
-            time.sleep(5)  # Initial wait for page load
+            PAGE_LOAD_READINESS.wait(self.driver)
             
             # Try to handle cookie consent
             self.handle_cookie_consent()
             
-            # Wait for any dynamic content to load
-            time.sleep(3)
+            # Wait for cookies set by dynamic content
+            POST_CONSENT_READINESS.wait(self.driver)
             
             # Get all cookies
             cookies = self.driver.get_cookies()
             logger.info(f"Collected {len(cookies)} cookies")
             
+            if self.load_profile:
+                stats = self.load_profile.page_stats(self.driver)
+                logger.info(f"Lean profile blocked {stats['blocked_requests']} requests (~{stats['estimated_bytes_saved'] // 1024} KB saved, estimated)")
+            
             # Save cookies to database
             self.db.save_cookies(url, cookies)
             logger.info("Saved cookies to database")
@@ -210,11 +198,19 @@ class CookieCollector:
     def load_cookies(self, url):
         """Load previously saved cookies for a URL"""
         try:
-            cookies = self.db.get_cookies(url)
+            cookies = self.db.get_cookies(url, include_extended=True)
             if cookies:
                 logger.info(f"Loading {len(cookies)} cookies from database")
+                if hasattr(self.driver, "execute_cdp_cmd"):
+                    # Chromium browsers take the whole jar before the first page load
+                    try:
+                        set_cookies(self.driver, cookies)
+                        self.driver.get(url)
+                        return True
+                    except Exception as e:
+                        logger.warning(f"DevTools cookie restore failed, adding cookies one by one: {str(e)}")
                 self.driver.get(url)
-                for cookie in cookies:
+                for cookie in self.db.get_cookies(url):
                     try:
                         self.driver.add_cookie(cookie)
                     except Exception as e:
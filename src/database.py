@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from contextlib import contextmanager
 from datetime import datetime
 
 Base = declarative_base()
@@ -13,6 +14,8 @@ class Website(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     cookies = relationship("Cookie", back_populates="website", cascade="all, delete-orphan")
+    storage_items = relationship("StorageItem", back_populates="website", cascade="all, delete-orphan")
+    indexeddb_databases = relationship("IndexedDBDatabase", back_populates="website", cascade="all, delete-orphan")
 
 class Cookie(Base):
     __tablename__ = 'cookies'
@@ -27,24 +30,107 @@ class Cookie(Base):
     secure = Column(Boolean, default=False)
     httpOnly = Column(Boolean, default=False)
     sameSite = Column(String, nullable=True)
+    # Only filled by DevTools capture
+    size = Column(Integer, nullable=True)
+    priority = Column(String, nullable=True)
+    session = Column(Boolean, nullable=True)
+    partitionKey = Column(String, nullable=True)
     
     website = relationship("Website", back_populates="cookies")
 
+class StorageItem(Base):
+    __tablename__ = 'storage_items'
+    
+    id = Column(Integer, primary_key=True)
+    website_id = Column(Integer, ForeignKey('websites.id'), index=True)
+    # "local" or "session"
+    area = Column(String)
+    origin = Column(String)
+    key = Column(Text)
+    value = Column(Text)
+    # Length of the value before it was truncated to the size limit
+    size = Column(Integer)
+    truncated = Column(Boolean, default=False)
+    
+    website = relationship("Website", back_populates="storage_items")
+
+class IndexedDBDatabase(Base):
+    __tablename__ = 'indexeddb_databases'
+    
+    id = Column(Integer, primary_key=True)
+    website_id = Column(Integer, ForeignKey('websites.id'), index=True)
+    origin = Column(String)
+    name = Column(String)
+    version = Column(Integer, nullable=True)
+    
+    website = relationship("Website", back_populates="indexeddb_databases")
+
+class DomainProfile(Base):
+    __tablename__ = 'domain_profiles'
+    
+    id = Column(Integer, primary_key=True)
+    domain = Column(String, unique=True, index=True)
+    # Learned from comparing HTTP-only and browser collection
+    needs_browser = Column(Boolean, default=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Job(Base):
+    __tablename__ = 'jobs'
+    __table_args__ = (UniqueConstraint('batch', 'url'),)
+    
+    id = Column(Integer, primary_key=True)
+    # Name of the run the URL belongs to
+    batch = Column(String, index=True)
+    url = Column(String)
+    # pending, in_flight, done or failed
+    status = Column(String, default='pending', index=True)
+    attempts = Column(Integer, default=0)
+    lease_owner = Column(String, nullable=True)
+    lease_token = Column(String, nullable=True, index=True)
+    lease_expires = Column(DateTime, nullable=True)
+    # JSON summary of the outcome (cookie count or error)
+    result = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class DatabaseManager:
     def __init__(self, db_url='sqlite:///cookies.db'):
-        self.engine = create_engine(db_url)
+        # Job queue writers from several workers or processes wait for the lock instead of failing
+        connect_args = {'timeout': 30} if db_url.startswith('sqlite') else {}
+        self.engine = create_engine(db_url, connect_args=connect_args)
         Base.metadata.create_all(self.engine)
+        self._migrate_schema()
         self.Session = sessionmaker(bind=self.engine)
     
-    def save_cookies(self, url, cookies_list):
-        session = self.Session()
-        try:
+    def _migrate_schema(self):
+        """Add columns introduced after an existing database file was created"""
+        inspector = inspect(self.engine)
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    with self.engine.begin() as connection:
+                        connection.execute(text(
+                            f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'
+                        ))
+    
+    def save_cookies(self, url, cookies_list, session=None):
+        """
+        Replace the stored cookies of a website.
+        
+        With ``session``, the cookies are written in that session and only
+        committed along with whatever else its owner writes.
+        """
+        with self._writing(session) as session:
             # Get or create website
             website = session.query(Website).filter_by(url=url).first()
             if not website:
                 website = Website(url=url)
                 session.add(website)
                 session.flush()  # Get the website ID
+            # Cookies live in their own table, so mark the website as collected explicitly
+            website.updated_at = datetime.utcnow()
             
             # Delete existing cookies for this website
             session.query(Cookie).filter_by(website_id=website.id).delete()
@@ -59,7 +145,11 @@ class DatabaseManager:
                     path=cookie_data.get('path', '/'),
                     secure=cookie_data.get('secure', False),
                     httpOnly=cookie_data.get('httpOnly', False),
-                    sameSite=cookie_data.get('sameSite')
+                    sameSite=cookie_data.get('sameSite'),
+                    size=cookie_data.get('size'),
+                    priority=cookie_data.get('priority'),
+                    session=cookie_data.get('session'),
+                    partitionKey=cookie_data.get('partitionKey')
                 )
                 
                 # Handle expires timestamp
@@ -70,7 +160,57 @@ class DatabaseManager:
                         cookie.expires = None
                 
                 session.add(cookie)
+    
+    def save_storage(self, url, storage, max_value_length=4096, max_items=500, session=None):
+        """
+        Replace the stored web storage of a website.
+        
+        ``storage`` is what ``WebStorageCapture.capture`` returns. Values
+        longer than ``max_value_length`` characters are truncated and at most
+        ``max_items`` entries are kept per area, so huge values or storage
+        used as a cache do not grow the database. ``session`` works as in
+        ``save_cookies``.
+        """
+        with self._writing(session) as session:
+            website = session.query(Website).filter_by(url=url).first()
+            if not website:
+                website = Website(url=url)
+                session.add(website)
+                session.flush()
+            
+            session.query(StorageItem).filter_by(website_id=website.id).delete()
+            session.query(IndexedDBDatabase).filter_by(website_id=website.id).delete()
             
+            origin = storage.get('origin')
+            for area in ('local', 'session'):
+                for item in storage.get(area, [])[:max_items]:
+                    value = item.get('value') or ''
+                    session.add(StorageItem(
+                        website_id=website.id,
+                        area=area,
+                        origin=origin,
+                        key=item.get('key'),
+                        value=value[:max_value_length],
+                        size=item.get('size', len(value)),
+                        truncated=bool(item.get('truncated')) or len(value) > max_value_length
+                    ))
+            for database in storage.get('indexeddb', [])[:max_items]:
+                session.add(IndexedDBDatabase(
+                    website_id=website.id,
+                    origin=origin,
+                    name=database.get('name'),
+                    version=database.get('version')
+                ))
+    
+    @contextmanager
+    def _writing(self, session=None):
+        """Yield ``session`` for its owner to commit, or a new session committed here"""
+        if session is not None:
+            yield session
+            return
+        session = self.Session()
+        try:
+            yield session
             session.commit()
         except Exception as e:
             session.rollback()
@@ -78,7 +218,37 @@ class DatabaseManager:
         finally:
             session.close()
     
-    def get_cookies(self, url):
+    def get_storage(self, url):
+        """Get the stored web storage of a URL in the shape it was captured in, or None"""
+        session = self.Session()
+        try:
+            website = session.query(Website).filter_by(url=url).first()
+            if not website:
+                return None
+            
+            storage = {'origin': None, 'local': [], 'session': [], 'indexeddb': []}
+            for item in sorted(website.storage_items, key=lambda item: item.id):
+                storage['origin'] = item.origin
+                storage[item.area].append({
+                    'key': item.key,
+                    'value': item.value,
+                    'size': item.size,
+                    'truncated': item.truncated
+                })
+            for database in sorted(website.indexeddb_databases, key=lambda database: database.id):
+                storage['origin'] = database.origin
+                storage['indexeddb'].append({'name': database.name, 'version': database.version})
+            return storage
+        finally:
+            session.close()
+    
+    def get_cookies(self, url, include_extended=False):
+        """
+        Get the stored cookies for a URL in WebDriver format.
+        
+        ``include_extended`` adds the DevTools-only attributes (size, priority,
+        session, partitionKey) where they were captured.
+        """
         session = self.Session()
         try:
             website = session.query(Website).filter_by(url=url).first()
@@ -101,6 +271,11 @@ class DatabaseManager:
                 if cookie.expires:
                     cookie_dict['expiry'] = int(cookie.expires.timestamp())
                 
+                if include_extended:
+                    for attribute in ('size', 'priority', 'session', 'partitionKey'):
+                        if getattr(cookie, attribute) is not None:
+                            cookie_dict[attribute] = getattr(cookie, attribute)
+                
                 cookies.append(cookie_dict)
             
             return cookies
@@ -151,6 +326,58 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def get_domain_profiles(self):
+        """Get the learned needs-browser flag of every domain"""
+        session = self.Session()
+        try:
+            return {profile.domain: profile.needs_browser for profile in session.query(DomainProfile).all()}
+        finally:
+            session.close()
+    
+    def set_domain_profile(self, domain, needs_browser):
+        """Record whether a domain needs a browser to collect all its cookies"""
+        session = self.Session()
+        try:
+            profile = session.query(DomainProfile).filter_by(domain=domain).first()
+            if not profile:
+                profile = DomainProfile(domain=domain)
+                session.add(profile)
+            profile.needs_browser = needs_browser
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+    
+    def get_collection_times(self, urls=None):
+        """Get when each website's cookies were last saved, keyed by URL, for ``urls`` or every website"""
+        session = self.Session()
+        try:
+            query = session.query(Website.url, Website.updated_at)
+            if urls is not None:
+                query = query.filter(Website.url.in_(list(urls)))
+            return dict(query.all())
+        finally:
+            session.close()
+    
+    def get_cookie_expiries(self, url=None):
+        """Get (name, expires) of every persistent cookie, grouped by website URL"""
+        session = self.Session()
+        try:
+            query = session.query(Website.url, Cookie.name, Cookie.expires) \
+                .join(Cookie, Cookie.website_id == Website.id) \
+                .filter(Cookie.expires.isnot(None))
+            if url is not None:
+                query = query.filter(Website.url == url)
+            
+            expiries = {}
+            for website_url, name, expires in query:
+                expiries.setdefault(website_url, []).append((name, expires))
+            return expiries
+        finally:
+            session.close()
+    
     def get_all_websites(self):
         """Get all websites from the database"""
         session = self.Session()
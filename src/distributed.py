@@ -0,0 +1,397 @@
+"""
+Coordinator and worker processes for collecting across several machines.
+
+The coordinator owns the database and the batch's job queue and serves a
+small JSON-over-HTTP protocol on the local network. Workers claim URLs,
+collect them with a regular ``BrowserController`` and upload the cookies.
+Leases come from the job queue, so URLs held by a worker that stops
+heartbeating are handed to another worker once the lease runs out::
+
+    python -m src.distributed coordinator urls.txt --batch nightly --port 8765
+    python -m src.distributed worker http://coordinator:8765 --workers 4
+
+Endpoints, all taking and returning JSON:
+
+- ``POST /claim`` ``{"worker", "limit"}`` -> ``{"urls", "lease_seconds", "done"}``
+- ``POST /heartbeat`` ``{"worker"}`` -> ``{"extended"}``
+- ``POST /result`` ``{"worker", "url", "success", "cookies" [, "storage"] | "error"}`` -> ``{"accepted"}``
+- ``POST /release`` ``{"worker"}`` -> ``{"released"}``
+- ``GET /status`` -> jobs per state
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, Optional
+from .database import DatabaseManager
+from .job_queue import FAILED, IN_FLIGHT, PENDING, JobQueue
+from .url_utils import canonicalize_url
+import argparse
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "X-Collector-Token"
+
+
+class Coordinator:
+    """
+    Hand out the URLs of one batch to remote workers and store their results.
+
+    Every worker gets its own lease owner in the job queue, so its claims,
+    heartbeats and release only touch its own jobs. A result is stored only
+    if the uploading worker still holds the job when it is completed; a late
+    upload from a worker whose lease ran out and whose URL went elsewhere is
+    rejected.
+
+    It listens on localhost by default. Listening on other interfaces needs a
+    token, since anyone reaching the port could write to the database.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, batch: str = "default", host: str = "127.0.0.1",
+                 port: int = 8765, lease_seconds: float = 120, token: Optional[str] = None):
+        """
+        Args:
+            db_manager: Database receiving the jobs and cookies
+            batch: Name of the job queue batch to serve
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            lease_seconds: How long a claim holds without a heartbeat
+            token: Shared secret workers must send; required unless ``host`` is a loopback address
+        """
+        if not token and not _is_loopback(host):
+            raise ValueError(f"A token is required to listen on {host}")
+        self.db_manager = db_manager
+        self.batch = batch
+        self.lease_seconds = lease_seconds
+        self.token = token
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        if host in ("0.0.0.0", ""):
+            host = socket.gethostname()
+        return f"http://{host}:{port}"
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Queue URLs in the batch in canonical form, leaving out invalid ones; returns how many were new"""
+        return JobQueue(self.db_manager, self.batch).add(urls)
+
+    def counts(self) -> Dict[str, int]:
+        return JobQueue(self.db_manager, self.batch).counts()
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True)
+        self._thread.start()
+        logger.info(f"Coordinator for batch '{self.batch}' listening on {self.url}")
+
+    def serve_until_done(self, poll_interval: float = 5.0):
+        """Serve until every job is done or failed"""
+        if not self._thread:
+            self.start()
+        while True:
+            counts = self.counts()
+            if not counts[PENDING] and not counts[IN_FLIGHT]:
+                logger.info(f"Batch '{self.batch}' finished: {counts}")
+                return counts
+            time.sleep(poll_interval)
+
+    def stop(self):
+        if self._thread:
+            # shutdown() waits for serve_forever, so only call it once serving
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def handle(self, path: str, request: Dict) -> Dict:
+        """Answer one protocol request"""
+        if path == "/status":
+            return self.counts()
+
+        worker = request.get("worker")
+        if not worker:
+            raise ValueError("Missing worker id")
+        queue = JobQueue(self.db_manager, self.batch, lease_seconds=self.lease_seconds, owner=worker)
+
+        if path == "/claim":
+            urls = queue.claim(max(1, int(request.get("limit", 1))))
+            counts = queue.counts() if not urls else None
+            return {
+                "urls": urls,
+                "lease_seconds": self.lease_seconds,
+                # Workers keep polling while other workers' leases may still expire
+                "done": bool(counts) and not counts[PENDING] and not counts[IN_FLIGHT],
+            }
+        if path == "/heartbeat":
+            return {"extended": queue.heartbeat()}
+        if path == "/release":
+            return {"released": queue.release()}
+        if path == "/result":
+            # Jobs are queued under the canonical URL
+            url = canonicalize_url(request["url"])
+            if not queue.holds(url):
+                logger.warning(f"Ignoring result for {url} from {worker}, which no longer holds it")
+                return {"accepted": False}
+            if request.get("success"):
+                cookies = request.get("cookies", [])
+
+                def store(session):
+                    self.db_manager.save_cookies(url, cookies, session=session)
+                    if request.get("storage"):
+                        self.db_manager.save_storage(url, request["storage"], session=session)
+
+                # The lease check and both saves commit together: a worker whose lease ran out
+                # meanwhile cannot overwrite the new holder's cookies, and a failed save leaves
+                # the job leased, to be collected again once the lease runs out
+                if not queue.complete(url, {"count": len(cookies), "worker": worker}, store=store):
+                    logger.warning(f"Ignoring result for {url} from {worker}, which lost it meanwhile")
+                    return {"accepted": False}
+                return {"accepted": True}
+            return {"accepted": queue.fail(url, request.get("error", "unknown error"))}
+        raise LookupError(path)
+
+    def _handler_class(self):
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond({})
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send(400, {"error": "Invalid JSON"})
+                    return
+                self._respond(request)
+
+            def _respond(self, request):
+                if coordinator.token and not hmac.compare_digest(
+                        (self.headers.get(TOKEN_HEADER) or "").encode("utf-8"), coordinator.token.encode("utf-8")):
+                    self._send(403, {"error": "Invalid token"})
+                    return
+                try:
+                    self._send(200, coordinator.handle(self.path, request))
+                except (KeyError, ValueError) as e:
+                    self._send(400, {"error": str(e)})
+                except LookupError:
+                    self._send(404, {"error": f"Unknown endpoint {self.path}"})
+                except Exception as e:
+                    logger.error(f"Coordinator request {self.path} failed: {str(e)}")
+                    self._send(500, {"error": str(e)})
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+        return Handler
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class DistributedWorker:
+    """
+    Collect URLs claimed from a coordinator and upload the results.
+
+    Collection runs through ``controller.iter_results``, so the usual worker
+    pool, tabs, retries and deadlines apply. A heartbeat thread keeps the
+    worker's leases alive while it runs; URLs it claimed but did not start
+    are released when it stops.
+    """
+
+    def __init__(self, coordinator_url: str, controller, worker_id: Optional[str] = None,
+                 claim_size: int = 10, poll_interval: float = 2.0, token: Optional[str] = None,
+                 timeout: float = 30):
+        """
+        Args:
+            coordinator_url: Base URL of the coordinator, e.g. ``http://10.0.0.5:8765``
+            controller: Initialized ``BrowserController`` doing the collection
+            worker_id: Identity of this worker (generated by default)
+            claim_size: URLs claimed per request
+            poll_interval: Seconds between claims while the coordinator has nothing to hand out
+            token: Shared secret of the coordinator, if it uses one
+            timeout: Seconds before a request to the coordinator fails
+        """
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.controller = controller
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.claim_size = claim_size
+        self.poll_interval = poll_interval
+        self.token = token
+        self.timeout = timeout
+        self.lease_seconds = 120.0
+        self.stats = {"collected": 0, "failed": 0, "rejected": 0}
+        self._stop = threading.Event()
+
+    def run(self) -> Dict[str, int]:
+        """Collect until the coordinator's batch is finished or ``stop`` is called"""
+        heartbeat = threading.Thread(target=self._heartbeat, name="worker-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            for url, result in self.controller.iter_results(self._claimed_urls()):
+                self._upload(url, result)
+        finally:
+            self._stop.set()
+            heartbeat.join()
+            try:
+                self._call("/release", {"worker": self.worker_id})
+            except Exception as e:
+                logger.error(f"Failed to release claimed URLs: {str(e)}")
+        logger.info(f"Worker {self.worker_id} finished: {self.stats}")
+        return self.stats
+
+    def stop(self):
+        """Stop claiming URLs; the ones in flight still finish"""
+        self._stop.set()
+
+    def _claimed_urls(self) -> Iterator[str]:
+        while not self._stop.is_set():
+            try:
+                response = self._call("/claim", {"worker": self.worker_id, "limit": self.claim_size})
+            except Exception as e:
+                logger.error(f"Claim from coordinator failed: {str(e)}")
+                self._stop.wait(self.poll_interval)
+                continue
+            self.lease_seconds = response.get("lease_seconds", self.lease_seconds)
+            if response["urls"]:
+                yield from response["urls"]
+            elif response["done"]:
+                return
+            else:
+                self._stop.wait(self.poll_interval)
+
+    def _upload(self, url: str, result: Dict):
+        request = {"worker": self.worker_id, "url": url, "success": result["success"]}
+        if result["success"]:
+            request["cookies"] = result["cookies"]
+            if result.get("storage"):
+                request["storage"] = result["storage"]
+        else:
+            request["error"] = result.get("error", "unknown error")
+        try:
+            accepted = self._call("/result", request)["accepted"]
+        except Exception as e:
+            # The lease runs out and the URL is handed out again
+            logger.error(f"Failed to upload result for {url}: {str(e)}")
+            accepted = False
+        if not accepted:
+            self.stats["rejected"] += 1
+        elif result["success"]:
+            self.stats["collected"] += 1
+        else:
+            self.stats["failed"] += 1
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                self._call("/heartbeat", {"worker": self.worker_id})
+            except Exception as e:
+                logger.error(f"Heartbeat to coordinator failed: {str(e)}")
+
+    def _call(self, path: str, body: Dict) -> Dict:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        request = urllib.request.Request(self.coordinator_url + path, data=json.dumps(body).encode("utf-8"),
+                                         headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.distributed",
+                                     description="Collect cookies across several machines.")
+    parser.add_argument("--token", default=os.environ.get("COOKIE_COLLECTOR_TOKEN"),
+                        help="Shared secret between coordinator and workers")
+    roles = parser.add_subparsers(dest="role", required=True)
+
+    coordinator_parser = roles.add_parser("coordinator", help="Serve a batch of URLs to workers")
+    coordinator_parser.add_argument("inputs", nargs="*", help="Files with one URL per line to add to the batch")
+    coordinator_parser.add_argument("--batch", default="default")
+    coordinator_parser.add_argument("--host", default="127.0.0.1",
+                                    help="Interface to listen on; anything but localhost needs --token")
+    coordinator_parser.add_argument("--port", type=int, default=8765)
+    coordinator_parser.add_argument("--lease-seconds", type=float, default=120)
+
+    worker_parser = roles.add_parser("worker", help="Collect URLs handed out by a coordinator")
+    worker_parser.add_argument("coordinator", help="Coordinator URL, e.g. http://10.0.0.5:8765")
+    worker_parser.add_argument("--settings", default="data/settings.json")
+    worker_parser.add_argument("--workers", type=int, help="Browsers collecting in parallel")
+    worker_parser.add_argument("--tabs", type=int, help="Pages each browser loads at once")
+
+    args = parser.parse_args(argv)
+
+    if args.role == "coordinator":
+        from .cli import read_urls
+
+        try:
+            coordinator = Coordinator(DatabaseManager(), args.batch, args.host, args.port,
+                                      args.lease_seconds, args.token)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.inputs:
+            coordinator.add(read_urls(args.inputs))
+        try:
+            counts = coordinator.serve_until_done()
+        except KeyboardInterrupt:
+            counts = coordinator.counts()
+        finally:
+            coordinator.stop()
+        return 0 if not counts[FAILED] else 2
+
+    from .gui.controller import BrowserController
+
+    settings = {"browser": "chrome", "wait_time": 10, "workers": 1}
+    if os.path.exists(args.settings):
+        with open(args.settings, "r") as f:
+            settings.update(json.load(f))
+    settings.update({key: value for key, value in (("workers", args.workers), ("tabs", args.tabs))
+                     if value is not None})
+    # The coordinator stores the cookies and decides what needs collecting
+    settings.update({"headless": True, "save_cookies": False, "force_refresh": True})
+
+    controller = BrowserController()
+    success, message = controller.initialize_browser(settings)
+    if not success:
+        logger.error(message)
+        controller.cleanup()
+        return 1
+    worker = DistributedWorker(args.coordinator, controller, token=args.token,
+                               claim_size=controller._worker_count(settings) * settings.get("tabs", 1) * 2)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        controller.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Cached, offline-capable WebDriver resolution keyed by installed browser version.
+"""
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.firefox import GeckoDriverManager
+from webdriver_manager.microsoft import EdgeChromiumDriverManager
+from datetime import datetime
+from typing import Dict, Optional
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cookie_collector", "driver_cache.json")
+
+# Set to 1/true/yes to never let driver resolution touch the network
+OFFLINE_ENV_VAR = "COOKIE_COLLECTOR_OFFLINE"
+
+DRIVER_MANAGERS = {
+    "chrome": ChromeDriverManager,
+    "firefox": GeckoDriverManager,
+    "edge": EdgeChromiumDriverManager,
+}
+
+DRIVER_NAMES = {
+    "chrome": "chromedriver",
+    "firefox": "geckodriver",
+    "edge": "msedgedriver",
+}
+
+# Commands that print the installed browser version on Linux and macOS
+VERSION_COMMANDS = {
+    "chrome": [
+        ["google-chrome", "--version"],
+        ["google-chrome-stable", "--version"],
+        ["chromium", "--version"],
+        ["chromium-browser", "--version"],
+        ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome", "--version"],
+    ],
+    "firefox": [
+        ["firefox", "--version"],
+        ["/Applications/Firefox.app/Contents/MacOS/firefox", "--version"],
+    ],
+    "edge": [
+        ["microsoft-edge", "--version"],
+        ["microsoft-edge-stable", "--version"],
+        ["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge", "--version"],
+    ],
+}
+
+# Registry keys holding the installed browser version on Windows
+WINDOWS_VERSION_KEYS = {
+    "chrome": [("HKEY_CURRENT_USER", r"Software\Google\Chrome\BLBeacon", "version")],
+    "firefox": [("HKEY_LOCAL_MACHINE", r"SOFTWARE\Mozilla\Mozilla Firefox", "CurrentVersion")],
+    "edge": [("HKEY_CURRENT_USER", r"Software\Microsoft\Edge\BLBeacon", "version")],
+}
+
+
+def detect_browser_version(browser: str) -> Optional[str]:
+    """Return the installed version of a browser, or None if it cannot be found"""
+    if sys.platform == "win32":
+        import winreg
+        for hive, key_path, value_name in WINDOWS_VERSION_KEYS.get(browser, []):
+            try:
+                with winreg.OpenKey(getattr(winreg, hive), key_path) as key:
+                    version = str(winreg.QueryValueEx(key, value_name)[0])
+                match = re.search(r"\d+(\.\d+)+", version)
+                if match:
+                    return match.group(0)
+            except OSError:
+                continue
+        return None
+
+    for command in VERSION_COMMANDS.get(browser, []):
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"\d+(\.\d+)+", output)
+        if match:
+            return match.group(0)
+    return None
+
+
+class DriverCache:
+    """
+    Remember which driver executable matches each installed browser version.
+
+    Entries live in a JSON file and are re-validated on every lookup, so a
+    deleted or replaced driver is resolved again. In offline mode the driver
+    managers are never called and only cached or locally installed drivers
+    are used.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, offline: Optional[bool] = None):
+        self.cache_path = cache_path
+        if offline is None:
+            offline = os.environ.get(OFFLINE_ENV_VAR, "").lower() in ("1", "true", "yes")
+        self.offline = offline
+        self._entries = None
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+    def resolve(self, browser: str) -> str:
+        """Return the path of a driver executable for the installed browser"""
+        if browser not in DRIVER_MANAGERS:
+            raise ValueError(f"Unsupported browser type: {browser}")
+
+        with self._lock:
+            if browser not in self._versions:
+                self._versions[browser] = detect_browser_version(browser)
+            version = self._versions[browser]
+            entry = self._lookup(browser, version)
+            if entry:
+                self._stats["hits"] += 1
+                self._stats["saved_seconds"] += entry.get("resolve_seconds", 0.0)
+                logger.info(f"Using cached {DRIVER_NAMES[browser]} for {browser} {version or '(unknown version)'}, "
+                            f"saved ~{entry.get('resolve_seconds', 0.0):.1f}s")
+                return entry["path"]
+
+            self._stats["misses"] += 1
+            if self.offline:
+                return self._resolve_offline(browser, version)
+
+            started = time.monotonic()
+            path = DRIVER_MANAGERS[browser]().install()
+            resolve_seconds = time.monotonic() - started
+            logger.info(f"Resolved {DRIVER_NAMES[browser]} in {resolve_seconds:.1f}s: {path}")
+            self._store(browser, version, path, resolve_seconds)
+            return path
+
+    def stats(self) -> Dict:
+        """Cache hits, misses and total driver resolution time saved"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _key(self, browser, version):
+        return f"{browser}-{version or 'unknown'}"
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.cache_path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _is_valid(self, entry):
+        path = entry.get("path")
+        if not path or not os.path.isfile(path) or not os.access(path, os.X_OK):
+            return False
+        return os.path.getsize(path) == entry.get("size")
+
+    def _lookup(self, browser, version):
+        entries = self._load()
+        entry = entries.get(self._key(browser, version))
+        if entry and self._is_valid(entry):
+            return entry
+        if entry:
+            logger.info(f"Cached driver for {browser} {version} is no longer valid")
+            del entries[self._key(browser, version)]
+        if version is None and self.offline:
+            # Without a version to match, fall back to the newest valid driver for this browser
+            candidates = [e for key, e in entries.items()
+                          if key.startswith(f"{browser}-") and self._is_valid(e)]
+            if candidates:
+                return max(candidates, key=lambda e: e.get("resolved_at", ""))
+        return None
+
+    def _store(self, browser, version, path, resolve_seconds):
+        entries = self._load()
+        entries[self._key(browser, version)] = {
+            "path": path,
+            "size": os.path.getsize(path),
+            "browser_version": version,
+            "resolved_at": datetime.utcnow().isoformat(),
+            "resolve_seconds": resolve_seconds,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(entries, f, indent=4)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to write driver cache: {str(e)}")
+
+    def _resolve_offline(self, browser, version):
+        """Find a locally installed driver without touching the network"""
+        path = shutil.which(DRIVER_NAMES[browser])
+        if not path:
+            raise RuntimeError(
+                f"Offline mode is enabled and no cached {DRIVER_NAMES[browser]} matches "
+                f"{browser} {version or '(unknown version)'}; install one on PATH or run once online"
+            )
+        logger.info(f"Offline mode: using {DRIVER_NAMES[browser]} from PATH: {path}")
+        self._store(browser, version, path, 0.0)
+        return path
+
+
+# Shared cache used by all browsers in this process
+default_cache = DriverCache()
+
+
+def resolve_driver(browser: str) -> str:
+    """Resolve a driver executable through the shared cache"""
+    return default_cache.resolve(browser)
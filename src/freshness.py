@@ -0,0 +1,66 @@
+"""
+Freshness windows for incremental recollection.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+class FreshnessPolicy:
+    """
+    Decide whether a URL was collected recently enough to skip.
+
+    A URL counts as fresh while less time than its window has passed since
+    its cookies were last saved. Windows are set per domain, matching the
+    URL's host or any parent domain of it, with ``max_age_hours`` for every
+    other domain. A window of 0 or None always recollects.
+    """
+
+    def __init__(self, max_age_hours: Optional[float] = None,
+                 domains: Optional[Dict[str, Optional[float]]] = None, force: bool = False):
+        """
+        Args:
+            max_age_hours: Default freshness window in hours (None disables skipping)
+            domains: Windows in hours for specific domains, e.g. ``{"news.example.com": 1}``
+            force: Recollect everything regardless of the windows
+        """
+        self.max_age_hours = max_age_hours
+        self.domains = {domain.lower().lstrip("."): hours for domain, hours in (domains or {}).items()}
+        self.force = force
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> "FreshnessPolicy":
+        """Build the policy from ``settings["freshness"]`` and ``settings["force_refresh"]``"""
+        freshness = settings.get("freshness", {})
+        return cls(
+            max_age_hours=freshness.get("max_age_hours"),
+            domains=freshness.get("domains"),
+            force=bool(settings.get("force_refresh", False)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any URL can be skipped at all"""
+        return not self.force and (bool(self.max_age_hours) or any(self.domains.values()))
+
+    def max_age(self, url: str) -> Optional[timedelta]:
+        """Freshness window of a URL, or None if it is always recollected"""
+        host = (urlsplit(url).hostname or "").lower()
+        labels = host.split(".")
+        hours = self.max_age_hours
+        # The most specific configured domain wins
+        for i in range(len(labels)):
+            candidate = ".".join(labels[i:])
+            if candidate in self.domains:
+                hours = self.domains[candidate]
+                break
+        return timedelta(hours=hours) if hours else None
+
+    def is_fresh(self, url: str, collected_at: Optional[datetime], now: Optional[datetime] = None) -> bool:
+        """Check whether a URL last collected at ``collected_at`` can be skipped"""
+        if self.force or collected_at is None:
+            return False
+        max_age = self.max_age(url)
+        if max_age is None:
+            return False
+        return (now or datetime.utcnow()) - collected_at < max_age
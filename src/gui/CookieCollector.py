@@ -14,6 +14,9 @@ class CookieCollectorGUI:
         # Initialize controller
         self.controller = BrowserController()
         
+        # Settings from settings.json that have no widget (e.g. offline_drivers)
+        self.advanced_settings = {}
+        
         # Configure style
         style = ttk.Style()
         style.configure("TButton", padding=5)
@@ -44,6 +47,9 @@ class CookieCollectorGUI:
         
         # Load saved settings if they exist
         self.load_settings()
+        
+        # Close the warm browser pool when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_application)
 
     def create_browser_section(self):
         browser_frame = ttk.LabelFrame(self.main_frame, text="Browser Selection")
@@ -88,11 +94,23 @@ class CookieCollectorGUI:
         # Wait time setting
         wait_frame = ttk.Frame(settings_frame)
         wait_frame.pack(fill='x', padx=5, pady=2)
-        ttk.Label(wait_frame, text="Page Load Wait Time (seconds):").pack(side='left', padx=5)
-        self.wait_time_var = tk.StringVar(value="3")
-        wait_spinbox = ttk.Spinbox(wait_frame, from_=1, to=10, textvariable=self.wait_time_var, width=5)
+        ttk.Label(wait_frame, text="Max Page Load Wait (seconds):").pack(side='left', padx=5)
+        self.wait_time_var = tk.StringVar(value="10")
+        wait_spinbox = ttk.Spinbox(wait_frame, from_=1, to=60, textvariable=self.wait_time_var, width=5)
         wait_spinbox.pack(side='left', padx=5)
         
+        # Parallel workers setting
+        workers_frame = ttk.Frame(settings_frame)
+        workers_frame.pack(fill='x', padx=5, pady=2)
+        ttk.Label(workers_frame, text="Parallel Browsers:").pack(side='left', padx=5)
+        self.workers_var = tk.StringVar(value="1")
+        workers_spinbox = ttk.Spinbox(workers_frame, from_=1, to=32, textvariable=self.workers_var, width=5)
+        workers_spinbox.pack(side='left', padx=5)
+        ttk.Label(workers_frame, text="Tabs per Browser:").pack(side='left', padx=5)
+        self.tabs_var = tk.StringVar(value="1")
+        tabs_spinbox = ttk.Spinbox(workers_frame, from_=1, to=16, textvariable=self.tabs_var, width=5)
+        tabs_spinbox.pack(side='left', padx=5)
+        
         # Save cookies checkbox
         self.save_cookies_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(settings_frame, text="Save cookies to database", 
@@ -102,6 +120,11 @@ class CookieCollectorGUI:
         self.headless_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(settings_frame, text="Run in headless mode (no visible browser)", 
                        variable=self.headless_var).pack(anchor='w', padx=5, pady=2)
+        
+        # Force refresh checkbox - recollect sites inside their freshness window
+        self.force_refresh_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Recollect recently collected sites",
+                       variable=self.force_refresh_var).pack(anchor='w', padx=5, pady=2)
 
     def create_progress_section(self):
         """Create the progress tracking section"""
@@ -142,7 +165,12 @@ class CookieCollectorGUI:
         right_frame = ttk.Frame(button_frame)
         right_frame.pack(side='right')
         
-        ttk.Button(right_frame, text="Exit", command=self.root.quit).pack(side='right', padx=5)
+        ttk.Button(right_frame, text="Exit", command=self.exit_application).pack(side='right', padx=5)
+
+    def exit_application(self):
+        """Close pooled browsers before leaving the application"""
+        self.controller.cleanup()
+        self.root.quit()
 
     def update_url_section(self):
         if self.mode_var.get() == "single":
@@ -162,11 +190,15 @@ class CookieCollectorGUI:
 
     def get_settings(self) -> Dict:
         return {
+            **self.advanced_settings,
             "browser": self.browser_var.get(),
             "mode": self.mode_var.get(),
             "wait_time": int(self.wait_time_var.get()),
+            "workers": int(self.workers_var.get()),
+            "tabs": int(self.tabs_var.get()),
             "save_cookies": self.save_cookies_var.get(),
             "headless": self.headless_var.get(),
+            "force_refresh": self.force_refresh_var.get(),
             "urls": self.get_urls()
         }
 
@@ -185,11 +217,19 @@ class CookieCollectorGUI:
                 with open("data/settings.json", "r") as f:
                     settings = json.load(f)
                 
+                self.advanced_settings = {
+                    key: value for key, value in settings.items()
+                    if key not in ("browser", "mode", "wait_time", "workers", "tabs", "save_cookies", "headless",
+                                   "force_refresh", "urls")
+                }
                 self.browser_var.set(settings.get("browser", "chrome"))
                 self.mode_var.set(settings.get("mode", "single"))
-                self.wait_time_var.set(str(settings.get("wait_time", 3)))
+                self.wait_time_var.set(str(settings.get("wait_time", 10)))
+                self.workers_var.set(str(settings.get("workers", 1)))
+                self.tabs_var.set(str(settings.get("tabs", 1)))
                 self.save_cookies_var.set(settings.get("save_cookies", True))
                 self.headless_var.set(settings.get("headless", True))
+                self.force_refresh_var.set(settings.get("force_refresh", False))
                 
                 urls = settings.get("urls", [])
                 if urls and self.mode_var.get() == "single":
@@ -237,11 +277,14 @@ class CookieCollectorGUI:
             # Show results
             total_cookies = sum(r["count"] for r in results.values())
             successful = sum(1 for r in results.values() if r["success"])
+            skipped = sum(1 for r in results.values() if r.get("skipped"))
             
             message = f"Collection completed!\n\n" \
-                     f"Sites processed: {len(urls)}\n" \
+                     f"Sites processed: {len(results)}\n" \
+                     f"Duplicates removed: {len(urls) - len(results)}\n" \
                      f"Successful: {successful}\n" \
-                     f"Failed: {len(urls) - successful}\n" \
+                     f"Skipped (still fresh): {skipped}\n" \
+                     f"Failed: {len(results) - successful}\n" \
                      f"Total cookies collected: {total_cookies}"
             
             messagebox.showinfo("Collection Complete", message)
@@ -273,9 +316,28 @@ class CookieCollectorGUI:
         for url, result in results.items():
             text_widget.insert('end', f"\nURL: {url}\n")
             text_widget.insert('end', f"Status: {'Success' if result['success'] else 'Failed'}\n")
+            if result.get('attempts', 1) > 1:
+                text_widget.insert('end', f"Attempts: {result['attempts']}\n")
+            
+            if result.get('skipped'):
+                text_widget.insert('end', f"Skipped: still fresh, collected at {result['collected_at']}\n")
             
             if result['success']:
                 text_widget.insert('end', f"Cookies collected: {result['count']}\n")
+                if result.get('readiness'):
+                    readiness = result['readiness']
+                    text_widget.insert('end', f"Page ready after: {readiness['elapsed']:.2f}s ({readiness['criterion']})\n")
+                if result.get('load'):
+                    load = result['load']
+                    text_widget.insert('end', f"Blocked requests: {load['blocked_requests']} (~{load['estimated_bytes_saved'] // 1024} KB saved, estimated)\n")
+                if result.get('consent', {}).get('preset'):
+                    consent = result['consent']
+                    shown = ", banner still shown" if consent['banner_shown'] else ""
+                    text_widget.insert('end', f"Consent preset: {consent['preset']} ({consent['variant']}{shown})\n")
+                if result.get('storage'):
+                    storage = result['storage']
+                    text_widget.insert('end', f"Web storage: {len(storage['local'])} local, {len(storage['session'])} session items, "
+                                              f"{len(storage['indexeddb'])} IndexedDB databases\n")
                 if result['count'] > 0:
                     text_widget.insert('end', "Cookies:\n")
                     for cookie in result['cookies']:
@@ -283,7 +345,9 @@ class CookieCollectorGUI:
                         for key, value in cookie.items():
                             text_widget.insert('end', f"  {key}: {value}\n")
             else:
-                text_widget.insert('end', f"Error: {result['error']}\n")
+                text_widget.insert('end', f"Error ({result.get('error_kind', 'other')}): {result['error']}\n")
+                if result.get('partial'):
+                    text_widget.insert('end', f"Cookies seen before the page was aborted (not saved): {result['count']}\n")
             
             text_widget.insert('end', "\n" + "="*50 + "\n")
         
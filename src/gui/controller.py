@@ -1,8 +1,27 @@
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from ..browsers.chrome.chrome_browser import ChromeBrowser
 from selenium.common.exceptions import WebDriverException
 from ..database import DatabaseManager
+from ..browser_pool import BrowserPool
+from ..driver_cache import default_cache as driver_cache
+from ..consent import ConsentPresets
+from ..freshness import FreshnessPolicy
+from ..host_scheduler import HostScheduler
+from ..http_collector import HttpCookieCollector
+from ..job_queue import DONE, FAILED, JobQueue
+from ..load_profile import LoadProfile
+from ..profile_template import ProfileTemplate
+from ..readiness import PageReadiness
+from ..retry import CRASH, CIRCUIT_OPEN, CircuitBreaker, CircuitOpenError, RetryPolicy, classify_error
+from ..supervisor import BrowserSupervisor
+from ..url_utils import canonicalize_url, dedupe_urls, group_by_domain, registrable_domain
+from ..watchdog import DeadlineExceeded, Watchdog
+from ..web_storage import WebStorageCapture
+from ..worker_pool import WorkerPool
 import logging
+import queue
+import threading
 
 # Set up logging
 logging.basicConfig(
@@ -12,19 +31,52 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class BrowserController:
-    def __init__(self):
-        self.browser = None
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        """
+        Args:
+            browser_pool: Optional pool shared with other controllers. By default
+                the controller creates its own pool, which stays warm between
+                runs until ``cleanup`` is called.
+        """
+        self.browser_pool = browser_pool
+        self._owns_pool = browser_pool is None
+        self._pool_key = None
         self.current_settings = None
+        self._page_readiness = None
+        self.http_collector = None
+        self._domain_flags = {}
+        # Kills browsers stuck on a page past its hard deadline
+        self.watchdog = Watchdog()
+        self.retry_policy = RetryPolicy()
+        # Kept across runs so hosts that keep failing stay paused
+        self.circuit_breaker = CircuitBreaker()
+        # Attempts made per URL, reported in its results
+        self._attempts = {}
+        self.freshness = FreshnessPolicy()
+        # Consent cookies set before each page, when settings["consent_preset"] is set
+        self._consent_presets = None
+        # Web storage read with each page, when settings["web_storage"] is set
+        self._web_storage = None
+        # Per-host queues of the latest run, when settings["politeness"] is set
+        self.host_scheduler = None
+        # Built profile templates by name, cloned for every headless browser
+        self._profile_templates = {}
+        # Lean profile totals of the run's tab streams, which cannot be split per URL
+        self._load_totals = None
+        self._load_lock = threading.Lock()
         self.db_manager = DatabaseManager()
         
     def initialize_browser(self, settings: Dict):
         """Initialize the selected browser with given settings."""
         self.current_settings = settings
         browser_type = settings["browser"]
+        if "offline_drivers" in settings:
+            driver_cache.offline = bool(settings["offline_drivers"])
         
         try:
             if browser_type == "chrome":
-                self.browser = ChromeBrowser(headless=settings["headless"])
+                # Reuses warm browsers from the previous run when the settings still match
+                self._get_browser_pool(settings).warm(self._worker_count(settings))
             elif browser_type == "firefox":
                 # TODO: Add Firefox implementation
                 raise NotImplementedError("Firefox support coming soon!")
@@ -44,83 +96,678 @@ class BrowserController:
         """
         Collect cookies from the specified URLs.
         
+        URLs are spread over ``settings["workers"]`` browsers (default 1), each
+        loading up to ``settings["tabs"]`` pages at once (default 1), so they
+        may finish out of order. URLs collected within their freshness window
+        (``settings["freshness"]``) are skipped and answered from the database
+        unless ``settings["force_refresh"]`` is set.
+        
+        URLs are canonicalized first, so spellings of the same page are
+        collected once, and grouped by registrable domain so a site's pages
+        run back to back. Empty or unparseable URLs fail on their own, under
+        the URL as given.
+        
         Args:
             urls: List of URLs to collect cookies from
             callback: Optional callback function to update progress
             
         Returns:
-            Dictionary containing results for each URL
+            Dictionary containing results for each canonical URL
         """
         results = {}
         total_urls = len(urls)
+        # Progress of each URL as a fraction between 0 and 1
+        url_progress = {}
+        
+        def report_progress(message):
+            if callback:
+                overall_progress = (sum(url_progress.values()) / total_urls) * 100
+                callback(overall_progress, total_urls, message)
         
         try:
-            for i, url in enumerate(urls):
-                # Calculate base progress for this URL (each URL takes up 1/total_urls of the progress bar)
-                base_progress = (i / total_urls) * 100
-                
-                if callback:
-                    callback(base_progress, total_urls, f"Starting {url}")
-                
+            valid = []
+            for url in urls:
                 try:
-                    # Add http:// if not present
-                    if not url.startswith(('http://', 'https://')):
-                        url = 'https://' + url
-                    
-                    # Create a progress callback for this specific URL
-                    def url_progress_callback(progress_fraction, message):
-                        if callback:
-                            # Calculate overall progress:
-                            # base_progress + (progress_fraction * (100/total_urls))
-                            overall_progress = base_progress + (progress_fraction * (100/total_urls))
-                            callback(overall_progress, total_urls, message)
-                    
-                    # Get cookies using the new method with progress reporting
-                    cookies = self.browser.get_cookies_from_url(
-                        url, 
-                        self.current_settings["wait_time"],
-                        progress_callback=url_progress_callback
-                    )
-                    
-                    # Save to database if requested
-                    if self.current_settings["save_cookies"]:
-                        try:
-                            self.db_manager.save_cookies(url, cookies)
-                            logger.info(f"Saved {len(cookies)} cookies for {url} to database")
-                        except Exception as e:
-                            logger.error(f"Failed to save cookies to database for {url}: {str(e)}")
-                    
-                    results[url] = {
-                        "success": True,
-                        "cookies": cookies,
-                        "count": len(cookies)
-                    }
-                    
-                except Exception as e:
-                    logger.error(f"Failed to collect cookies from {url}: {str(e)}")
-                    results[url] = {
-                        "success": False,
-                        "error": str(e),
-                        "cookies": [],
-                        "count": 0
-                    }
+                    valid.append(self._normalize_url(url))
+                except ValueError as e:
+                    results[url] = self._failed_result(url, e)
+                    url_progress[url] = 1.0
+            urls, duplicates = dedupe_urls(valid)
+            if duplicates:
+                logger.info(f"Removed {duplicates} duplicate URLs")
+            urls = [url for group in group_by_domain(urls).values() for url in group]
+            total_urls = len(urls) + len(results)
+            self._prepare_run()
+            
+            fresh = self._fresh_urls(urls)
+            for url, collected_at in fresh.items():
+                results[url] = self._skipped_result(url, collected_at)
+                url_progress[url] = 1.0
+            urls = [url for url in urls if url not in fresh]
+            
+            for event, url, payload in self._run_workers(urls, max(len(urls), 1)):
+                if event == "progress":
+                    progress_fraction, message = payload
+                    url_progress[url] = progress_fraction
+                    report_progress(message)
+                    continue
+                
+                url_progress[url] = 1.0
+                if event == "done":
+                    results[url] = self._record_result(url, payload)
+                    report_progress(f"Completed {url}")
+                else:
+                    results[url] = self._failed_result(url, payload)
+                    report_progress(f"Failed {url}")
             
             if callback:
                 callback(100, total_urls, "Collection completed")
+            failed = sum(1 for result in results.values() if not result["success"])
+            logger.info(f"Collected {len(results) - len(fresh) - failed} URLs, "
+                        f"skipped {len(fresh)} still fresh, {failed} failed")
+            self._log_run_summary()
             
             return True, results
             
         except Exception as e:
             logger.error(f"Collection failed: {str(e)}")
             return False, f"Collection failed: {str(e)}"
+    
+    def iter_results(self, urls: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+        """
+        Collect cookies from a stream of URLs, yielding ``(url, result)`` as each finishes.
+        
+        Unlike ``collect_cookies`` nothing is kept per URL once its result is
+        yielded, and URLs are read lazily, so memory stays flat for inputs of
+        any length. URLs are canonicalized but not deduplicated, which would
+        need memory per URL. Results have the same form as in
+        ``collect_cookies``; an invalid URL gets a failed result and the
+        stream goes on.
+        
+        Args:
+            urls: Iterable of URLs, consumed as workers need them
+        """
+        self._prepare_run()
+        # Fresh and invalid URLs are found on the feeder thread and answered on this one
+        fresh = queue.Queue()
+        counts = {"collected": 0, "skipped": 0, "failed": 0}
+        
+        def urls_to_collect():
+            for url in urls:
+                # An exception here would end the feeder and drop every later URL
+                try:
+                    canonical = self._normalize_url(url)
+                except ValueError as e:
+                    fresh.put((url, e, None))
+                    continue
+                collected_at = self._fresh_urls([canonical]).get(canonical)
+                if collected_at:
+                    fresh.put((canonical, None, collected_at))
+                else:
+                    yield canonical
+        
+        def answer_fresh():
+            while True:
+                try:
+                    url, error, collected_at = fresh.get_nowait()
+                except queue.Empty:
+                    return
+                if error is not None:
+                    counts["failed"] += 1
+                    yield url, self._failed_result(url, error)
+                else:
+                    counts["skipped"] += 1
+                    yield url, self._skipped_result(url, collected_at)
+        
+        # The URL count is unknown, so every configured worker starts
+        for event, url, payload in self._run_workers(urls_to_collect(), self._worker_count(self.current_settings)):
+            yield from answer_fresh()
+            if event == "done":
+                counts["collected"] += 1
+                yield url, self._record_result(url, payload)
+            elif event == "error":
+                counts["failed"] += 1
+                yield url, self._failed_result(url, payload)
+        yield from answer_fresh()
+        
+        logger.info(f"Collected {counts['collected']} URLs, skipped {counts['skipped']} still fresh, "
+                    f"{counts['failed']} failed")
+        self._log_run_summary()
+    
+    def collect_batch(self, batch: str, urls: Optional[Iterable[str]] = None, callback=None,
+                      retry_failed: bool = False):
+        """
+        Collect cookies for a durable batch of URLs kept in the database.
+        
+        The URLs are added to the batch's job queue (ones already queued are
+        skipped), then every job that is not finished is collected. Calling it
+        again with the same batch name after a crash, reboot or closed window
+        resumes where the previous run stopped, and several processes may
+        work on one batch. Cookies are always saved to the database, since
+        per-URL results are not kept in memory. Pending jobs whose URL is
+        still within its freshness window are marked done without loading it.
+        
+        Args:
+            batch: Name of the batch
+            urls: Optional URLs to add to the batch first
+            callback: Optional callback function to update progress
+            retry_failed: Queue the batch's failed jobs again before collecting
+            
+        Returns:
+            Tuple of success and the number of jobs per state, plus how many
+            URLs this call "collected", "skipped" and left out as "invalid"
+        """
+        try:
+            job_queue = JobQueue(self.db_manager, batch,
+                                 lease_seconds=self.current_settings.get("job_lease_seconds", 120))
+            invalid = []
+            
+            def valid_urls():
+                for url in urls:
+                    try:
+                        yield self._normalize_url(url)
+                    except ValueError as e:
+                        logger.error(f"Skipping {url!r} in batch '{batch}': {str(e)}")
+                        invalid.append(url)
+            
+            if urls is not None:
+                job_queue.add(valid_urls())
+            if retry_failed:
+                logger.info(f"Batch '{batch}': retrying {job_queue.retry_failed()} failed jobs")
+            self._prepare_run()
+            
+            skipped = job_queue.skip(self._fresh_urls(job_queue.pending_urls())) if self.freshness.enabled else 0
+            collected = 0
+            counts = job_queue.counts()
+            total_jobs = sum(counts.values())
+            finished = counts[DONE] + counts[FAILED]
+            logger.info(f"Batch '{batch}': {finished} of {total_jobs} jobs already finished, "
+                        f"{skipped} of them skipped as still fresh")
+            # Progress of URLs in flight as a fraction between 0 and 1
+            url_progress = {}
+            
+            with job_queue.heartbeating():
+                try:
+                    for event, url, payload in self._run_workers(job_queue.claims(), total_jobs - finished):
+                        if event == "progress":
+                            url_progress[url] = payload[0]
+                            message = payload[1]
+                        elif event == "done":
+                            try:
+                                self.db_manager.save_cookies(url, payload["cookies"])
+                                self._save_storage(url, payload)
+                            except Exception as e:
+                                # Not marked done, so the job is collected again on the next run
+                                logger.error(f"Failed to save cookies for {url}, leaving its job open: {str(e)}")
+                                url_progress.pop(url, None)
+                                continue
+                            result = self._record_result(url, payload, save=False)
+                            job_queue.complete(url, {key: result[key] for key in ("count", "attempts", "backend")
+                                                     if key in result})
+                            collected += 1
+                            message = f"Completed {url}"
+                        else:
+                            job_queue.fail(url, self._failed_result(url, payload)["error"])
+                            message = f"Failed {url}"
+                        
+                        if event != "progress":
+                            url_progress.pop(url, None)
+                            finished += 1
+                        if callback:
+                            done_fraction = finished + sum(url_progress.values())
+                            callback(done_fraction / max(total_jobs, 1) * 100, total_jobs, message)
+                finally:
+                    # Jobs claimed but not started go straight back to pending
+                    job_queue.release()
+            
+            if callback:
+                callback(100, total_jobs, "Collection completed")
+            logger.info(f"Batch '{batch}': collected {collected} URLs, skipped {skipped} still fresh")
+            self._log_run_summary()
+            return True, {**job_queue.counts(), "collected": collected, "skipped": skipped, "invalid": len(invalid)}
+            
+        except Exception as e:
+            logger.error(f"Batch collection failed: {str(e)}")
+            return False, f"Batch collection failed: {str(e)}"
+    
+    def _run_workers(self, urls: Iterable[str], url_count: int):
+        """Start the browser workers over ``urls`` and return their event stream."""
+        politeness = self.current_settings.get("politeness")
+        self.host_scheduler = HostScheduler(**politeness) if politeness is not None else None
+        pool = WorkerPool(
+            self.browser_pool.checkout,
+            self.browser_pool.checkin,
+            num_workers=min(self._worker_count(self.current_settings), max(url_count, 1)),
+            renew=self.browser_pool.renew,
+            retry=self._retry_delay,
+            host_scheduler=self.host_scheduler
+        )
+        
+        tabs = self._tab_count(self.current_settings)
+        if tabs > 1:
+            return pool.run(urls, self._collect_stream, stream=True, chunk_size=tabs * 5)
+        return pool.run(urls, self._collect_url)
+    
+    def _log_run_summary(self):
+        """Log pool, driver cache and politeness statistics and domains paused by the circuit breaker."""
+        logger.info(f"Browser pool stats: {self.browser_pool.stats()}")
+        logger.info(f"Driver cache stats: {driver_cache.stats()}")
+        if self.host_scheduler:
+            logger.info(f"Host politeness stats: {self.host_scheduler.stats()}")
+        if self._load_totals:
+            logger.info(f"Lean profile stats: {self._load_totals}")
+        open_domains = self.circuit_breaker.open_domains()
+        if open_domains:
+            logger.warning(f"Paused after repeated failures: {', '.join(open_domains)}")
+    
+    def _normalize_url(self, url: str) -> str:
+        """Canonical form of a URL, with https:// added if not present."""
+        return canonicalize_url(url)
+    
+    def _prepare_run(self):
+        """Set up per-run state shared by all workers."""
+        # "wait_time" is the upper bound; settings["readiness"] can tune the criteria
+        self._page_readiness = PageReadiness(**{
+            "max_wait": self.current_settings["wait_time"],
+            **self.current_settings.get("readiness", {})
+        })
+        
+        self.retry_policy = RetryPolicy.from_settings(self.current_settings)
+        breaker_settings = self.current_settings.get("circuit_breaker", {})
+        self.circuit_breaker.failure_threshold = breaker_settings.get("failure_threshold", 5)
+        self.circuit_breaker.cooldown = breaker_settings.get("cooldown", 300)
+        
+        self.freshness = FreshnessPolicy.from_settings(self.current_settings)
+        self._consent_presets = ConsentPresets.from_settings(self.current_settings)
+        self._web_storage = WebStorageCapture.from_settings(self.current_settings)
+        self._load_totals = None
+        
+        if self.current_settings.get("fast_path"):
+            # Domains already known to need (or not need) a browser
+            self._domain_flags = self.db_manager.get_domain_profiles()
+            if not self.http_collector:
+                self.http_collector = HttpCookieCollector(pool_size=self._worker_count(self.current_settings))
+    
+    def _record_result(self, url: str, payload: Dict, save: Optional[bool] = None) -> Dict:
+        """
+        Store what a worker collected for a URL and build its results entry.
+        
+        Cookies are saved when ``save`` is True, or by default when the
+        "save_cookies" setting is on.
+        """
+        cookies = payload.pop("cookies")
+        
+        if "needs_browser" in payload:
+            domain = registrable_domain(url)
+            self._domain_flags[domain] = payload["needs_browser"]
+            try:
+                self.db_manager.set_domain_profile(domain, payload["needs_browser"])
+            except Exception as e:
+                logger.error(f"Failed to save domain profile for {domain}: {str(e)}")
+        
+        # Save to database if requested
+        if save if save is not None else self.current_settings["save_cookies"]:
+            try:
+                self.db_manager.save_cookies(url, cookies)
+                self._save_storage(url, payload)
+                logger.info(f"Saved {len(cookies)} cookies for {url} to database")
+            except Exception as e:
+                logger.error(f"Failed to save cookies to database for {url}: {str(e)}")
+        
+        return {
+            "success": True,
+            "cookies": cookies,
+            "count": len(cookies),
+            "attempts": self._attempts.pop(url, 1),
+            **payload
+        }
+    
+    def _save_storage(self, url: str, payload: Dict):
+        """Store the web storage captured with a URL's cookies, if any."""
+        if payload.get("storage"):
+            limits = self._web_storage or WebStorageCapture()
+            self.db_manager.save_storage(url, payload["storage"],
+                                         max_value_length=limits.max_value_length,
+                                         max_items=limits.max_items)
+    
+    def _fresh_urls(self, urls: Iterable[str], chunk_size: int = 500) -> Dict[str, datetime]:
+        """
+        URLs collected recently enough to skip this run, with when they were collected.
+        
+        Collection times are looked up per chunk of URLs, so memory does not
+        grow with the number of websites in the database.
+        """
+        fresh = {}
+        if not self.freshness.enabled:
+            return fresh
+        urls = list(urls)
+        for i in range(0, len(urls), chunk_size):
+            collected_at = self.db_manager.get_collection_times(urls[i:i + chunk_size])
+            fresh.update((url, collected_at[url]) for url in urls[i:i + chunk_size]
+                         if self.freshness.is_fresh(url, collected_at.get(url)))
+        return fresh
+    
+    def _skipped_result(self, url: str, collected_at: datetime) -> Dict:
+        """Build the results entry for a fresh URL from its stored cookies."""
+        cookies = self.db_manager.get_cookies(url) or []
+        return {
+            "success": True,
+            "skipped": True,
+            "collected_at": collected_at.isoformat(),
+            "cookies": cookies,
+            "count": len(cookies),
+            "attempts": 0
+        }
+    
+    def _failed_result(self, url: str, error: Exception) -> Dict:
+        """Build the results entry for a URL that could not be collected."""
+        logger.error(f"Failed to collect cookies from {url}: {str(error)}")
+        result = {
+            "success": False,
+            "error": str(error),
+            "error_kind": classify_error(error),
+            "attempts": self._attempts.pop(url, 1),
+            "cookies": [],
+            "count": 0
+        }
+        if isinstance(error, DeadlineExceeded):
+            # Reported for inspection only, never saved
+            result["partial"] = True
+            result["cookies"] = error.partial_cookies
+            result["count"] = len(error.partial_cookies)
+        return result
+    
+    def _retry_delay(self, browser, url: str, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Decide whether a failed URL gets another attempt.
+        
+        Returns the backoff delay in seconds, or None to report the failure.
+        """
+        kind = classify_error(error)
+        # A page past its deadline killed the browser on purpose: a timeout of the host, not a crash
+        if kind != CIRCUIT_OPEN and kind != CRASH and not isinstance(error, DeadlineExceeded) \
+                and not browser.is_alive():
+            kind = CRASH
+        if kind == CRASH or isinstance(error, DeadlineExceeded):
+            # The worker's browser is replaced before the next attempt
+            browser.broken = True
+        
+        domain = registrable_domain(url)
+        if kind == CRASH:
+            # A crash is the browser's fault, not the host's
+            self.circuit_breaker.release_probe(domain)
+        elif kind != CIRCUIT_OPEN:
+            self.circuit_breaker.record_failure(domain)
+        
+        self._attempts[url] = attempt
+        delay = self.retry_policy.next_delay(kind, attempt)
+        if delay is None or self.circuit_breaker.is_open(domain):
+            return None
+        logger.info(f"Retrying {url} in {delay:.1f}s after {kind} error (attempt {attempt + 1})")
+        self._attempts[url] = attempt + 1
+        return delay
+    
+    def _check_circuit(self, url: str):
+        """Fail fast for URLs on domains whose circuit is open."""
+        domain = registrable_domain(url)
+        if not self.circuit_breaker.allow(domain):
+            raise CircuitOpenError(f"Skipped: {domain} failed repeatedly, retrying after cooldown")
+    
+    def _collect_url(self, browser, url: str, progress_callback) -> Dict:
+        """
+        Collect cookies from a single URL on a worker's browser.
+        
+        Returns the cookies under "cookies" plus per-URL details that are
+        merged into the URL's results.
+        """
+        progress_callback(0.0, f"Starting {url}")
+        self._check_circuit(url)
+        
+        http_result, details = self._try_fast_path(url)
+        if details:
+            self.circuit_breaker.record_success(registrable_domain(url))
+            progress_callback(1.0, f"Completed {url} over HTTP")
+            return details
+        
+        deadline = self.watchdog.arm(self._url_deadline(self.current_settings), browser.kill, url)
+        try:
+            cookies = browser.get_cookies_from_url(
+                url,
+                self.current_settings["wait_time"],
+                progress_callback=progress_callback,
+                readiness=self._page_readiness,
+                capture_mode=self.current_settings.get("cookie_capture", "document"),
+                consent_presets=self._consent_presets,
+                web_storage=self._web_storage
+            )
+        except DeadlineExceeded as e:
+            # The URL fails like any other error, so it is retried on a fresh browser and
+            # never saved or marked done with the partial cookies
+            logger.warning(f"{str(e)}; {len(e.partial_cookies)} cookies were seen before the kill")
+            progress_callback(1.0, f"Aborted {url}")
+            raise
         finally:
-            self.cleanup()
+            self.watchdog.disarm(deadline)
+        self.circuit_breaker.record_success(registrable_domain(url))
+        details = self._browser_details(cookies, browser.last_readiness, http_result)
+        if browser.last_load_stats is not None:
+            details["load"] = browser.last_load_stats
+        if browser.last_consent is not None:
+            details["consent"] = browser.last_consent
+        if browser.last_storage is not None:
+            details["storage"] = browser.last_storage
+        return details
+    
+    def _collect_stream(self, browser, url_source, progress_callback):
+        """
+        Collect cookies from a stream of URLs in several tabs of a worker's browser.
+        
+        Yields ``(url, details)`` pairs like ``_collect_url`` returns, or
+        ``(url, exception)`` for failed URLs.
+        """
+        http_results = {}
+        finished_early = []
+        # Tabs settle independently, so the browser is only killed when no
+        # tab has finished within the per-URL deadline
+        url_deadline = self._url_deadline(self.current_settings)
+        deadline = {"token": None}
+        
+        def arm_deadline():
+            deadline["token"] = self.watchdog.arm(url_deadline, browser.kill, "browser tabs")
+        
+        def browser_urls():
+            while True:
+                # Waiting for more URLs is not the browser's fault
+                self.watchdog.disarm(deadline["token"])
+                url = next(url_source, None)
+                arm_deadline()
+                if url is None:
+                    return
+                progress_callback(url, 0.0, f"Starting {url}")
+                try:
+                    self._check_circuit(url)
+                except CircuitOpenError as e:
+                    finished_early.append((url, e))
+                    continue
+                http_result, details = self._try_fast_path(url)
+                if details:
+                    self.circuit_breaker.record_success(registrable_domain(url))
+                    progress_callback(url, 1.0, f"Completed {url} over HTTP")
+                    finished_early.append((url, details))
+                    continue
+                http_results[url] = http_result
+                yield url
+        
+        tab_results = browser.iter_cookies_from_tabs(
+            browser_urls(),
+            tabs=self._tab_count(self.current_settings),
+            wait_time=self.current_settings["wait_time"],
+            progress_callback=progress_callback,
+            readiness=self._page_readiness,
+            capture_mode=self.current_settings.get("cookie_capture", "document"),
+            consent_presets=self._consent_presets,
+            web_storage=self._web_storage
+        )
+        arm_deadline()
+        try:
+            for url, outcome in tab_results:
+                self.watchdog.touch(deadline["token"], url_deadline)
+                while finished_early:
+                    yield finished_early.pop(0)
+                http_result = http_results.pop(url, None)
+                if isinstance(outcome, Exception):
+                    yield url, outcome
+                else:
+                    self.circuit_breaker.record_success(registrable_domain(url))
+                    details = self._browser_details(outcome["cookies"], outcome["readiness"], http_result)
+                    for key in ("consent", "storage", "shared_jar"):
+                        if key in outcome:
+                            details[key] = outcome[key]
+                    yield url, details
+        finally:
+            self.watchdog.disarm(deadline["token"])
+            if browser.last_load_stats is not None:
+                self._add_load_totals(browser.last_load_stats)
+        while finished_early:
+            yield finished_early.pop(0)
+    
+    def _add_load_totals(self, stats: Dict):
+        """Add a tab stream's lean profile stats to the run's totals."""
+        with self._load_lock:
+            if self._load_totals is None:
+                self._load_totals = dict.fromkeys(stats, 0)
+            for key, value in stats.items():
+                self._load_totals[key] += value
+    
+    def _try_fast_path(self, url: str):
+        """
+        Try collecting a URL over plain HTTP when the fast path is enabled.
+        
+        Returns ``(http_result, details)``: details is set when the HTTP result
+        is good enough, otherwise http_result (possibly None) is kept to
+        compare against the browser.
+        """
+        if not self.current_settings.get("fast_path"):
+            return None, None
+        
+        http_result = None
+        needs_browser = self._domain_flags.get(registrable_domain(url))
+        if needs_browser is not True:
+            http_result = self._fetch_over_http(url)
+        if http_result and (needs_browser is False or not http_result["needs_browser"]):
+            return http_result, {"cookies": http_result["cookies"], "backend": "http"}
+        return http_result, None
+    
+    def _browser_details(self, cookies: List[Dict], readiness: Optional[Dict],
+                         http_result: Optional[Dict]) -> Dict:
+        """Build the details for a URL the browser collected."""
+        details = {"cookies": cookies, "readiness": readiness, "backend": "browser"}
+        
+        if http_result:
+            # Learn whether the browser found cookies that plain HTTP missed
+            http_cookies = {(c["name"], c["domain"].lstrip(".")) for c in http_result["cookies"]}
+            details["needs_browser"] = any(
+                (c["name"], c["domain"].lstrip(".")) not in http_cookies for c in cookies
+            )
+        return details
+    
+    def _fetch_over_http(self, url: str) -> Optional[Dict]:
+        """Fetch a URL without a browser; returns None if the fetch failed."""
+        try:
+            return self.http_collector.fetch(url)
+        except Exception as e:
+            logger.info(f"HTTP fetch of {url} failed, falling back to the browser: {str(e)}")
+            return None
+    
+    def _worker_count(self, settings: Dict) -> int:
+        """Number of parallel browsers to use for the given settings."""
+        workers = max(1, int(settings.get("workers", 1)))
+        if not settings["headless"] and workers > 1:
+            logger.warning("Visible mode drives a single browser; enable headless mode for parallel browsers")
+            return 1
+        return workers
+    
+    def _url_deadline(self, settings: Dict) -> float:
+        """Hard per-URL limit in seconds, after which the browser is killed."""
+        if "url_deadline" in settings:
+            return float(settings["url_deadline"])
+        # Room for an aborted navigation, the readiness wait and cookie reads
+        return self._page_load_timeout(settings) + settings["wait_time"] + 30
+    
+    def _page_load_timeout(self, settings: Dict) -> float:
+        """Seconds before a navigation is stopped and the page read as it is."""
+        return float(settings.get("page_load_timeout", 30))
+    
+    def _tab_count(self, settings: Dict) -> int:
+        """Number of pages each browser loads at once for the given settings."""
+        return max(1, int(settings.get("tabs", 1)))
+    
+    def _get_browser_pool(self, settings: Dict) -> BrowserPool:
+        """Return the warm browser pool, replacing it if the browser settings changed."""
+        workers = self._worker_count(settings)
+        if not self._owns_pool:
+            self.browser_pool.max_size = max(self.browser_pool.max_size, workers)
+            return self.browser_pool
+        
+        headless = settings["headless"]
+        load_profile = LoadProfile.from_settings(settings)
+        page_load_strategy = settings.get("page_load_strategy", "normal")
+        page_load_timeout = self._page_load_timeout(settings)
+        profile_template = self._profile_template(settings) if headless else None
+        isolation = settings.get("isolation")
+        pool_key = (settings["browser"], headless, load_profile.key() if load_profile else None,
+                    page_load_strategy, page_load_timeout, profile_template.path if profile_template else None,
+                    isolation)
+        if self.browser_pool and self._pool_key != pool_key:
+            logger.info("Browser settings changed, closing the warm browser pool")
+            self.browser_pool.close()
+            self.browser_pool = None
+        
+        if not self.browser_pool:
+            self.browser_pool = BrowserPool(
+                # Only the single visible browser needs to take over the user's Chrome profile
+                lambda: ChromeBrowser(
+                    headless=headless,
+                    kill_existing=not headless,
+                    load_profile=load_profile,
+                    page_load_strategy=page_load_strategy,
+                    page_load_timeout=page_load_timeout,
+                    profile_template=profile_template,
+                    isolation=isolation
+                ),
+                max_size=workers,
+                idle_timeout=settings.get("pool_idle_timeout", 300),
+                max_uses=settings.get("pool_max_uses", 200),
+                supervisor=BrowserSupervisor()
+            )
+            self._pool_key = pool_key
+        self.browser_pool.max_size = max(self.browser_pool.max_size, workers)
+        self.browser_pool.supervisor.max_rss_mb = settings.get("max_browser_rss_mb", 2048)
+        return self.browser_pool
+    
+    def _profile_template(self, settings: Dict) -> Optional[ProfileTemplate]:
+        """The profile template selected by settings["profile_template"], built on first use."""
+        name = settings.get("profile_template")
+        if not name:
+            return None
+        name = "default" if name is True else str(name)
+        if name not in self._profile_templates:
+            template = ProfileTemplate(name)
+            try:
+                template.ensure(lambda path: ChromeBrowser(headless=True, kill_existing=False,
+                                                           user_data_dir=path).close())
+            except Exception as e:
+                logger.warning(f"Could not build profile template '{name}', using fresh profiles: {str(e)}")
+                return None
+            self._profile_templates[name] = template
+        return self._profile_templates[name]
     
     def cleanup(self):
-        """Clean up browser resources."""
+        """Shut down the warm browser pool and close its browsers."""
         try:
-            if self.browser:
-                self.browser.close()
-                self.browser = None
+            if self.browser_pool and self._owns_pool:
+                self.browser_pool.close()
+                self.browser_pool = None
+                self._pool_key = None
         except Exception as e:
-            logger.error(f"Error during cleanup: {str(e)}") 
\ No newline at end of file
+            logger.error(f"Error during cleanup: {str(e)}")
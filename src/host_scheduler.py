@@ -0,0 +1,173 @@
+"""
+Per-host work queues that keep parallel collection polite.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+from .url_utils import hostname
+
+logger = logging.getLogger(__name__)
+
+
+class HostScheduler:
+    """
+    Work queue for ``WorkerPool`` with one queue per host.
+
+    A URL is only handed out while its host has fewer than its concurrency
+    limit in flight and at least its minimum interval has passed since the
+    host's last URL started. Ready hosts take turns, so a list that bunches
+    many paths on one host neither hammers it nor leaves workers idle while
+    other hosts have work.
+
+    Workers call ``done(url)`` when a URL finishes. Items that are not URLs,
+    such as the pool's stop markers, are handed out only once every buffered
+    URL has been.
+    """
+
+    def __init__(self, per_host_concurrency: Optional[int] = 1, min_interval: float = 0.0,
+                 hosts: Optional[Dict[str, Dict]] = None, max_buffered: int = 1000):
+        """
+        Args:
+            per_host_concurrency: URLs of one host in flight at once (None for no limit)
+            min_interval: Seconds between the starts of two URLs of one host
+            hosts: Limits for specific hosts, e.g.
+                ``{"shop.example.com": {"concurrency": 1, "min_interval": 5}}``
+            max_buffered: URLs read ahead of the workers; more lets workers
+                skip further past a throttled host at the cost of memory
+        """
+        self.per_host_concurrency = per_host_concurrency
+        self.min_interval = min_interval
+        self.hosts = {host.lower(): limits for host, limits in (hosts or {}).items()}
+        self.max_buffered = max(1, max_buffered)
+
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._in_flight: Dict[str, int] = {}
+        self._next_start: Dict[str, float] = {}
+        self._markers = deque()
+        self._buffered = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "peak_buffered": 0,
+            "peak_host_depth": 0,
+            "politeness_wait_s": 0.0,
+            "throttled_starts": 0,
+        }
+
+    def put(self, item, timeout: Optional[float] = None):
+        """Queue a URL; raises ``queue.Full`` if the buffer stays full for ``timeout`` seconds"""
+        with self._cond:
+            if not isinstance(item, str):
+                self._markers.append(item)
+                self._cond.notify_all()
+                return
+            if not self._cond.wait_for(lambda: self._buffered < self.max_buffered, timeout):
+                raise queue.Full
+
+            host = hostname(item)
+            host_queue = self._queues.setdefault(host, deque())
+            host_queue.append(item)
+            self._buffered += 1
+            self._stats["peak_buffered"] = max(self._stats["peak_buffered"], self._buffered)
+            self._stats["peak_host_depth"] = max(self._stats["peak_host_depth"], len(host_queue))
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None):
+        """Take the next URL a host is ready for; raises ``queue.Empty`` after ``timeout`` seconds"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        throttled = False
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                item, wait = self._take_ready(now)
+                if item is not None:
+                    if throttled:
+                        self._stats["throttled_starts"] += 1
+                    return item
+                if not self._buffered and self._markers:
+                    return self._markers.popleft()
+
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                if wait is None:
+                    wait = remaining
+                elif remaining is not None:
+                    wait = min(wait, remaining)
+
+                # URLs are waiting, so the time is lost to politeness rather than to an empty queue
+                politeness = self._buffered > 0
+                throttled = throttled or politeness
+                self._cond.wait(wait)
+                if politeness:
+                    self._stats["politeness_wait_s"] += time.monotonic() - now
+
+    def get_nowait(self):
+        """Take any buffered item regardless of the limits; raises ``queue.Empty`` if none"""
+        with self._cond:
+            for host, host_queue in self._queues.items():
+                if host_queue:
+                    self._buffered -= 1
+                    self._cond.notify_all()
+                    return host_queue.popleft()
+            if self._markers:
+                return self._markers.popleft()
+            raise queue.Empty
+
+    def done(self, url: str):
+        """Free the slot a finished URL held on its host"""
+        host = hostname(url)
+        with self._cond:
+            if self._in_flight.get(host, 0) > 0:
+                self._in_flight[host] -= 1
+                if not self._in_flight[host] and not self._queues.get(host):
+                    del self._in_flight[host]
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """Queue depth and the time workers spent held back by the politeness rules"""
+        with self._cond:
+            depths = {host: len(host_queue) for host, host_queue in self._queues.items() if host_queue}
+            stats = dict(self._stats)
+        stats["politeness_wait_s"] = round(stats["politeness_wait_s"], 2)
+        stats["buffered"] = sum(depths.values())
+        stats["hosts_waiting"] = len(depths)
+        stats["deepest_hosts"] = sorted(depths.items(), key=lambda item: -item[1])[:5]
+        return stats
+
+    def _limits(self, host: str):
+        limits = self.hosts.get(host, {})
+        return (limits.get("concurrency", self.per_host_concurrency),
+                limits.get("min_interval", self.min_interval))
+
+    def _take_ready(self, now: float):
+        """Pop a URL from the first ready host; otherwise return the seconds until one may be"""
+        wait = None
+        for host in list(self._queues):
+            host_queue = self._queues[host]
+            if not host_queue:
+                # Forget idle hosts once nothing about them is pending
+                if not self._in_flight.get(host) and self._next_start.get(host, 0.0) <= now:
+                    del self._queues[host]
+                    self._next_start.pop(host, None)
+                continue
+
+            concurrency, min_interval = self._limits(host)
+            if concurrency is not None and self._in_flight.get(host, 0) >= concurrency:
+                continue  # Woken up again by done()
+            next_start = self._next_start.get(host, 0.0)
+            if next_start > now:
+                wait = next_start - now if wait is None else min(wait, next_start - now)
+                continue
+
+            url = host_queue.popleft()
+            self._buffered -= 1
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self._next_start[host] = now + min_interval
+            # Served hosts go to the back, so hosts take turns
+            self._queues.move_to_end(host)
+            self._cond.notify_all()
+            return url, None
+        return None, wait
@@ -0,0 +1,241 @@
+"""
+HTTP-only cookie collection for sites that set their cookies without JavaScript.
+"""
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+from typing import Dict, List, Optional, Tuple
+import logging
+import re
+import time
+import urllib3
+
+logger = logging.getLogger(__name__)
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+DEFAULT_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# Page content that means cookies are (also) set by scripts, so only a
+# browser sees the full picture
+JS_COOKIE_MARKERS = [
+    'document.cookie',
+    'googletagmanager.com',
+    'google-analytics.com',
+    'gtag(',
+    'connect.facebook.net',
+    'static.hotjar.com',
+    'cdn.segment.com',
+    'matomo.js',
+    'piwik.js',
+    'onetrust',
+    'cookiebot',
+    'didomi',
+    'quantcast',
+    'cookielaw.org',
+]
+
+_NOSCRIPT_WARNING = re.compile(r'<noscript[^>]*>[^<]*(enable|turn on)[^<]*javascript', re.IGNORECASE)
+_META_REFRESH = re.compile(r'<meta[^>]+http-equiv=["\']?refresh', re.IGNORECASE)
+
+
+def _default_path(url: str) -> str:
+    """RFC 6265 default cookie path: the request path up to its last slash"""
+    path = urlsplit(url).path
+    if not path.startswith('/') or path.count('/') == 1:
+        return '/'
+    return path[:path.rfind('/')]
+
+
+def _parse_expires(value: str) -> Optional[int]:
+    for candidate in (value, value.replace('-', ' ')):
+        try:
+            return int(parsedate_to_datetime(candidate).timestamp())
+        except (TypeError, ValueError, IndexError):
+            continue
+    return None
+
+
+def parse_set_cookie(header: str, request_url: str, now: Optional[float] = None) -> Optional[Dict]:
+    """
+    Parse one ``Set-Cookie`` header into the dict shape of ``driver.get_cookies()``.
+
+    Returns None for headers a browser would reject, such as a Domain
+    attribute that does not match the request host.
+    """
+    now = time.time() if now is None else now
+    parts = header.split(';')
+    name, separator, value = parts[0].partition('=')
+    name = name.strip()
+    if not separator or not name:
+        return None
+
+    host = urlsplit(request_url).hostname or ''
+    cookie = {
+        'name': name,
+        'value': value.strip(),
+        'domain': host,
+        'path': _default_path(request_url),
+        'secure': False,
+        'httpOnly': False,
+        'sameSite': 'Lax',
+    }
+    max_age = None
+
+    for attribute in parts[1:]:
+        key, _, attribute_value = attribute.strip().partition('=')
+        key = key.strip().lower()
+        attribute_value = attribute_value.strip()
+        if key == 'domain' and attribute_value:
+            domain = attribute_value.lstrip('.').lower()
+            if host != domain and not host.endswith('.' + domain):
+                return None
+            cookie['domain'] = '.' + domain
+        elif key == 'path' and attribute_value.startswith('/'):
+            cookie['path'] = attribute_value
+        elif key == 'expires':
+            expiry = _parse_expires(attribute_value)
+            if expiry is not None:
+                cookie['expiry'] = expiry
+        elif key == 'max-age':
+            try:
+                max_age = int(attribute_value)
+            except ValueError:
+                continue
+        elif key == 'secure':
+            cookie['secure'] = True
+        elif key == 'httponly':
+            cookie['httpOnly'] = True
+        elif key == 'samesite' and attribute_value.capitalize() in ('Strict', 'Lax', 'None'):
+            cookie['sameSite'] = attribute_value.capitalize()
+
+    # Max-Age wins over Expires
+    if max_age is not None:
+        cookie['expiry'] = int(now) + max_age
+    return cookie
+
+
+def needs_browser(html: str, cookies: List[Dict]) -> Tuple[bool, str]:
+    """Guess whether a page sets cookies through JavaScript; returns (verdict, reason)"""
+    lowered = html.lower()
+    for marker in JS_COOKIE_MARKERS:
+        if marker in lowered:
+            return True, f"page references {marker}"
+    if _NOSCRIPT_WARNING.search(html):
+        return True, "page requires JavaScript"
+    if _META_REFRESH.search(html):
+        return True, "page redirects with a meta refresh"
+    if not cookies and lowered.count('<script') >= 5:
+        return True, "script-heavy page set no cookies over HTTP"
+    return False, "no sign of script-set cookies"
+
+
+class HttpCookieCollector:
+    """
+    Collect cookies with plain HTTP requests over pooled keep-alive connections.
+
+    Redirects are followed by hand so ``Set-Cookie`` headers from every hop
+    are captured, and cookies set on earlier hops are sent to later ones like
+    a browser would. Safe to share between threads.
+    """
+
+    def __init__(self, timeout: float = 10.0, max_redirects: int = 10,
+                 user_agent: str = DEFAULT_USER_AGENT, pool_size: int = 10,
+                 max_body_bytes: int = 2 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.max_body_bytes = max_body_bytes
+        self.http = urllib3.PoolManager(
+            num_pools=100,
+            maxsize=pool_size,
+            retries=False,
+            headers={
+                'User-Agent': user_agent,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+            },
+        )
+
+    def fetch(self, url: str) -> Dict:
+        """
+        Fetch a URL and return its cookies.
+
+        Returns:
+            Dictionary with "cookies", "final_url", "status", "needs_browser"
+            and "reason" (why the page does or does not look JS-dependent)
+        """
+        jar = {}
+        current_url = url
+        for _ in range(self.max_redirects + 1):
+            response = self.http.request(
+                'GET', current_url,
+                headers=self._cookie_header(jar, current_url),
+                redirect=False,
+                timeout=self.timeout,
+                preload_content=False,
+            )
+            try:
+                body = response.read(self.max_body_bytes)
+            except Exception:
+                response.close()
+                raise
+            if len(body) < self.max_body_bytes:
+                # Fully read, so the connection can be kept alive
+                response.release_conn()
+            else:
+                response.close()
+
+            for header in response.headers.getlist('Set-Cookie'):
+                cookie = parse_set_cookie(header, current_url)
+                if cookie is None:
+                    continue
+                key = (cookie['name'], cookie['domain'], cookie['path'])
+                if cookie.get('expiry') is not None and cookie['expiry'] <= time.time():
+                    jar.pop(key, None)  # Expired cookies delete earlier ones
+                else:
+                    jar[key] = cookie
+
+            location = response.headers.get('Location')
+            if response.status in REDIRECT_STATUSES and location:
+                current_url = urljoin(current_url, location)
+                continue
+            break
+        else:
+            raise RuntimeError(f"Too many redirects for {url}")
+
+        cookies = list(jar.values())
+        result = {
+            'cookies': cookies,
+            'final_url': current_url,
+            'status': response.status,
+            'needs_browser': False,
+            'reason': None,
+        }
+        if response.status >= 400:
+            result['needs_browser'], result['reason'] = True, f"HTTP {response.status}"
+        elif 'html' in response.headers.get('Content-Type', 'text/html'):
+            html = body.decode('utf-8', errors='replace')
+            result['needs_browser'], result['reason'] = needs_browser(html, cookies)
+        logger.info(f"HTTP fetch of {url} found {len(cookies)} cookies "
+                    f"({'needs browser' if result['needs_browser'] else 'no browser needed'}: {result['reason']})")
+        return result
+
+    def _cookie_header(self, jar, url):
+        """Cookies from earlier hops that a browser would send to this URL"""
+        parts = urlsplit(url)
+        host = parts.hostname or ''
+        path = parts.path or '/'
+        matching = []
+        for cookie in jar.values():
+            domain = cookie['domain']
+            if domain.startswith('.'):
+                if host != domain[1:] and not host.endswith(domain):
+                    continue
+            elif host != domain:
+                continue
+            if not path.startswith(cookie['path']):
+                continue
+            if cookie['secure'] and parts.scheme != 'https':
+                continue
+            matching.append(f"{cookie['name']}={cookie['value']}")
+        return {'Cookie': '; '.join(matching)} if matching else {}
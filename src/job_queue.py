@@ -0,0 +1,287 @@
+"""
+Durable job queue in the cookie database, so large batches survive restarts.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from .database import DatabaseManager, Job
+from .url_utils import canonicalize_url
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Persistent queue of URLs for one named batch.
+
+    Every URL is a row in the ``jobs`` table. Workers claim jobs under a lease
+    that a heartbeat keeps extending; jobs whose lease ran out, because their
+    process crashed or was closed, become claimable again. A restarted run
+    therefore resumes with whatever is not done yet, and several processes
+    can share one batch.
+
+    Claims are a single UPDATE marking rows with a fresh token that only
+    touches rows still claimable, so no job is handed to two workers at once.
+    Adding URLs looks up which are already queued instead of relying on a
+    dialect's upsert, so the queue works on any database SQLAlchemy supports.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, batch: str = "default",
+                 lease_seconds: float = 120, owner: Optional[str] = None):
+        """
+        Args:
+            db_manager: Database holding the ``jobs`` table
+            batch: Name of the batch; adding the same URL twice is a no-op
+            lease_seconds: How long a claim holds without a heartbeat
+            owner: Identity of this worker process (generated by default)
+        """
+        self.db_manager = db_manager
+        self.batch = batch
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def add(self, urls: Iterable[str], chunk_size: int = 100) -> int:
+        """
+        Queue URLs as pending jobs, skipping ones already in the batch; returns how many were new.
+
+        URLs are stored in canonical form, the form collection results are
+        reported under. Invalid URLs are logged and left out.
+        """
+        added = 0
+        chunk = []
+        for url in urls:
+            try:
+                chunk.append(canonicalize_url(url))
+            except ValueError as e:
+                logger.warning(f"Not queueing {url!r} in batch '{self.batch}': {str(e)}")
+                continue
+            if len(chunk) >= chunk_size:
+                added += self._insert(chunk)
+                chunk = []
+        if chunk:
+            added += self._insert(chunk)
+        logger.info(f"Queued {added} new jobs in batch '{self.batch}'")
+        return added
+
+    def claim(self, limit: int = 1) -> List[str]:
+        """Lease up to ``limit`` pending or abandoned jobs to this owner"""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        is_claimable = or_(Job.status == PENDING, and_(Job.status == IN_FLIGHT, Job.lease_expires < now))
+        claimable = (
+            select(Job.id)
+            .where(Job.batch == self.batch)
+            .where(is_claimable)
+            .order_by(Job.id)
+            .limit(limit)
+        )
+        with self._session() as session:
+            session.execute(
+                update(Job)
+                # Checked again on the rows themselves, for databases that do not serialize writers
+                .where(Job.id.in_(claimable.scalar_subquery()), is_claimable)
+                .values(
+                    status=IN_FLIGHT,
+                    lease_owner=self.owner,
+                    lease_token=token,
+                    lease_expires=now + timedelta(seconds=self.lease_seconds),
+                    attempts=Job.attempts + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            urls = session.scalars(select(Job.url).where(Job.lease_token == token).order_by(Job.id)).all()
+        return list(urls)
+
+    def heartbeat(self) -> int:
+        """Extend the lease of every job this owner holds; returns how many"""
+        with self._session() as session:
+            return session.execute(
+                update(Job)
+                .where(Job.batch == self.batch, Job.status == IN_FLIGHT, Job.lease_owner == self.owner)
+                .values(lease_expires=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+    def complete(self, url: str, result: Optional[Dict] = None, store: Optional[Callable] = None) -> bool:
+        """
+        Mark a job done; returns False if it was finished elsewhere or its lease went to another owner.
+
+        ``store(session)`` runs in the same transaction once the job is marked,
+        so the collected data is saved only by the lease holder, and if saving
+        fails the job stays unfinished.
+        """
+        return self._finish(url, DONE, result, store)
+
+    def fail(self, url: str, error: str) -> bool:
+        """Mark a job failed; returns False if it was finished elsewhere or its lease went to another owner"""
+        return self._finish(url, FAILED, {"error": error})
+
+    def skip(self, urls: Iterable[str], chunk_size: int = 100) -> int:
+        """Mark pending jobs done without collecting them; returns how many"""
+        urls = list(urls)
+        skipped = 0
+        for i in range(0, len(urls), chunk_size):
+            with self._session() as session:
+                skipped += session.execute(
+                    update(Job)
+                    .where(Job.batch == self.batch, Job.status == PENDING, Job.url.in_(urls[i:i + chunk_size]))
+                    .values(status=DONE, result=json.dumps({"skipped": True}))
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+        return skipped
+
+    def pending_urls(self) -> List[str]:
+        """URLs of the batch's jobs that nobody has claimed yet"""
+        with self._session() as session:
+            return list(session.scalars(
+                select(Job.url).where(Job.batch == self.batch, Job.status == PENDING).order_by(Job.id)
+            ))
+
+    def holds(self, url: str) -> bool:
+        """Check whether this owner still holds the lease on a job"""
+        with self._session() as session:
+            return session.scalar(
+                select(func.count()).select_from(Job).where(
+                    Job.batch == self.batch, Job.url == url, Job.status == IN_FLIGHT, Job.lease_owner == self.owner
+                )
+            ) > 0
+
+    def release(self) -> int:
+        """Hand this owner's unfinished jobs back as pending, e.g. on shutdown"""
+        with self._session() as session:
+            released = session.execute(
+                update(Job)
+                .where(Job.batch == self.batch, Job.status == IN_FLIGHT, Job.lease_owner == self.owner)
+                .values(status=PENDING, lease_owner=None, lease_token=None, lease_expires=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        if released:
+            logger.info(f"Released {released} unfinished jobs in batch '{self.batch}'")
+        return released
+
+    def retry_failed(self) -> int:
+        """Queue the batch's failed jobs again; returns how many"""
+        with self._session() as session:
+            return session.execute(
+                update(Job)
+                .where(Job.batch == self.batch, Job.status == FAILED)
+                .values(status=PENDING)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        with self._session() as session:
+            rows = session.execute(
+                select(Job.status, func.count()).where(Job.batch == self.batch).group_by(Job.status)
+            )
+            counts.update({status: count for status, count in rows})
+        return counts
+
+    def claims(self, batch_size: int = 10, poll_interval: float = 2.0) -> Iterator[str]:
+        """
+        Lazily claim and yield jobs until the batch is drained.
+
+        While other processes still hold live leases the generator waits, so
+        their jobs are picked up here if those processes die.
+        """
+        while True:
+            urls = self.claim(batch_size)
+            if urls:
+                yield from urls
+                continue
+            if not self._others_in_flight():
+                return
+            time.sleep(poll_interval)
+
+    @contextmanager
+    def heartbeating(self):
+        """Keep this owner's leases alive for the duration of the block"""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    logger.error(f"Job lease heartbeat failed: {str(e)}")
+
+        thread = threading.Thread(target=beat, name="job-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+    def _insert(self, urls: List[str], attempts: int = 3) -> int:
+        urls = list(dict.fromkeys(urls))
+        for attempt in range(attempts):
+            try:
+                with self._session() as session:
+                    existing = set(session.scalars(
+                        select(Job.url).where(Job.batch == self.batch, Job.url.in_(urls))
+                    ))
+                    rows = [{"batch": self.batch, "url": url, "status": PENDING, "attempts": 0,
+                             "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+                            for url in urls if url not in existing]
+                    if rows:
+                        session.execute(insert(Job), rows)
+                return len(rows)
+            except IntegrityError:
+                # Another process queued some of these URLs since the lookup
+                if attempt == attempts - 1:
+                    raise
+
+    def _finish(self, url, status, result, store=None):
+        with self._session() as session:
+            finished = session.execute(
+                update(Job)
+                .where(Job.batch == self.batch, Job.url == url,
+                       # A leased job is only finished by the owner still holding it
+                       or_(Job.status == PENDING, and_(Job.status == IN_FLIGHT, Job.lease_owner == self.owner)))
+                .values(status=status, result=json.dumps(result) if result is not None else None,
+                        lease_owner=None, lease_token=None, lease_expires=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if finished and store:
+                store(session)
+        return finished > 0
+
+    def _others_in_flight(self) -> bool:
+        with self._session() as session:
+            return session.scalar(
+                select(func.count()).select_from(Job).where(
+                    Job.batch == self.batch,
+                    Job.status == IN_FLIGHT,
+                    Job.lease_owner != self.owner,
+                    Job.lease_expires >= datetime.utcnow()
+                )
+            ) > 0
+
+    @contextmanager
+    def _session(self):
+        session = self.db_manager.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
@@ -0,0 +1,181 @@
+"""
+Pre-initialized Chrome profiles cloned per browser for fast cold starts.
+"""
+import atexit
+import errno
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+import psutil
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = os.path.join(os.path.expanduser("~"), ".cookie_collector", "profiles")
+
+# Linux ioctl that makes a file share its extents with another (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Files Chrome leaves behind that must not be shared between browsers, plus
+# caches that only make the template bigger and clones slower
+STRIP_NAMES = {
+    "SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile", "LOCK",
+    "Cookies", "Cookies-journal", "Crashpad", "BrowserMetrics", "Cache", "Code Cache",
+    "GPUCache", "GrShaderCache", "ShaderCache", "DawnCache", "Service Worker",
+}
+
+MARKER = "template.json"
+
+
+class ProfileTemplate:
+    """
+    A Chrome user-data-dir built once and cloned for every new browser.
+
+    A fresh profile makes Chrome create its databases, preferences and
+    component state on every launch. The template is built by one real
+    launch, stripped of locks, cookies and caches, and then cloned per
+    browser. Clones use copy-on-write reflinks where the filesystem supports
+    them (btrfs, XFS, APFS) and a plain copy elsewhere; hardlinks are not
+    used because Chrome rewrites its SQLite files in place, which would write
+    through to the template.
+
+    Clones are removed when their browser closes, at exit, and, for clones
+    of processes that died, the next time a template is opened.
+    """
+
+    def __init__(self, name: str = "default", root: str = DEFAULT_ROOT):
+        """
+        Args:
+            name: Template name, so differently configured templates can coexist
+            root: Directory holding templates and clones
+        """
+        self.path = os.path.join(root, name)
+        self.clone_root = os.path.join(root, "clones")
+        self._clones = set()
+        self._lock = threading.Lock()
+        self.stats = {"clones": 0, "reflinked_files": 0, "copied_files": 0}
+        os.makedirs(self.clone_root, exist_ok=True)
+        self._remove_stale_clones()
+        atexit.register(self.release_all)
+
+    @property
+    def ready(self) -> bool:
+        return os.path.exists(os.path.join(self.path, MARKER))
+
+    def ensure(self, build: Callable[[str], None], rebuild: bool = False):
+        """
+        Build the template unless it already exists.
+
+        Args:
+            build: Callable launching and closing a browser on the given
+                user-data-dir, which initializes the profile
+            rebuild: Build again even if a template exists
+        """
+        if self.ready and not rebuild:
+            return
+        staging = f"{self.path}.building-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        started = time.monotonic()
+        build(staging)
+        self._strip(staging)
+        with open(os.path.join(staging, MARKER), "w") as f:
+            json.dump({"created": time.time(), "build_seconds": round(time.monotonic() - started, 2)}, f)
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        try:
+            os.replace(staging, self.path)
+        except OSError:
+            # Another process finished its build first; use that one
+            shutil.rmtree(staging, ignore_errors=True)
+        logger.info(f"Built profile template {self.path} in {time.monotonic() - started:.1f}s")
+
+    def clone(self) -> str:
+        """Copy the template into a new user-data-dir and return its path"""
+        if not self.ready:
+            raise RuntimeError(f"Profile template {self.path} has not been built")
+        target = os.path.join(self.clone_root, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        started = time.monotonic()
+        reflinked, copied = self._clone_tree(self.path, target)
+        with self._lock:
+            self._clones.add(target)
+            self.stats["clones"] += 1
+            self.stats["reflinked_files"] += reflinked
+            self.stats["copied_files"] += copied
+        logger.debug(f"Cloned profile template in {time.monotonic() - started:.3f}s "
+                     f"({reflinked} files reflinked, {copied} copied)")
+        return target
+
+    def release(self, path: str):
+        """Delete a clone once its browser has closed"""
+        with self._lock:
+            self._clones.discard(path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def release_all(self):
+        """Delete every clone made by this process"""
+        with self._lock:
+            clones = list(self._clones)
+        for path in clones:
+            self.release(path)
+
+    def _clone_tree(self, source: str, target: str):
+        if sys.platform == "darwin":
+            # APFS clonefile(2) through cp, falling back to a copy elsewhere
+            result = subprocess.run(["cp", "-cR", source, target], capture_output=True)
+            if result.returncode == 0:
+                return sum(len(files) for _, _, files in os.walk(target)), 0
+            shutil.rmtree(target, ignore_errors=True)
+
+        counts = [0, 0]
+
+        def copy(src, dst):
+            if self._reflink(src, dst):
+                counts[0] += 1
+            else:
+                shutil.copy2(src, dst)
+                counts[1] += 1
+            return dst
+
+        shutil.copytree(source, target, copy_function=copy, symlinks=True)
+        return counts[0], counts[1]
+
+    @staticmethod
+    def _reflink(src: str, dst: str) -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        import fcntl
+
+        try:
+            with open(src, "rb") as source, open(dst, "wb") as target:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            shutil.copystat(src, dst)
+            return True
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.EBADF):
+                logger.debug(f"Reflink of {src} failed: {str(e)}")
+            return False
+
+    @staticmethod
+    def _strip(path: str):
+        for entry in sorted(Path(path).rglob("*"), key=lambda p: len(p.parts), reverse=True):
+            if entry.name in STRIP_NAMES or entry.is_socket():
+                if entry.is_dir() and not entry.is_symlink():
+                    shutil.rmtree(entry, ignore_errors=True)
+                else:
+                    try:
+                        entry.unlink()
+                    except OSError:
+                        pass
+
+    def _remove_stale_clones(self):
+        for name in os.listdir(self.clone_root):
+            pid = name.split("-", 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not psutil.pid_exists(int(pid)):
+                shutil.rmtree(os.path.join(self.clone_root, name), ignore_errors=True)
@@ -0,0 +1,173 @@
+"""
+Event-driven page readiness checks that replace fixed sleeps after navigation.
+"""
+import logging
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Counts in-flight fetch/XHR requests and finished resources; installed
+# before any page script runs. The resource timing buffer holds only 250
+# entries by default, so finished resources are counted by an observer and
+# the buffer is enlarged for the devtools capture that reads it.
+NETWORK_TRACKER_SCRIPT = """
+(() => {
+    if (window.__cookieCollectorInflight !== undefined) return;
+    window.__cookieCollectorInflight = 0;
+    window.__cookieCollectorResources = 0;
+    try {
+        performance.setResourceTimingBufferSize(10000);
+        new PerformanceObserver((list) => {
+            window.__cookieCollectorResources += list.getEntries().length;
+        }).observe({type: 'resource', buffered: true});
+    } catch (e) {
+        window.__cookieCollectorResources = undefined;
+    }
+    const start = () => { window.__cookieCollectorInflight++; };
+    const end = () => { window.__cookieCollectorInflight = Math.max(0, window.__cookieCollectorInflight - 1); };
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function() {
+            start();
+            return originalFetch.apply(this, arguments).finally(end);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        start();
+        this.addEventListener('loadend', end, {once: true});
+        return originalSend.apply(this, arguments);
+    };
+})();
+"""
+
+# Set on a document right before navigating away from it with a script, so
+# polls can tell the new page has not replaced it yet
+STALE_DOCUMENT_MARKER = "window.__cookieCollectorStale = true;"
+
+# Reads everything needed for one readiness poll in a single round trip
+_POLL_SCRIPT = """
+return {
+    stale: window.__cookieCollectorStale === true,
+    readyState: document.readyState,
+    resources: window.__cookieCollectorResources === undefined
+        ? performance.getEntriesByType('resource').length : window.__cookieCollectorResources,
+    inflight: window.__cookieCollectorInflight === undefined ? null : window.__cookieCollectorInflight
+};
+"""
+
+
+class PageReadiness:
+    """
+    Completion criteria for deciding when a page has settled.
+
+    ``document.readyState`` must reach "complete" first (unless disabled),
+    then the page is released as soon as one enabled quiet criterion holds:
+
+    - network idle: no fetch/XHR in flight and no newly finished resource
+      for ``network_idle_ms``
+    - cookie stability: no new cookies in the jar for ``cookie_stable_ms``
+
+    ``max_wait`` is a hard upper bound. Set a quiet criterion to None to
+    disable it.
+    """
+
+    def __init__(self, ready_state: bool = True, network_idle_ms: Optional[int] = 500,
+                 cookie_stable_ms: Optional[int] = 1000, max_wait: float = 10.0,
+                 min_wait: float = 0.0, poll_interval: float = 0.1):
+        self.ready_state = ready_state
+        self.network_idle_ms = network_idle_ms
+        self.cookie_stable_ms = cookie_stable_ms
+        self.max_wait = max_wait
+        self.min_wait = min_wait
+        self.poll_interval = poll_interval
+
+    def tracker(self) -> "ReadinessTracker":
+        """Start tracking a page that has just been navigated to"""
+        return ReadinessTracker(self)
+
+    def wait(self, driver) -> Dict:
+        """
+        Block until the page in ``driver`` is ready or ``max_wait`` has passed.
+
+        Returns:
+            Dictionary with the criterion that fired ("ready_state",
+            "network_idle", "cookie_stable" or "timeout") and the elapsed seconds
+        """
+        tracker = self.tracker()
+        while tracker.check(driver) is None:
+            time.sleep(self.poll_interval)
+        return tracker.result()
+
+
+class ReadinessTracker:
+    """Incremental readiness state for one page, advanced by calling ``check``"""
+
+    def __init__(self, readiness: PageReadiness):
+        self.readiness = readiness
+        self.started = time.monotonic()
+        self.criterion = None
+        self.elapsed = None
+        # Latest cookies seen while polling, usable as partial results
+        self.last_cookies = None
+        self._resources = None
+        self._network_changed = self.started
+        self._cookie_keys = None
+        self._cookies_changed = self.started
+
+    def check(self, driver) -> Optional[str]:
+        """Poll the page once; returns the criterion that fired, or None to keep waiting"""
+        if self.criterion:
+            return self.criterion
+
+        now = time.monotonic()
+        elapsed = now - self.started
+        if elapsed >= self.readiness.max_wait:
+            return self._fire("timeout", elapsed)
+
+        try:
+            state = driver.execute_script(_POLL_SCRIPT)
+        except Exception as e:
+            # Pages that are still navigating can reject scripts; poll again later
+            logger.debug(f"Readiness poll failed: {str(e)}")
+            return None
+        if state["stale"]:
+            # The navigation has not committed yet
+            return None
+
+        if state["resources"] != self._resources or state["inflight"]:
+            self._resources = state["resources"]
+            self._network_changed = now
+
+        if self.readiness.cookie_stable_ms is not None:
+            self.last_cookies = driver.get_cookies()
+            cookie_keys = {(c.get("name"), c.get("domain"), c.get("path")) for c in self.last_cookies}
+            if cookie_keys != self._cookie_keys:
+                self._cookie_keys = cookie_keys
+                self._cookies_changed = now
+
+        if elapsed < self.readiness.min_wait:
+            return None
+        if self.readiness.ready_state and state["readyState"] != "complete":
+            return None
+
+        network_idle_ms = self.readiness.network_idle_ms
+        cookie_stable_ms = self.readiness.cookie_stable_ms
+        if network_idle_ms is None and cookie_stable_ms is None:
+            return self._fire("ready_state", elapsed)
+        if network_idle_ms is not None and (now - self._network_changed) * 1000 >= network_idle_ms:
+            return self._fire("network_idle", elapsed)
+        if cookie_stable_ms is not None and (now - self._cookies_changed) * 1000 >= cookie_stable_ms:
+            return self._fire("cookie_stable", elapsed)
+        return None
+
+    def result(self) -> Dict:
+        """Criterion that fired and how long the page took"""
+        return {"criterion": self.criterion, "elapsed": self.elapsed}
+
+    def _fire(self, criterion, elapsed):
+        self.criterion = criterion
+        self.elapsed = round(elapsed, 3)
+        logger.info(f"Page ready after {self.elapsed:.2f}s ({criterion})")
+        return criterion
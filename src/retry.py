@@ -0,0 +1,174 @@
+"""
+Retry policy with exponential backoff and a per-domain circuit breaker.
+"""
+import logging
+import random
+import socket
+import threading
+import time
+from typing import Dict, Optional
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchWindowException,
+    TimeoutException,
+)
+from .watchdog import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Error kinds returned by classify_error
+TIMEOUT = "timeout"
+CRASH = "crash"
+DNS = "dns"
+CIRCUIT_OPEN = "circuit_open"
+OTHER = "other"
+
+_DNS_MARKERS = (
+    "err_name_not_resolved",
+    "err_name_resolution_failed",
+    "name or service not known",
+    "nodename nor servname",
+    "getaddrinfo failed",
+    "temporary failure in name resolution",
+    "failed to resolve",
+)
+
+_CRASH_MARKERS = (
+    "session deleted",
+    "invalid session id",
+    "chrome not reachable",
+    "disconnected: not connected to devtools",
+    "tab crashed",
+    "target window already closed",
+    "connection refused",
+    "max retries exceeded with url: /session",
+)
+
+_TIMEOUT_MARKERS = (
+    "timed out",
+    "timeout",
+    "err_timed_out",
+    "err_connection_timed_out",
+)
+
+
+class CircuitOpenError(Exception):
+    """A URL was skipped because its domain keeps failing"""
+
+
+def classify_error(error: Exception) -> str:
+    """Sort a collection error into TIMEOUT, CRASH, DNS, CIRCUIT_OPEN or OTHER"""
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OPEN
+    message = str(error).lower()
+    # DNS first: Chrome reports failed lookups as generic WebDriver errors
+    if isinstance(error, socket.gaierror) or any(marker in message for marker in _DNS_MARKERS):
+        return DNS
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException, ConnectionError)):
+        return CRASH
+    if any(marker in message for marker in _CRASH_MARKERS):
+        return CRASH
+    if isinstance(error, (TimeoutException, TimeoutError, DeadlineExceeded, socket.timeout)):
+        return TIMEOUT
+    if any(marker in message for marker in _TIMEOUT_MARKERS):
+        return TIMEOUT
+    return OTHER
+
+
+class RetryPolicy:
+    """
+    Decide whether and when to retry a failed URL.
+
+    Each error kind has its own attempt budget: crashes are usually the
+    browser's fault and worth retrying on a fresh one, timeouts are often
+    transient, while DNS failures and other errors rarely change on retry.
+    Delays grow exponentially with "equal jitter", so workers that failed
+    together do not retry in lockstep.
+    """
+
+    DEFAULT_ATTEMPTS = {TIMEOUT: 2, CRASH: 3, DNS: 1, CIRCUIT_OPEN: 1, OTHER: 1}
+
+    def __init__(self, attempts: Optional[Dict[str, int]] = None, base_delay: float = 1.0,
+                 max_delay: float = 30.0):
+        """
+        Args:
+            attempts: Maximum attempts per error kind, merged over DEFAULT_ATTEMPTS
+            base_delay: Delay before the first retry in seconds
+            max_delay: Upper bound for any delay in seconds
+        """
+        self.attempts = dict(self.DEFAULT_ATTEMPTS, **(attempts or {}))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> "RetryPolicy":
+        """Build the policy from ``settings["retry"]``"""
+        return cls(**settings.get("retry", {}))
+
+    def next_delay(self, kind: str, attempt: int) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up"""
+        if attempt >= self.attempts.get(kind, 1):
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """
+    Stop sending work to domains that keep failing.
+
+    After ``failure_threshold`` failures in a row a domain's circuit opens and
+    its URLs fail fast for ``cooldown`` seconds. After that one probe is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 300):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing = set()
+        self._lock = threading.Lock()
+
+    def allow(self, domain: str) -> bool:
+        """Check whether work for a domain may run now"""
+        with self._lock:
+            opened_at = self._opened_at.get(domain)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.cooldown or domain in self._probing:
+                return False
+            self._probing.add(domain)
+            return True
+
+    def record_success(self, domain: str):
+        with self._lock:
+            self._failures.pop(domain, None)
+            self._probing.discard(domain)
+            if self._opened_at.pop(domain, None) is not None:
+                logger.info(f"Circuit for {domain} closed again")
+
+    def record_failure(self, domain: str):
+        with self._lock:
+            self._failures[domain] = self._failures.get(domain, 0) + 1
+            probe_failed = domain in self._probing
+            self._probing.discard(domain)
+            if probe_failed or self._failures[domain] >= self.failure_threshold:
+                if domain not in self._opened_at or probe_failed:
+                    logger.warning(f"Circuit for {domain} opened after {self._failures[domain]} failures")
+                self._opened_at[domain] = time.monotonic()
+
+    def release_probe(self, domain: str):
+        """Let another probe through after one ended without a verdict on the host"""
+        with self._lock:
+            self._probing.discard(domain)
+
+    def is_open(self, domain: str) -> bool:
+        """Check whether a domain's circuit is open, without claiming a probe"""
+        with self._lock:
+            return domain in self._opened_at
+
+    def open_domains(self):
+        """Domains whose circuit is currently open"""
+        with self._lock:
+            return sorted(self._opened_at)
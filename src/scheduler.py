@@ -0,0 +1,193 @@
+"""
+Long-running collection scheduled by when stored cookies expire.
+"""
+from datetime import timezone
+from fnmatch import fnmatch
+from typing import Dict, Iterable, List, Optional, Tuple
+from .gui.controller import BrowserController
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+
+
+class ExpiryScheduler:
+    """
+    Recollect each site shortly before its important cookies expire.
+
+    Due times are kept in a heap, so the cookie table is only read once at
+    startup. After that a site's next due time comes from the cookies its
+    last collection returned. A site is due ``lead_time_hours`` before its
+    earliest important cookie expires, but never sooner than
+    ``min_interval_hours`` or later than ``max_interval_hours`` after its last
+    collection. Sites without expiring cookies come back after the maximum
+    interval. Rounds never use more than ``concurrency`` browsers, so the
+    budget goes to sites whose data is about to go stale.
+    """
+
+    def __init__(self, controller: BrowserController, urls: Iterable[str], lead_time_hours: float = 1.0,
+                 min_interval_hours: float = 1.0, max_interval_hours: float = 168.0,
+                 concurrency: int = 2, important_cookies: Optional[List[str]] = None):
+        """
+        Args:
+            controller: Controller that collects and saves the cookies
+            urls: Sites to keep fresh
+            lead_time_hours: How long before an expiry a site is collected
+            min_interval_hours: Shortest time between two collections of a site
+            max_interval_hours: Longest time between two collections of a site
+            concurrency: Maximum number of browsers collecting at once
+            important_cookies: Cookie name patterns (``fnmatch`` syntax) whose
+                expiry counts; by default every persistent cookie does
+        """
+        self.controller = controller
+        self.urls = []
+        for url in urls:
+            try:
+                self.urls.append(controller._normalize_url(url))
+            except ValueError as e:
+                logger.error(f"Not scheduling {url!r}: {str(e)}")
+        self.urls = list(dict.fromkeys(self.urls))
+        self.lead_time = lead_time_hours * HOUR
+        self.min_interval = min_interval_hours * HOUR
+        self.max_interval = max_interval_hours * HOUR
+        self.concurrency = max(1, concurrency)
+        self.important_cookies = list(important_cookies or [])
+        self._heap: List[Tuple[float, int, str]] = []
+        self._order = itertools.count()
+        self._stop = threading.Event()
+        self.stats = {"rounds": 0, "collected": 0, "failed": 0}
+
+    @classmethod
+    def from_settings(cls, controller: BrowserController, settings: Dict) -> "ExpiryScheduler":
+        """Build the scheduler for ``settings["urls"]`` from ``settings["schedule"]``"""
+        return cls(controller, settings.get("urls", []), **settings.get("schedule", {}))
+
+    def load(self):
+        """Queue every site once, from the stored cookies and collection times"""
+        expiries = self.controller.db_manager.get_cookie_expiries()
+        collected_at = self.controller.db_manager.get_collection_times()
+        self._heap = []
+        for url in self.urls:
+            last = collected_at.get(url)
+            if last is None:
+                due = time.time()
+            else:
+                # Websites store UTC; cookie expiries are local time like the browser's timestamps
+                last = last.replace(tzinfo=timezone.utc).timestamp()
+                due = self.due_time(last, [(name, expires.timestamp()) for name, expires in expiries.get(url, [])])
+            self._push(url, due)
+        logger.info(f"Scheduled {len(self._heap)} sites, next one due in {self.seconds_until_due():.0f}s")
+
+    def due_time(self, last_collected: float, expiries: List[Tuple[str, float]]) -> float:
+        """
+        When a site collected at ``last_collected`` is due again.
+
+        Args:
+            last_collected: Timestamp of the last collection
+            expiries: ``(name, expiry timestamp)`` of its persistent cookies
+        """
+        upcoming = [expiry for name, expiry in expiries
+                    if expiry > last_collected and self._is_important(name)]
+        due = min(upcoming) - self.lead_time if upcoming else last_collected + self.max_interval
+        return min(max(due, last_collected + self.min_interval), last_collected + self.max_interval)
+
+    def seconds_until_due(self) -> float:
+        """Seconds until the next site is due (0 if one is overdue)"""
+        if not self._heap:
+            return float("inf")
+        return max(0.0, self._heap[0][0] - time.time())
+
+    def next_round(self) -> List[str]:
+        """Take the sites that are due now, most overdue first"""
+        now = time.time()
+        due = []
+        # A few URLs per browser, so sites that fall due meanwhile wait for one short round at most
+        while self._heap and self._heap[0][0] <= now and len(due) < self.concurrency * 5:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def run_round(self, urls: List[str]):
+        """Collect the given sites and queue them again"""
+        self.stats["rounds"] += 1
+        success, results = self.controller.collect_cookies(urls)
+        now = time.time()
+        if not success:
+            logger.error(f"Scheduled round failed, retrying its sites later: {results}")
+            results = {}
+
+        for url in urls:
+            result = results.get(url)
+            if result and result["success"]:
+                self.stats["collected"] += 1
+                expiries = [(cookie.get("name"), cookie["expiry"])
+                            for cookie in result["cookies"] if cookie.get("expiry")]
+                self._push(url, self.due_time(now, expiries))
+            else:
+                self.stats["failed"] += 1
+                self._push(url, now + self.min_interval)
+
+    def run(self, settings: Dict):
+        """
+        Collect due sites until ``stop`` is called.
+
+        ``settings`` are the regular collection settings; the scheduler caps
+        the workers at its concurrency and always saves, since stored cookies
+        are what it schedules by.
+        """
+        success, message = self.controller.initialize_browser({
+            **settings,
+            "workers": self.concurrency,
+            "save_cookies": True,
+            # The schedule decides when a site is stale, not the freshness windows
+            "force_refresh": True,
+        })
+        if not success:
+            raise RuntimeError(message)
+
+        self._stop.clear()
+        self.load()
+        while not self._stop.is_set():
+            urls = self.next_round()
+            if urls:
+                logger.info(f"Collecting {len(urls)} sites due for refresh")
+                self.run_round(urls)
+                continue
+            # Wake up at least once a minute, so clock jumps do not stall the schedule
+            self._stop.wait(min(self.seconds_until_due(), 60))
+        logger.info(f"Scheduler stopped: {self.stats}")
+
+    def stop(self):
+        """Stop after the current round"""
+        self._stop.set()
+
+    def _push(self, url: str, due: float):
+        heapq.heappush(self._heap, (due, next(self._order), url))
+
+    def _is_important(self, name: Optional[str]) -> bool:
+        if not self.important_cookies:
+            return True
+        return any(fnmatch(name or "", pattern) for pattern in self.important_cookies)
+
+
+def main():
+    with open("data/settings.json", "r") as f:
+        settings = json.load(f)
+
+    controller = BrowserController()
+    scheduler = ExpiryScheduler.from_settings(controller, settings)
+    try:
+        scheduler.run(settings)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    finally:
+        controller.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Memory supervision for browser process trees.
+"""
+import atexit
+import logging
+import threading
+import weakref
+from typing import Dict, List, Optional
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Every live supervisor, reaped once at exit without keeping them alive
+_supervisors = weakref.WeakSet()
+
+
+def process_tree(pids: List[int]) -> List[psutil.Process]:
+    """The given processes plus all of their descendants that are still running"""
+    processes = []
+    for pid in pids:
+        try:
+            parent = psutil.Process(pid)
+            processes += [parent] + parent.children(recursive=True)
+        except psutil.NoSuchProcess:
+            continue
+    return processes
+
+
+class BrowserSupervisor:
+    """
+    Watch the memory of every browser's whole process tree.
+
+    A browser is the WebDriver process plus Chrome's browser, GPU and
+    renderer processes below it, so resident memory is summed over the tree.
+    Every process ever seen in a tree is remembered, which lets
+    ``reap_orphans`` kill leftovers that outlived their browser, such as
+    renderers of a crashed Chrome, without touching unrelated Chrome windows.
+    """
+
+    def __init__(self, max_rss_mb: Optional[float] = None):
+        """
+        Args:
+            max_rss_mb: Recycle a browser once its tree uses more resident
+                memory than this (None disables the check)
+        """
+        self.max_rss_mb = max_rss_mb
+        self._roots: Dict[int, List[int]] = {}
+        # (pid, create_time) of every process seen, so reused PIDs are never killed
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._stats = {"peak_rss_mb": 0.0, "orphans_reaped": 0}
+        _supervisors.add(self)
+
+    def register(self, browser):
+        """Start tracking a newly created browser"""
+        with self._lock:
+            self._roots[id(browser)] = browser.process_ids()
+        self._remember(process_tree(browser.process_ids()))
+
+    def unregister(self, browser):
+        """Stop tracking a browser that is about to be closed"""
+        with self._lock:
+            roots = self._roots.pop(id(browser), [])
+        # Whatever survives the close is an orphan for reap_orphans
+        self._remember(process_tree(roots))
+
+    def rss_mb(self, browser) -> float:
+        """Resident memory of a browser's process tree in megabytes"""
+        with self._lock:
+            roots = self._roots.get(id(browser), [])
+        processes = process_tree(roots)
+        self._remember(processes)
+
+        rss_mb = sum(self._safe_rss(process) for process in processes) / (1024 * 1024)
+        with self._lock:
+            self._stats["peak_rss_mb"] = max(self._stats["peak_rss_mb"], round(rss_mb, 1))
+        return rss_mb
+
+    def over_limit(self, browser) -> bool:
+        """Check whether a browser has outgrown ``max_rss_mb``"""
+        if self.max_rss_mb is None:
+            return False
+        rss_mb = self.rss_mb(browser)
+        if rss_mb > self.max_rss_mb:
+            logger.info(f"Browser uses {rss_mb:.0f} MB, above the {self.max_rss_mb} MB limit")
+            return True
+        return False
+
+    def reap_orphans(self) -> int:
+        """Kill processes from earlier browser trees that are still running; returns how many"""
+        with self._lock:
+            live_roots = [pid for roots in self._roots.values() for pid in roots]
+            seen = set(self._seen)
+        live = {(p.pid, self._create_time(p)) for p in process_tree(live_roots)}
+
+        reaped = []
+        for pid, create_time in seen - live:
+            try:
+                process = psutil.Process(pid)
+                if process.create_time() != create_time:
+                    continue  # The PID now belongs to another program
+                process.kill()
+                reaped.append(process)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        psutil.wait_procs(reaped, timeout=5)
+
+        with self._lock:
+            self._seen = {key for key in self._seen if key in live}
+            self._stats["orphans_reaped"] += len(reaped)
+        if reaped:
+            logger.info(f"Killed {len(reaped)} orphaned browser processes")
+        return len(reaped)
+
+    def stats(self) -> Dict:
+        """Peak memory and reaped orphans, plus current memory per tracked browser"""
+        with self._lock:
+            trees = list(self._roots.values())
+            stats = dict(self._stats)
+        stats["current_rss_mb"] = [
+            round(sum(self._safe_rss(p) for p in process_tree(roots)) / (1024 * 1024), 1)
+            for roots in trees
+        ]
+        return stats
+
+    def _remember(self, processes):
+        keys = {(p.pid, self._create_time(p)) for p in processes}
+        with self._lock:
+            self._seen |= {key for key in keys if key[1] is not None}
+
+    @staticmethod
+    def _create_time(process) -> Optional[float]:
+        try:
+            return process.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+    @staticmethod
+    def _safe_rss(process) -> int:
+        try:
+            return process.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0
+
+
+@atexit.register
+def _reap_all_orphans():
+    """Kill leftover browser processes of every supervisor when the interpreter exits"""
+    for supervisor in list(_supervisors):
+        supervisor.reap_orphans()
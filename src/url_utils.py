@@ -0,0 +1,127 @@
+"""
+URL helpers shared by the collection pipeline.
+"""
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import ipaddress
+import re
+
+# Public suffixes with more than one label that are common in our URL lists.
+# Everything else is treated as a single-label suffix (".com", ".de", ...).
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "net.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "co.jp", "ne.jp", "or.jp", "co.kr", "or.kr",
+    "com.br", "net.br", "org.br", "com.cn", "net.cn", "org.cn",
+    "co.in", "net.in", "org.in", "co.za", "org.za", "com.mx", "com.tr",
+    "com.ar", "com.sg", "com.hk", "com.tw", "co.il", "co.id", "com.my",
+    "github.io", "gitlab.io", "blogspot.com", "herokuapp.com", "netlify.app",
+    "vercel.app", "pages.dev", "azurewebsites.net", "cloudfront.net", "appspot.com",
+}
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {
+    "gclid", "gclsrc", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid",
+    "twclid", "ttclid", "li_fat_id", "igshid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "_hsenc", "_hsmi", "mkt_tok", "oly_anon_id", "oly_enc_id", "vero_id", "ref_src",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# A leading scheme; "://" elsewhere, e.g. in "example.com/login?next=https://x.com", does not count
+_SCHEME = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://")
+
+
+def hostname(url_or_host: str) -> str:
+    """Lower-case host name of a URL or bare host, without port or trailing dot"""
+    if not _SCHEME.match(url_or_host):
+        url_or_host = "//" + url_or_host
+    host = urlsplit(url_or_host).hostname or ""
+    return host.rstrip(".").lower()
+
+
+def registrable_domain(url_or_host: str) -> str:
+    """
+    Registrable domain ("eTLD+1") of a URL or host, e.g. "www.bbc.co.uk" -> "bbc.co.uk".
+
+    IP addresses and single-label hosts such as "localhost" are returned unchanged.
+    """
+    host = hostname(url_or_host).lstrip(".")
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a URL, so spellings of the same page compare equal.
+
+    Adds https:// when the scheme is missing, lower-cases scheme and host,
+    drops default ports, fragments, tracking parameters and trailing slashes.
+    "example.com/", "HTTPS://Example.com:443" and "https://example.com#top"
+    all become "https://example.com".
+
+    Raises:
+        ValueError: If the URL is empty, has no host or cannot be parsed,
+            such as "example.com:abc/x" or "http://[::1"
+    """
+    original = url
+    url = url.strip()
+    if not url:
+        raise ValueError("Invalid URL: empty")
+    if not _SCHEME.match(url):
+        url = "https://" + url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError as e:
+        raise ValueError(f"Invalid URL {original!r}: {str(e)}") from None
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or "").rstrip(".")
+    if not host:
+        raise ValueError(f"Invalid URL {original!r}: no host")
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    if "@" in parts.netloc:
+        netloc = parts.netloc.rsplit("@", 1)[0] + "@" + netloc
+
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [(key, value) for key, value in params
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)]
+    # Re-encode only when something was dropped, so other queries keep their exact spelling
+    query = parts.query if len(kept) == len(params) else urlencode(kept)
+    path = parts.path.rstrip("/") or ("/" if query else "")
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def dedupe_urls(urls: Iterable[str]) -> Tuple[List[str], int]:
+    """
+    Canonicalize URLs and drop repeats, keeping first-seen order; returns the
+    URLs and how many were dropped. Raises ValueError for an invalid URL.
+    """
+    unique = {}
+    total = 0
+    for url in urls:
+        total += 1
+        unique.setdefault(canonicalize_url(url), None)
+    return list(unique), total - len(unique)
+
+
+def group_by_domain(urls: Iterable[str]) -> Dict[str, List[str]]:
+    """Group URLs by registrable domain, in order of each domain's first URL"""
+    groups: Dict[str, List[str]] = {}
+    for url in urls:
+        groups.setdefault(registrable_domain(url), []).append(url)
+    return groups
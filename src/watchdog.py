@@ -0,0 +1,97 @@
+"""
+Hard per-URL deadlines enforced by killing stuck browsers.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """A page ran past its hard deadline and its browser was killed"""
+
+    def __init__(self, message: str, partial_cookies: Optional[List[Dict]] = None):
+        super().__init__(message)
+        # Cookies seen before the kill, if any were read
+        self.partial_cookies = partial_cookies or []
+
+
+def kill_process_tree(pid: int) -> int:
+    """Kill a process and all of its descendants; returns how many were killed"""
+    try:
+        parent = psutil.Process(pid)
+        processes = parent.children(recursive=True) + [parent]
+    except psutil.NoSuchProcess:
+        return 0
+
+    killed = 0
+    for process in processes:
+        try:
+            process.kill()
+            killed += 1
+        except psutil.NoSuchProcess:
+            continue
+        except psutil.AccessDenied as e:
+            logger.warning(f"Could not kill process {process.pid}: {str(e)}")
+    psutil.wait_procs(processes, timeout=5)
+    return killed
+
+
+class Watchdog:
+    """
+    Run a callback for work that is still going when its deadline passes.
+
+    Deadlines are armed before a blocking call and disarmed after it; a
+    single background thread checks them, so arming is cheap enough for
+    every URL.
+    """
+
+    def __init__(self, poll_interval: float = 0.5):
+        self.poll_interval = poll_interval
+        self._deadlines = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.expired_count = 0
+
+    def arm(self, seconds: float, on_expire: Callable, label: str = "") -> int:
+        """Call ``on_expire()`` if not disarmed within ``seconds``; returns a token"""
+        token = next(self._tokens)
+        with self._lock:
+            self._deadlines[token] = (time.monotonic() + seconds, on_expire, label)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="deadline-watchdog", daemon=True)
+                self._thread.start()
+        return token
+
+    def touch(self, token: int, seconds: float):
+        """Push an armed deadline ``seconds`` into the future, e.g. after progress"""
+        with self._lock:
+            if token in self._deadlines:
+                _, on_expire, label = self._deadlines[token]
+                self._deadlines[token] = (time.monotonic() + seconds, on_expire, label)
+
+    def disarm(self, token: int) -> bool:
+        """Cancel a deadline; returns False if it had already expired"""
+        with self._lock:
+            return self._deadlines.pop(token, None) is not None
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            now = time.monotonic()
+            with self._lock:
+                expired = [token for token, (deadline, _, _) in self._deadlines.items() if deadline <= now]
+                callbacks = [self._deadlines.pop(token) for token in expired]
+                self.expired_count += len(callbacks)
+
+            for _, on_expire, label in callbacks:
+                logger.warning(f"Deadline exceeded for {label or 'a task'}, aborting it")
+                try:
+                    on_expire()
+                except Exception as e:
+                    logger.error(f"Watchdog callback failed: {str(e)}")
@@ -0,0 +1,88 @@
+"""
+One-pass capture of a page's localStorage, sessionStorage and IndexedDB names.
+"""
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Reads both storage areas and lists the IndexedDB databases in a single
+# round trip. Values are cut to the limit in the page, so huge values never
+# cross the WebDriver connection.
+_CAPTURE_SCRIPT = """
+const [maxValueLength, maxItems, done] = arguments;
+const read = (areaName) => {
+    const items = [];
+    let area;
+    try { area = window[areaName]; } catch (e) { return items; }
+    if (!area) return items;
+    for (let i = 0; i < area.length && items.length < maxItems; i++) {
+        const key = area.key(i);
+        const value = area.getItem(key) || '';
+        items.push({
+            key: key,
+            value: value.length > maxValueLength ? value.slice(0, maxValueLength) : value,
+            size: value.length,
+            truncated: value.length > maxValueLength,
+        });
+    }
+    return items;
+};
+const result = {origin: location.origin, local: read('localStorage'), session: read('sessionStorage')};
+let databases;
+try {
+    databases = indexedDB.databases ? indexedDB.databases() : Promise.resolve([]);
+} catch (e) {
+    databases = Promise.resolve([]);
+}
+databases
+    .then((list) => list.map((db) => ({name: db.name, version: db.version})))
+    .catch(() => [])
+    .then((list) => { result.indexeddb = list.slice(0, maxItems); done(result); });
+"""
+
+
+class WebStorageCapture:
+    """
+    Capture the web storage of the page a browser is showing.
+
+    Only the top-level document's origin is read; storage of third-party
+    frames stays out of reach of page scripts. IndexedDB is captured by
+    database name and version, not contents.
+    """
+
+    def __init__(self, max_value_length: int = 4096, max_items: int = 500):
+        """
+        Args:
+            max_value_length: Characters kept per value; longer values are
+                truncated and flagged, keeping their full size
+            max_items: Entries kept per storage area
+        """
+        self.max_value_length = max_value_length
+        self.max_items = max_items
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> Optional["WebStorageCapture"]:
+        """
+        Capture for ``settings["web_storage"]``: True, or a dictionary with
+        "max_value_length" and "max_items"; None when unset.
+        """
+        config = settings.get("web_storage")
+        if not config:
+            return None
+        return cls(**(config if isinstance(config, dict) else {}))
+
+    def capture(self, driver) -> Optional[Dict]:
+        """
+        Read the current page's storage in one script call.
+
+        Returns:
+            Dictionary with "origin", "local" and "session" (lists of
+            "key", "value", "size", "truncated") and "indexeddb" (lists of
+            "name", "version"), or None if the page could not be read
+        """
+        try:
+            return driver.execute_async_script(_CAPTURE_SCRIPT, self.max_value_length, self.max_items)
+        except Exception as e:
+            logger.warning(f"Could not capture web storage: {str(e)}")
+            return None
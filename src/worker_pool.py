@@ -0,0 +1,290 @@
+"""
+Thread-based worker pool that feeds URLs to browser workers from a shared queue.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling a worker that no more URLs will arrive
+_STOP = object()
+
+
+class WorkerPool:
+    """
+    Run a task over many URLs with a fixed number of browser workers.
+
+    Every worker owns one browser for its whole lifetime and pulls URLs from a
+    shared, bounded work queue, so URLs can finish in any order. Progress and
+    results are handed back to the thread iterating ``run``, which keeps GUI
+    callbacks and database writes on a single thread.
+    """
+
+    def __init__(self, acquire: Callable, release: Callable, num_workers: int = 1,
+                 renew: Optional[Callable] = None, retry: Optional[Callable] = None,
+                 host_scheduler=None):
+        """
+        Args:
+            acquire: Callable returning a ready browser for a worker
+            release: Callable taking back a browser when its worker finishes
+            num_workers: Number of browsers to run in parallel
+            renew: Optional callable run before every URL that returns the
+                browser to use, so a worn-out browser can be swapped mid-run
+            retry: Optional callable ``retry(browser, url, error, attempt)``
+                returning the seconds to wait before trying a failed URL
+                again, or None to report the error
+            host_scheduler: Optional ``HostScheduler`` used as the work queue,
+                so URLs are handed out under per-host politeness limits; it
+                must be fresh for every ``run``
+        """
+        self.acquire = acquire
+        self.release = release
+        self.renew = renew
+        self.retry = retry
+        self.host_scheduler = host_scheduler
+        self.num_workers = max(1, int(num_workers))
+
+    def run(self, urls: Iterable[str], task: Callable, stream: bool = False,
+            chunk_size: int = 20) -> Iterator[Tuple[str, str, object]]:
+        """
+        Process URLs with the worker pool.
+
+        Args:
+            urls: URLs to process, consumed lazily
+            task: Callable ``task(browser, url, progress)`` returning the result
+                for a URL. ``progress(fraction, message)`` reports progress.
+            stream: Hand each worker a lazy stream of URLs instead, for tasks
+                that keep several URLs in flight on one browser. The task is
+                called as ``task(browser, url_source, progress)`` and yields
+                ``(url, result)`` pairs, with an exception as the result for a
+                failed URL; ``progress(url, fraction, message)`` reports progress.
+            chunk_size: In stream mode, URLs per task call; ``renew`` runs
+                between calls
+
+        Yields:
+            ``(event, url, payload)`` tuples. ``event`` is "progress" with a
+            ``(fraction, message)`` payload, "done" with the task result or
+            "error" with the raised exception.
+        """
+        work_queue = self.host_scheduler or queue.Queue(maxsize=self.num_workers * 2)
+        events = queue.Queue()
+        stop = threading.Event()
+        state = {"alive": self.num_workers}
+        state_lock = threading.Lock()
+
+        def finished(url):
+            """Free the URL's host slot once it has a final result"""
+            if self.host_scheduler:
+                self.host_scheduler.done(url)
+
+        def workers_alive():
+            with state_lock:
+                return state["alive"]
+
+        def put_work(item):
+            """Queue an item, giving up if every worker has exited"""
+            while not stop.is_set():
+                if not workers_alive():
+                    return False
+                try:
+                    work_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def feed():
+            try:
+                for url in urls:
+                    if stop.is_set():
+                        return
+                    if not put_work(url):
+                        events.put(("error", url, RuntimeError("No browser workers available")))
+            except Exception as e:
+                logger.error(f"Failed to read URLs: {str(e)}")
+            finally:
+                for _ in range(self.num_workers):
+                    if not put_work(_STOP):
+                        break
+
+        def work(worker_id):
+            try:
+                browser = self.acquire()
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to start a browser: {str(e)}")
+                with state_lock:
+                    state["alive"] -= 1
+                return
+
+            try:
+                if stream:
+                    browser = work_streams(worker_id, browser)
+                    return
+
+                while not stop.is_set():
+                    try:
+                        url = work_queue.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if url is _STOP:
+                        break
+
+                    def progress(fraction, message, url=url):
+                        events.put(("progress", url, (fraction, message)))
+
+                    attempt = 1
+                    while True:
+                        if self.renew:
+                            try:
+                                browser = self.renew(browser)
+                            except Exception as e:
+                                logger.error(f"Worker {worker_id} failed to replace its browser: {str(e)}")
+                                events.put(("error", url, e))
+                                finished(url)
+                                browser = None
+                                return
+                        try:
+                            events.put(("done", url, task(browser, url, progress)))
+                            break
+                        except Exception as e:
+                            delay = self.retry(browser, url, e, attempt) if self.retry else None
+                            if delay is None or stop.wait(delay):
+                                events.put(("error", url, e))
+                                break
+                            attempt += 1
+                    finished(url)
+            finally:
+                try:
+                    if browser is not None:
+                        self.release(browser)
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} failed to release its browser: {str(e)}")
+                with state_lock:
+                    state["alive"] -= 1
+
+        def work_streams(worker_id, browser):
+            """Stream-mode worker loop; returns the browser to release"""
+            exhausted = threading.Event()
+            # Failed URLs waiting for another attempt: [due time, url]
+            retries = []
+            attempts = {}
+            # URLs handed to the task that have no result yet
+            in_flight = []
+
+            def url_source():
+                for _ in range(chunk_size):
+                    waited = False
+                    while True:
+                        if stop.is_set():
+                            exhausted.set()
+                            return
+                        if retries and retries[0][0] <= time.monotonic():
+                            url = retries.pop(0)[1]
+                            break
+                        if waited and in_flight:
+                            # The next URL may wait for a host slot held by one of this
+                            # task's own pages, which nobody polls while we block here;
+                            # end the chunk so they finish, the next chunk takes over
+                            return
+                        if exhausted.is_set():
+                            if not retries:
+                                return
+                            time.sleep(0.1)
+                            waited = True
+                            continue
+                        try:
+                            url = work_queue.get(timeout=0.1)
+                        except queue.Empty:
+                            waited = True
+                            continue
+                        if url is _STOP:
+                            exhausted.set()
+                            continue
+                        break
+                    in_flight.append(url)
+                    yield url
+
+            def report(url, outcome):
+                if url in in_flight:
+                    in_flight.remove(url)
+                if not isinstance(outcome, Exception):
+                    attempts.pop(url, None)
+                    events.put(("done", url, outcome))
+                    finished(url)
+                    return
+                attempt = attempts.get(url, 1)
+                delay = self.retry(browser, url, outcome, attempt) if self.retry else None
+                if delay is None:
+                    attempts.pop(url, None)
+                    events.put(("error", url, outcome))
+                    finished(url)
+                    return
+                attempts[url] = attempt + 1
+                retries.append([time.monotonic() + delay, url])
+                retries.sort(key=lambda item: item[0])
+
+            def progress(url, fraction, message):
+                events.put(("progress", url, (fraction, message)))
+
+            while (not exhausted.is_set() or retries) and not stop.is_set():
+                if self.renew:
+                    try:
+                        browser = self.renew(browser, chunk_size)
+                    except Exception as e:
+                        logger.error(f"Worker {worker_id} failed to replace its browser: {str(e)}")
+                        # Nobody else will pick up the URLs waiting for another attempt here
+                        for _, url in retries:
+                            events.put(("error", url, e))
+                            finished(url)
+                        return None
+                error = None
+                try:
+                    for url, outcome in task(browser, url_source(), progress):
+                        report(url, outcome)
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} stream failed: {str(e)}")
+                    error = e
+                # URLs the task took but never reported fail (or are retried) here
+                for url in list(in_flight):
+                    report(url, error or RuntimeError(f"{url} got no result from its browser"))
+            return browser
+
+        feeder = threading.Thread(target=feed, name="url-feeder", daemon=True)
+        workers = [
+            threading.Thread(target=work, args=(i,), name=f"browser-worker-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        logger.info(f"Starting {self.num_workers} browser worker(s)")
+        for thread in workers:
+            thread.start()
+        feeder.start()
+
+        try:
+            while True:
+                try:
+                    yield events.get(timeout=0.1)
+                    continue
+                except queue.Empty:
+                    pass
+                if any(thread.is_alive() for thread in workers):
+                    continue
+                # No worker is left: report anything still waiting in the queue, including
+                # URLs queued just before the last worker exited while the feeder reads on
+                while not events.empty():
+                    yield events.get()
+                while True:
+                    try:
+                        url = work_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if url is not _STOP:
+                        yield ("error", url, RuntimeError("No browser workers available"))
+                if not feeder.is_alive():
+                    break
+        finally:
+            stop.set()
+            for thread in workers:
+                thread.join()
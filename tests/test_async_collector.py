@@ -0,0 +1,227 @@
+from src.async_collector import AsyncCookieCollector
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SETTINGS = {"browser": "chrome", "headless": True, "workers": 2, "wait_time": 1,
+            "save_cookies": False}
+
+class FakeBrowser:
+    """Loads pages in tabs, recording how many were loading at once"""
+    broken = False
+    last_load_stats = None
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def is_alive(self):
+        return True
+
+    def kill(self):
+        self.broken = True
+
+    def iter_cookies_from_tabs(self, urls, tabs=4, **kwargs):
+        active = []
+        for url in urls:
+            active.append(url)
+            self.pool.track(len(active))
+            if len(active) == tabs:
+                time.sleep(0.05)
+                while active:
+                    yield active.pop(0), {"cookies": [{"name": "tab"}], "readiness": None}
+        time.sleep(0.05)
+        while active:
+            yield active.pop(0), {"cookies": [{"name": "tab"}], "readiness": None}
+        self.last_load_stats = {"pages": 1, "blocked_requests": 2}
+
+class FakePool:
+    """Stands in for the browser pool, counting loads in flight across browsers"""
+
+    def __init__(self):
+        self.max_size = 1
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.checked_out = 0
+
+    def warm(self, count):
+        return count
+
+    def checkout(self, timeout=None):
+        with self.lock:
+            self.checked_out += 1
+        return FakeBrowser(self)
+
+    def checkin(self, browser):
+        with self.lock:
+            self.checked_out -= 1
+
+    def renew(self, browser, pages=1):
+        return browser
+
+    def stats(self):
+        return {}
+
+    def track(self, loading):
+        with self.lock:
+            self.peak = max(self.peak, loading)
+
+class SlowCollector(AsyncCookieCollector):
+    """Loads one page per browser; pages of hang.example only finish once released"""
+
+    def __init__(self, pool):
+        super().__init__(pool)
+        self.release = threading.Event()
+        self.finished = []
+
+    def _collect_url(self, browser, url, progress_callback):
+        if "hang.example" in url:
+            self.release.wait(5)
+        else:
+            time.sleep(0.05)
+        self.finished.append(url)
+        return {"cookies": [{"name": "page"}], "backend": "browser"}
+
+def in_temp_dir(test):
+    """Run an async test with the collector's database in a temporary directory"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            asyncio.run(test())
+        finally:
+            os.chdir(cwd)
+
+def test_timeout_frees_slot_when_page_ends():
+    """Test that a timed out URL fails at once and its browser slot is reused only after the page ends"""
+    async def run():
+        collector = SlowCollector(FakePool())
+        await collector.initialize({**SETTINGS, "workers": 1})
+        result = await collector.collect("hang.example", timeout=0.1)
+        assert not result["success"] and "Timed out" in result["error"]
+
+        # The only browser is still busy with the hung page
+        other = asyncio.ensure_future(collector.collect("https://other.example"))
+        await asyncio.sleep(0.2)
+        assert not other.done()
+        collector.release.set()
+        assert (await other)["success"]
+        assert collector.finished == ["https://hang.example", "https://other.example"]
+        collector.db_manager.engine.dispose()
+        await collector.aclose()
+
+    in_temp_dir(run)
+
+def test_cancel_collect_many():
+    """Test that leaving collect_many early cancels the URLs still in flight"""
+    async def run():
+        pool = FakePool()
+        collector = SlowCollector(pool)
+        await collector.initialize(SETTINGS)
+        urls = ["https://fast.example/", "https://hang.example/a", "https://hang.example/b"]
+        async for url, result in collector.collect_many(urls, concurrency=3):
+            assert url == "https://fast.example/" and result["success"]
+            break
+        # The hung pages were abandoned by the caller, their browsers finish them
+        collector.release.set()
+        await asyncio.sleep(0.3)
+        assert len(collector.finished) == 3
+        assert pool.checked_out == 0
+        collector.db_manager.engine.dispose()
+        await collector.aclose()
+
+    in_temp_dir(run)
+
+def test_tabs_keep_pages_in_flight():
+    """Test that with tabs every browser loads several pages at once on one thread"""
+    async def run():
+        pool = FakePool()
+        collector = AsyncCookieCollector(pool)
+        await collector.initialize({**SETTINGS, "tabs": 4})
+        threads = threading.active_count()
+        urls = [f"https://site{i}.example/" for i in range(24)]
+        results = [item async for item in collector.collect_many(urls, concurrency=8)]
+        assert sorted(url for url, _ in results) == sorted(urls)
+        assert all(result["success"] and result["count"] == 1 for _, result in results)
+        assert pool.peak > 1
+        # One thread per browser and the URL feeder, none per page in flight
+        assert threading.active_count() <= threads + 3
+
+        # A timed out URL in a tab keeps its slot until the tab reports it
+        result = await collector.collect("https://late.example/", timeout=0.001)
+        assert not result["success"]
+        collector.db_manager.engine.dispose()
+        await collector.aclose()
+        assert pool.checked_out == 0 and not collector._tab_waiters
+        # Every tab stream added its load stats to the run's totals
+        assert collector._load_totals["blocked_requests"] == 2 * collector._load_totals["pages"] > 0
+
+    in_temp_dir(run)
+
+class CrashingBrowser(FakeBrowser):
+    """Takes a chunk of URLs into tabs, then crashes before reporting any of them"""
+
+    def is_alive(self):
+        return False
+
+    def iter_cookies_from_tabs(self, urls, tabs=4, **kwargs):
+        for _ in range(tabs):
+            next(urls, None)
+        raise RuntimeError("chrome not reachable")
+        yield
+
+class BrokenPool(FakePool):
+    """A pool of crashing browsers that cannot be replaced once a worker has started"""
+
+    def __init__(self):
+        super().__init__()
+        self.renewals = 0
+
+    def checkout(self, timeout=None):
+        super().checkout(timeout)
+        return CrashingBrowser(self)
+
+    def renew(self, browser, pages=1):
+        with self.lock:
+            self.renewals += 1
+            if self.renewals > 1:
+                raise RuntimeError("chrome failed to start")
+        return browser
+
+def test_tabs_fail_without_browsers():
+    """Test that URLs fail instead of waiting forever when stream workers cannot get a browser"""
+    async def run():
+        collector = AsyncCookieCollector(BrokenPool())
+        await collector.initialize({**SETTINGS, "tabs": 4})
+        results = await asyncio.wait_for(asyncio.gather(
+            *(collector.collect(f"https://site{i}.example/") for i in range(6))), 10)
+        assert not any(result["success"] for result in results)
+        # Every browser slot came back
+        assert collector._browser_slots._value == 8
+        collector.db_manager.engine.dispose()
+        await collector.aclose()
+
+    in_temp_dir(run)
+
+def main():
+    logger.info("Starting async collector tests...")
+
+    test_timeout_frees_slot_when_page_ends()
+    test_cancel_collect_many()
+    test_tabs_keep_pages_in_flight()
+    test_tabs_fail_without_browsers()
+
+    logger.info("All async collector tests completed!")
+
+if __name__ == "__main__":
+    main()
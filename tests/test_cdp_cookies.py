@@ -0,0 +1,61 @@
+from src.cdp_cookies import from_cdp_cookie, set_cookies, to_cdp_cookie
+import logging
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeDriver:
+    """Records DevTools calls; rejects bulk calls containing a cookie named "bad" """
+
+    def __init__(self):
+        self.calls = []
+
+    def execute_cdp_cmd(self, method, params):
+        self.calls.append(method)
+        cookies = params.get("cookies", [params])
+        if any(cookie["name"] == "bad" for cookie in cookies):
+            raise Exception("Invalid cookie fields")
+        return {}
+
+def test_to_cdp_cookie():
+    """Test the conversion of stored cookies into DevTools cookie parameters"""
+    host_only = to_cdp_cookie({"name": "sid", "value": "1", "domain": "www.example.com", "path": "/app",
+                               "secure": True, "httpOnly": True, "sameSite": "None", "expiry": 1893456000})
+    assert host_only["url"] == "https://www.example.com/app" and "domain" not in host_only
+    assert host_only["expires"] == 1893456000 and host_only["sameSite"] == "None"
+
+    tracker = to_cdp_cookie({"name": "_ga", "value": "GA1", "domain": ".tracker.net", "priority": "High",
+                             "partitionKey": "https://example.com"})
+    assert tracker["domain"] == ".tracker.net" and "url" not in tracker
+    assert tracker["partitionKey"]["topLevelSite"] == "https://example.com"
+
+    # A DevTools cookie read back converts to the same parameters
+    read_back = from_cdp_cookie({"name": "_ga", "value": "GA1", "domain": ".tracker.net", "path": "/",
+                                 "expires": 1893456000.5, "session": False, "sameSite": "Lax"})
+    assert to_cdp_cookie(read_back)["expires"] == 1893456000
+
+def test_set_cookies_in_one_call():
+    """Test that the jar is set in one call and bad cookies are skipped on fallback"""
+    driver = FakeDriver()
+    cookies = [{"name": f"c{i}", "value": "v", "domain": f".site{i}.example"} for i in range(50)]
+    assert set_cookies(driver, cookies) == 50
+    assert driver.calls == ["Network.setCookies"]
+
+    driver = FakeDriver()
+    assert set_cookies(driver, cookies[:3] + [{"name": "bad", "value": "", "domain": ".x.example"}]) == 3
+    assert driver.calls == ["Network.setCookies"] + ["Network.setCookie"] * 4
+
+def main():
+    logger.info("Starting DevTools cookie tests...")
+
+    test_to_cdp_cookie()
+    test_set_cookies_in_one_call()
+
+    logger.info("All DevTools cookie tests completed!")
+
+if __name__ == "__main__":
+    main()
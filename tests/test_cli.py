@@ -0,0 +1,99 @@
+from src.cli import build_parser, load_settings, read_urls, write_records
+import io
+import json
+import logging
+import os
+import tempfile
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_read_urls_lazily():
+    """Test that URLs are read one line at a time, skipping blanks and comments"""
+    handle, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(handle, "w") as f:
+        f.write("# nightly list\nexample.com\n\n  https://example.org/page  \n")
+    try:
+        urls = read_urls([path])
+        assert next(urls) == "example.com"
+        assert list(urls) == ["https://example.org/page"]
+    finally:
+        os.remove(path)
+
+def test_write_records_and_settings():
+    """Test that each result becomes one JSON line and flags override the settings file"""
+    output = io.StringIO()
+    results = iter([
+        ("https://example.com", {"success": True, "cookies": [{"name": "id", "value": "1"}], "count": 1}),
+        ("https://example.org", {"success": False, "error": "timeout", "cookies": [], "count": 0}),
+    ])
+    assert write_records(results, output) == 2
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert records[0]["url"] == "https://example.com" and records[0]["count"] == 1
+    assert records[1]["error"] == "timeout"
+
+    args = build_parser().parse_args(["urls.txt", "--workers", "4", "--save", "--settings", "missing.json"])
+    settings = load_settings(args)
+    assert args.inputs == ["urls.txt"]
+    assert settings["workers"] == 4 and settings["save_cookies"] and settings["headless"]
+    assert build_parser().parse_args([]).inputs == ["-"]
+
+class FakePool:
+    """Lends one placeholder browser"""
+    max_size = 1
+
+    def warm(self, count):
+        return count
+
+    def checkout(self, timeout=None):
+        return object()
+
+    def checkin(self, browser):
+        pass
+
+    def renew(self, browser, pages=1):
+        return browser
+
+    def stats(self):
+        return {}
+
+def test_bad_line_keeps_stream_going():
+    """Test that an unparseable input line becomes an error record and later lines are still collected"""
+    from src.gui.controller import BrowserController
+
+    class Controller(BrowserController):
+        def _collect_url(self, browser, url, progress_callback):
+            return {"cookies": [], "backend": "browser"}
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            controller = Controller(FakePool())
+            controller.initialize_browser({"browser": "chrome", "headless": True, "wait_time": 1,
+                                           "save_cookies": False})
+            output = io.StringIO()
+            urls = iter(["a.com", "example.com:abc/x", "b.com", "c.com"])
+            assert write_records(controller.iter_results(urls), output) == 4
+            records = {record["url"]: record for record in map(json.loads, output.getvalue().splitlines())}
+            assert not records["example.com:abc/x"]["success"]
+            assert all(records[f"https://{host}.com"]["success"] for host in "abc")
+            controller.db_manager.engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+def main():
+    logger.info("Starting CLI tests...")
+
+    test_read_urls_lazily()
+    test_write_records_and_settings()
+    test_bad_line_keeps_stream_going()
+
+    logger.info("All CLI tests completed!")
+
+if __name__ == "__main__":
+    main()
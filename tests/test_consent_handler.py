@@ -0,0 +1,130 @@
+from src.consent import _DETECT_SCRIPT, CONSENT_SELECTORS, ConsentHandler, ConsentMemo
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Runs the detection script against a minimal DOM of visible elements and
+# prints what was matched and which element was clicked
+_DOM_HARNESS = """
+const [elements, selectors, texts] = JSON.parse(process.argv[1]);
+const clicked = [];
+const nodes = elements.map((spec, i) => ({
+    tagName: spec.tag.toUpperCase(), innerText: spec.text || '', value: '', disabled: false,
+    getAttribute: (name) => (spec.attrs || {})[name] ?? null,
+    getBoundingClientRect: () => ({width: 10, height: 10}),
+    click: () => clicked.push(i),
+    selectors: spec.selectors || [],
+}));
+global.window = {getComputedStyle: () => ({visibility: 'visible', display: 'block'})};
+global.document = {querySelectorAll: (selector) => selector.startsWith('button, ')
+    ? nodes : nodes.filter((node) => node.selectors.includes(selector))};
+const detect = new Function(SCRIPT);
+detect(selectors, texts, 0, (key) => console.log(JSON.stringify([key, clicked])));
+"""
+
+def run_detect(elements, selectors=(), texts=("accept all", "accept")):
+    """Matched key and clicked element indexes for a page of ``elements``, or None without Node.js"""
+    node = shutil.which("node")
+    if not node:
+        logger.info("Node.js not found, skipping the in-page matching check")
+        return None
+    script = _DOM_HARNESS.replace("SCRIPT", json.dumps(_DETECT_SCRIPT))
+    output = subprocess.run([node, "-e", script, json.dumps([elements, list(selectors), list(texts)])],
+                            capture_output=True, text=True, timeout=30, check=True).stdout
+    return json.loads(output)
+
+class FakeDriver:
+    """Answers detection runs from a list of results, recording the candidates asked for"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+        self.current_url = "https://www.example.com/"
+
+    def execute_async_script(self, script, selectors, texts, timeout_ms):
+        self.calls.append((list(selectors), list(texts)))
+        return self.results.pop(0)
+
+def test_memo_needs_repeated_misses():
+    """Test that one miss is not remembered as no banner and the answer expires"""
+    memo = ConsentMemo(negative_ttl=0.2, negative_after=2)
+    memo.remember("example.com", ConsentMemo.NO_BANNER)
+    assert memo.get("example.com") is None
+    memo.remember("example.com", ConsentMemo.NO_BANNER)
+    assert memo.get("example.com") == ConsentMemo.NO_BANNER
+    time.sleep(0.25)
+    assert memo.get("example.com") is None
+
+    # A click in between starts the count again
+    memo.remember("example.com", ConsentMemo.NO_BANNER)
+    memo.remember("example.com", "#accept")
+    memo.remember("example.com", ConsentMemo.NO_BANNER)
+    assert memo.get("example.com") is None
+
+def test_memo_persists():
+    """Test that the memo is kept across runs in its file"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "memo", "consent.json")
+        ConsentMemo(path).remember("example.com", "#onetrust-accept-btn-handler")
+        assert ConsentMemo(path).get("example.com") == "#onetrust-accept-btn-handler"
+
+def test_handler_uses_memo():
+    """Test that a remembered selector is tried alone and misses are only trusted when repeated"""
+    memo = ConsentMemo()
+    driver = FakeDriver(["#accept", None, "text:accept all"])
+    handler = ConsentHandler(driver, memo=memo, timeout=0)
+    assert handler.handle()
+    assert memo.get("example.com") == "#accept"
+
+    # The remembered selector misses, so the page is probed with every candidate
+    assert handler.handle()
+    assert driver.calls[1] == (["#accept"], [])
+    assert driver.calls[2][0] == CONSENT_SELECTORS
+    assert memo.get("example.com") == "text:accept all"
+    assert driver.calls[2][1][0] == "accept all cookies"
+
+    driver = FakeDriver([None, None])
+    handler = ConsentHandler(driver, memo=ConsentMemo(), timeout=0)
+    assert not handler.handle() and not handler.handle()
+    assert len(driver.calls) == 2
+    # Only now is detection skipped
+    assert not handler.handle() and len(driver.calls) == 2
+
+def test_text_matching():
+    """Test that buttons may carry extra words but links must match exactly"""
+    hit = run_detect([{"tag": "a", "text": "Accept our terms of service"},
+                      {"tag": "button", "text": "Accept all and close"}])
+    if hit is None:
+        return
+    assert hit == ["text:accept all", [1]]
+
+    assert run_detect([{"tag": "a", "text": "Accept cookies and continue"}]) == [None, []]
+    assert run_detect([{"tag": "a", "text": "Accept"}]) == ["text:accept", [0]]
+    assert run_detect([{"tag": "a", "text": "Accept cookies", "attrs": {"role": "button"}}]) == ["text:accept", [0]]
+    # Selectors win over texts
+    assert run_detect([{"tag": "button", "text": "Accept all"},
+                       {"tag": "button", "text": "OK", "selectors": ["#ok"]}], selectors=["#ok"]) == ["#ok", [1]]
+
+def main():
+    logger.info("Starting consent handler tests...")
+
+    test_memo_needs_repeated_misses()
+    test_memo_persists()
+    test_handler_uses_memo()
+    test_text_matching()
+
+    logger.info("All consent handler tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+from src.consent import ConsentMemo, ConsentPresets, MAX_VENDOR_ID, tcf_string
+import base64
+import logging
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+class FakeDriver:
+    """Records DevTools cookie calls and reports the given consent platforms on the page"""
+
+    def __init__(self, platforms=None, banner_shown=False):
+        self.platforms = platforms or {}
+        self.banner_shown = banner_shown
+        self.set = []
+
+    def execute_cdp_cmd(self, method, params):
+        self.set.extend(params["cookies"])
+        return {}
+
+    def execute_script(self, script):
+        return {name: [name in self.platforms, self.banner_shown] for name in
+                ("onetrust", "didomi", "cookiebot", "quantcast", "tcf")}
+
+def decode_bits(value):
+    data = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+    return "".join(f"{byte:08b}" for byte in data)
+
+def test_tcf_string():
+    """Test the fields of the accept and reject TCF strings"""
+    bits = decode_bits(tcf_string("accept", NOW, cmp_id=7, vendor_list_version=120))
+    assert int(bits[0:6], 2) == 2
+    assert int(bits[6:42], 2) == int(NOW.timestamp() * 10)
+    assert int(bits[78:90], 2) == 7
+    assert int(bits[120:132], 2) == 120
+    purposes = bits[152:176]
+    assert purposes[:11] == "1" * 11 and "1" not in purposes[11:]
+    vendors = bits[213:]
+    assert int(vendors[0:16], 2) == MAX_VENDOR_ID and vendors[16] == "1"
+
+    bits = decode_bits(tcf_string("reject", NOW))
+    assert "1" not in bits[140:200]
+    assert int(bits[213:229], 2) == 0
+
+def test_presets_for_unknown_site():
+    """Test that every platform's cookies are set first and unused ones are dropped afterwards"""
+    presets = ConsentPresets("reject", memo=ConsentMemo())
+    driver = FakeDriver(platforms={"onetrust"})
+    injected = presets.apply(driver, "https://www.example.com/page")
+    names = {cookie["name"] for cookie in driver.set}
+    assert names == {"OptanonAlertBoxClosed", "OptanonConsent", "didomi_token", "CookieConsent", "euconsent-v2"}
+    assert all(cookie["domain"] == ".example.com" for cookie in driver.set)
+    assert "C0004%3A0" in next(c["value"] for c in injected if c["name"] == "OptanonConsent")
+
+    consent = presets.detect(driver, "https://www.example.com/page", injected)
+    assert consent == {"preset": "onetrust", "variant": "reject", "banner_shown": False}
+    # Injected cookies are never stored as the site's, even for the matching platform,
+    # unless the page rewrote them
+    page_cookies = injected + [{"name": "session", "value": "1"}]
+    assert [cookie["name"] for cookie in presets.strip(page_cookies, injected)] == ["session"]
+    rewritten = [{**cookie, "value": "site-value"} if cookie["name"] == "OptanonConsent" else cookie
+                 for cookie in injected]
+    assert [cookie["name"] for cookie in presets.strip(rewritten, injected)] == ["OptanonConsent"]
+
+    # The matching platform is remembered for the next visit
+    driver = FakeDriver(platforms={"onetrust"})
+    presets.apply(driver, "https://shop.example.com/")
+    assert {cookie["name"] for cookie in driver.set} == {"OptanonAlertBoxClosed", "OptanonConsent"}
+
+def test_presets_from_settings():
+    """Test the settings forms and that sites without a platform keep getting every preset"""
+    assert ConsentPresets.from_settings({}) is None
+    assert ConsentPresets.from_settings({"consent_preset": "accept"}).variant == "accept"
+    presets = ConsentPresets.from_settings({"consent_preset": {"variant": "reject", "platforms": ["tcf", "didomi"]}})
+    assert presets.platforms == ["didomi", "tcf"]
+    try:
+        ConsentPresets("maybe")
+        assert False, "Unknown variants must be rejected"
+    except ValueError:
+        pass
+
+    presets = ConsentPresets(memo=ConsentMemo())
+    driver = FakeDriver()
+    injected = presets.apply(driver, "https://plain.org/")
+    assert presets.detect(driver, "https://plain.org/", injected)["preset"] is None
+    assert presets.strip(injected, injected) == []
+    # A miss on one load is not remembered, the CMP may just have loaded late
+    driver = FakeDriver(platforms={"tcf"}, banner_shown=True)
+    injected = presets.apply(driver, "https://plain.org/")
+    assert len(injected) == 5
+    # The generic TCF API cannot tell whether a banner is showing
+    assert presets.detect(driver, "https://plain.org/", injected)["banner_shown"] is None
+
+def main():
+    logger.info("Starting consent preset tests...")
+
+    test_tcf_string()
+    test_presets_for_unknown_site()
+    test_presets_from_settings()
+
+    logger.info("All consent preset tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from src.database import DatabaseManager
+from src.distributed import Coordinator, DistributedWorker
+from src.job_queue import JobQueue
+import logging
+import os
+import tempfile
+import threading
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeController:
+    """Stands in for BrowserController, returning one cookie per URL"""
+
+    def iter_results(self, urls):
+        for url in urls:
+            if "broken" in url:
+                yield url, {"success": False, "error": "net::ERR_NAME_NOT_RESOLVED", "cookies": [], "count": 0}
+            else:
+                yield url, {"success": True, "cookies": [{"name": "id", "value": url}], "count": 1}
+
+def test_workers_over_localhost():
+    """Test that several workers drain a batch, including URLs left behind by a dead worker"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    db = DatabaseManager(f"sqlite:///{path}")
+    coordinator = Coordinator(db, "nightly", host="127.0.0.1", port=0, lease_seconds=0.5, token="secret")
+    try:
+        urls = [f"https://site{i}.example" for i in range(30)] + ["https://broken.example"]
+        assert coordinator.add(urls) == 31
+        coordinator.start()
+        base_url = f"http://127.0.0.1:{coordinator._server.server_address[1]}"
+
+        # A worker that claims URLs and dies without heartbeating or uploading
+        dead = DistributedWorker(base_url, FakeController(), worker_id="dead", token="secret")
+        abandoned = dead._call("/claim", {"worker": "dead", "limit": 3})["urls"]
+        assert len(abandoned) == 3
+
+        workers = [DistributedWorker(base_url, FakeController(), claim_size=4, poll_interval=0.1, token="secret")
+                   for _ in range(3)]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        assert coordinator.counts() == {"pending": 0, "in_flight": 0, "done": 30, "failed": 1}
+        assert sum(worker.stats["collected"] for worker in workers) == 30
+        assert db.get_cookies(abandoned[0])[0]["value"] == abandoned[0]
+
+        # A late upload from the dead worker is rejected
+        assert not dead._call("/result", {"worker": "dead", "url": abandoned[0], "success": True, "cookies": []})["accepted"]
+        assert db.get_cookies(abandoned[0])
+        # Requests without the token are refused
+        try:
+            DistributedWorker(base_url, FakeController())._call("/claim", {"worker": "x"})
+            assert False, "Request without token accepted"
+        except Exception as e:
+            assert "403" in str(e)
+    finally:
+        coordinator.stop()
+        db.engine.dispose()
+        os.remove(path)
+
+def test_stale_lease_and_open_binds():
+    """Test that a worker whose lease was taken over cannot finish the job, and open binds need a token"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    db = DatabaseManager(f"sqlite:///{path}")
+    try:
+        url = "https://slow.example"
+        stale = JobQueue(db, "nightly", lease_seconds=0.1, owner="stale")
+        stale.add([url])
+        assert stale.claim(1) == [url]
+        time.sleep(0.3)
+        holder = JobQueue(db, "nightly", owner="holder")
+        assert holder.claim(1) == [url]
+        assert not stale.complete(url)
+        assert holder.complete(url)
+
+        try:
+            Coordinator(db, host="0.0.0.0", port=0)
+            assert False, "Open bind without token accepted"
+        except ValueError:
+            pass
+        Coordinator(db, host="0.0.0.0", port=0, token="secret").stop()
+    finally:
+        db.engine.dispose()
+        os.remove(path)
+
+def test_result_saved_with_completion():
+    """Test that URLs are queued in canonical form and a failed save leaves no cookies and an unfinished job"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    db = DatabaseManager(f"sqlite:///{path}")
+    coordinator = Coordinator(db, "nightly", port=0)
+    try:
+        assert coordinator.add(["Shop.Example/", "https://shop.example", "http://[::1"]) == 1
+        assert coordinator.handle("/claim", {"worker": "w1"})["urls"] == ["https://shop.example"]
+
+        def broken_storage(*args, **kwargs):
+            raise OSError("disk full")
+
+        db.save_storage = broken_storage
+        upload = {"worker": "w1", "url": "shop.example", "success": True,
+                  "cookies": [{"name": "id", "value": "1"}], "storage": {"local": []}}
+        try:
+            coordinator.handle("/result", upload)
+            assert False, "Failed save accepted"
+        except OSError:
+            pass
+        assert not db.get_cookies("https://shop.example")
+        assert coordinator.counts()["in_flight"] == 1
+
+        del db.save_storage
+        assert coordinator.handle("/result", upload)["accepted"]
+        assert db.get_cookies("https://shop.example")[0]["value"] == "1"
+        assert coordinator.counts()["done"] == 1
+    finally:
+        coordinator.stop()
+        db.engine.dispose()
+        os.remove(path)
+
+def main():
+    logger.info("Starting distributed collection tests...")
+
+    test_workers_over_localhost()
+    test_stale_lease_and_open_binds()
+    test_result_saved_with_completion()
+
+    logger.info("All distributed collection tests completed!")
+
+if __name__ == "__main__":
+    main()
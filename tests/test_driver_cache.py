@@ -0,0 +1,108 @@
+from src import driver_cache
+from src.driver_cache import DriverCache
+import json
+import logging
+import os
+import stat
+import tempfile
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def make_driver(directory, name):
+    """Create an executable file standing in for a driver"""
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+def test_cache_keyed_by_browser_version():
+    """Test that a driver is resolved once per browser version and re-resolved when it changes or disappears"""
+    original_detect = driver_cache.detect_browser_version
+    original_manager = driver_cache.DRIVER_MANAGERS["chrome"]
+    with tempfile.TemporaryDirectory() as directory:
+        version = {"chrome": "120.0.6099.109"}
+        installs = []
+
+        class FakeManager:
+            def install(self):
+                installs.append(version["chrome"])
+                return make_driver(directory, f"chromedriver-{version['chrome']}")
+
+        driver_cache.detect_browser_version = lambda browser: version[browser]
+        driver_cache.DRIVER_MANAGERS["chrome"] = FakeManager
+        try:
+            cache_path = os.path.join(directory, "cache", "driver_cache.json")
+            cache = DriverCache(cache_path, offline=False)
+            first = cache.resolve("chrome")
+            assert cache.resolve("chrome") == first
+            assert installs == ["120.0.6099.109"]
+
+            # A new process reads the cache file instead of resolving again
+            cache = DriverCache(cache_path, offline=False)
+            assert cache.resolve("chrome") == first
+            assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 0
+            with open(cache_path) as f:
+                assert list(json.load(f)) == ["chrome-120.0.6099.109"]
+
+            # A browser update needs its own driver
+            version["chrome"] = "121.0.6167.85"
+            cache = DriverCache(cache_path, offline=False)
+            second = cache.resolve("chrome")
+            assert second != first and installs[-1] == "121.0.6167.85"
+
+            # A deleted driver is resolved again
+            os.remove(second)
+            cache = DriverCache(cache_path, offline=False)
+            assert cache.resolve("chrome") == second
+            assert len(installs) == 3 and cache.stats()["misses"] == 1
+        finally:
+            driver_cache.detect_browser_version = original_detect
+            driver_cache.DRIVER_MANAGERS["chrome"] = original_manager
+
+def test_offline_never_downloads():
+    """Test that offline mode uses a cached driver of an unknown version or fails clearly"""
+    original_detect = driver_cache.detect_browser_version
+    original_manager = driver_cache.DRIVER_MANAGERS["chrome"]
+
+    class FailingManager:
+        def install(self):
+            raise AssertionError("Offline mode must not download drivers")
+
+    with tempfile.TemporaryDirectory() as directory:
+        driver_cache.detect_browser_version = lambda browser: None
+        driver_cache.DRIVER_MANAGERS["chrome"] = FailingManager
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = directory
+        try:
+            cache = DriverCache(os.path.join(directory, "driver_cache.json"), offline=True)
+            try:
+                cache.resolve("chrome")
+                assert False, "No driver is available offline"
+            except RuntimeError:
+                pass
+
+            path = make_driver(directory, "chromedriver")
+            assert cache.resolve("chrome") == path
+            assert cache.resolve("chrome") == path
+            assert cache.stats()["hits"] == 1
+        finally:
+            os.environ["PATH"] = original_path
+            driver_cache.detect_browser_version = original_detect
+            driver_cache.DRIVER_MANAGERS["chrome"] = original_manager
+
+def main():
+    logger.info("Starting driver cache tests...")
+
+    test_cache_keyed_by_browser_version()
+    test_offline_never_downloads()
+
+    logger.info("All driver cache tests completed!")
+
+if __name__ == "__main__":
+    main()
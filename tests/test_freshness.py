@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from src.database import DatabaseManager
+from src.freshness import FreshnessPolicy
+from src.job_queue import JobQueue
+import logging
+import os
+import tempfile
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_freshness_windows():
+    """Test the global window, per-domain overrides and forced refresh"""
+    policy = FreshnessPolicy.from_settings({
+        "freshness": {"max_age_hours": 24, "domains": {"example.com": 1, "static.example.com": 168}}
+    })
+    now = datetime.utcnow()
+    three_hours_ago = now - timedelta(hours=3)
+
+    assert policy.enabled
+    assert policy.is_fresh("https://other.org/page", three_hours_ago, now)
+    assert not policy.is_fresh("https://other.org/page", now - timedelta(hours=25), now)
+    # Subdomains use the most specific configured domain
+    assert not policy.is_fresh("https://www.example.com/", three_hours_ago, now)
+    assert policy.is_fresh("https://cdn.static.example.com/", three_hours_ago, now)
+    # Never collected
+    assert not policy.is_fresh("https://other.org/page", None, now)
+
+    forced = FreshnessPolicy(max_age_hours=24, force=True)
+    assert not forced.enabled
+    assert not forced.is_fresh("https://other.org/page", three_hours_ago, now)
+    assert not FreshnessPolicy().enabled
+
+def test_skip_fresh_jobs():
+    """Test that recollecting updates the timestamp and fresh batch jobs can be skipped"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    db = DatabaseManager(f"sqlite:///{path}")
+    try:
+        db.save_cookies("https://a.example", [{"name": "id", "value": "1"}])
+        first = db.get_collection_times()["https://a.example"]
+        db.save_cookies("https://a.example", [{"name": "id", "value": "2"}])
+        assert db.get_collection_times()["https://a.example"] > first
+
+        db.save_cookies("https://c.example", [])
+        policy = FreshnessPolicy(max_age_hours=1)
+        queue = JobQueue(db, "nightly")
+        queue.add(["https://a.example", "https://b.example"])
+        # Only the URLs asked for are loaded
+        times = db.get_collection_times(queue.pending_urls())
+        assert list(times) == ["https://a.example"]
+        fresh = [url for url in queue.pending_urls() if policy.is_fresh(url, times.get(url))]
+        assert fresh == ["https://a.example"]
+        assert queue.skip(fresh) == 1
+        assert queue.pending_urls() == ["https://b.example"]
+        assert queue.counts()["done"] == 1
+    finally:
+        db.engine.dispose()
+        os.remove(path)
+
+def main():
+    logger.info("Starting freshness tests...")
+
+    test_freshness_windows()
+    test_skip_fresh_jobs()
+
+    logger.info("All freshness tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from src.host_scheduler import HostScheduler
+from src.worker_pool import WorkerPool
+import logging
+import threading
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def run_pool(urls, scheduler, num_workers=3, duration=0.05):
+    """Run a fake collection and return (url, start, end) per URL"""
+    spans = []
+    lock = threading.Lock()
+
+    def task(browser, url, progress):
+        start = time.monotonic()
+        time.sleep(duration)
+        with lock:
+            spans.append((url, start, time.monotonic()))
+        return url
+
+    pool = WorkerPool(lambda: object(), lambda browser: None, num_workers=num_workers,
+                      host_scheduler=scheduler)
+    events = list(pool.run(urls, task))
+    assert sorted(url for event, url, _ in events if event == "done") == sorted(urls)
+    return spans
+
+def test_per_host_limits():
+    """Test that a bunched host is throttled while workers stay busy with other hosts"""
+    busy = [f"https://busy.example/page{i}" for i in range(5)]
+    others = [f"https://site{i}.example/" for i in range(6)]
+    scheduler = HostScheduler(per_host_concurrency=2, min_interval=0,
+                              hosts={"busy.example": {"concurrency": 1, "min_interval": 0.2}})
+    spans = run_pool(busy + others, scheduler)
+
+    busy_spans = sorted(span for span in spans if "busy.example" in span[0])
+    for (_, start, end), (_, next_start, _) in zip(busy_spans, busy_spans[1:]):
+        assert next_start >= end
+        assert next_start - start >= 0.2 - 0.01
+    # Every other host was served long before the busy host drained
+    last_other_end = max(end for url, _, end in spans if "busy.example" not in url)
+    assert last_other_end < busy_spans[-1][1]
+
+    stats = scheduler.stats()
+    assert stats["peak_host_depth"] >= 4
+    assert stats["politeness_wait_s"] > 0
+    assert stats["buffered"] == 0
+
+def test_stop_markers_wait_for_throttled_urls():
+    """Test that workers are not told to stop while a host's URLs are still throttled"""
+    urls = [f"https://slow.example/{i}" for i in range(3)]
+    scheduler = HostScheduler(per_host_concurrency=1, min_interval=0.1)
+    spans = run_pool(urls, scheduler, num_workers=4, duration=0.01)
+    assert len(spans) == 3
+
+def test_tabs_with_per_host_limit():
+    """Test that tabs do not wait forever for a host slot held by their own page"""
+    urls = [f"https://one.example/{i}" for i in range(4)] + ["https://two.example/"]
+    tabs = 3
+
+    def tab_task(browser, url_source, progress):
+        # Takes URLs while tabs are free like iter_cookies_from_tabs, then finishes them
+        active = []
+        while True:
+            while len(active) < tabs:
+                url = next(url_source, None)
+                if url is None:
+                    break
+                active.append(url)
+            if not active:
+                return
+            time.sleep(0.01)
+            yield active.pop(0), "cookies"
+
+    scheduler = HostScheduler(per_host_concurrency=1, min_interval=0)
+    pool = WorkerPool(lambda: object(), lambda browser: None, num_workers=1, host_scheduler=scheduler)
+    events = []
+    runner = threading.Thread(target=lambda: events.extend(pool.run(urls, tab_task, stream=True, chunk_size=10)),
+                              daemon=True)
+    runner.start()
+    runner.join(timeout=10)
+    assert not runner.is_alive(), "Tab worker deadlocked on its own host slot"
+    assert sorted(url for event, url, _ in events if event == "done") == sorted(urls)
+
+def main():
+    logger.info("Starting host scheduler tests...")
+
+    test_per_host_limits()
+    test_stop_markers_wait_for_throttled_urls()
+    test_tabs_with_per_host_limit()
+
+    logger.info("All host scheduler tests completed!")
+
+if __name__ == "__main__":
+    main()
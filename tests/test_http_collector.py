@@ -0,0 +1,128 @@
+from src.http_collector import HttpCookieCollector, parse_set_cookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PLAIN_PAGE = b"<html><body><h1>Hello</h1></body></html>"
+SCRIPT_PAGE = b"<html><head><script>document.cookie = 'js=1';</script></head><body></body></html>"
+
+class CookieHandler(BaseHTTPRequestHandler):
+    """Local test site that sets cookies on a redirect chain"""
+
+    def do_GET(self):
+        if self.path == "/start":
+            self.send_response(302)
+            self.send_header("Set-Cookie", "session_id=abc123; Path=/; HttpOnly")
+            self.send_header("Location", "/final")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path == "/final":
+            body = PLAIN_PAGE
+            self.send_response(200)
+            self.send_header("Set-Cookie", "prefs=dark; Max-Age=3600; Secure; SameSite=Strict")
+            # Proves cookies from the redirect were sent along like a browser would
+            if "session_id=abc123" in self.headers.get("Cookie", ""):
+                self.send_header("Set-Cookie", "seen_session=yes; Path=/")
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/scripted":
+            body = SCRIPT_PAGE
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def start_test_server():
+    """Start the local test site on a free port and return its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CookieHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_parse_set_cookie():
+    """Test Set-Cookie parsing into the WebDriver cookie shape"""
+    cookie = parse_set_cookie(
+        "id=42; Domain=.example.com; Path=/app; Expires=Wed, 21 Oct 2037 07:28:00 GMT; Secure; HttpOnly; SameSite=None",
+        "https://www.example.com/app/page"
+    )
+    assert cookie == {
+        'name': 'id',
+        'value': '42',
+        'domain': '.example.com',
+        'path': '/app',
+        'expiry': 2139722880,
+        'secure': True,
+        'httpOnly': True,
+        'sameSite': 'None',
+    }
+
+    # Defaults follow the browser: host-only domain, default path, Lax
+    cookie = parse_set_cookie("a=b", "https://example.com/dir/page")
+    assert cookie['domain'] == 'example.com'
+    assert cookie['path'] == '/dir'
+    assert cookie['sameSite'] == 'Lax'
+    assert 'expiry' not in cookie
+
+    # Max-Age wins over Expires, and foreign domains are rejected
+    cookie = parse_set_cookie("a=b; Expires=Wed, 21 Oct 2037 07:28:00 GMT; Max-Age=60", "https://example.com/", now=1000)
+    assert cookie['expiry'] == 1060
+    assert parse_set_cookie("a=b; Domain=other.com", "https://example.com/") is None
+
+def test_redirect_chain_cookies():
+    """Test that cookies from every redirect hop are collected"""
+    server, base_url = start_test_server()
+    try:
+        result = HttpCookieCollector().fetch(f"{base_url}/start")
+
+        cookies = {cookie['name']: cookie for cookie in result['cookies']}
+        logger.info(f"Collected cookies: {sorted(cookies)}")
+        assert set(cookies) == {'session_id', 'prefs', 'seen_session'}
+        assert cookies['session_id']['httpOnly']
+        assert cookies['prefs']['secure']
+        assert cookies['prefs']['sameSite'] == 'Strict'
+        assert result['final_url'] == f"{base_url}/final"
+        assert result['status'] == 200
+        assert not result['needs_browser']
+    finally:
+        server.shutdown()
+
+def test_script_page_needs_browser():
+    """Test that pages setting cookies from JavaScript escalate to the browser"""
+    server, base_url = start_test_server()
+    try:
+        collector = HttpCookieCollector()
+        result = collector.fetch(f"{base_url}/scripted")
+        logger.info(f"Escalation reason: {result['reason']}")
+        assert result['needs_browser']
+
+        assert collector.fetch(f"{base_url}/missing")['needs_browser']
+    finally:
+        server.shutdown()
+
+def main():
+    logger.info("Starting HTTP collector tests...")
+
+    test_parse_set_cookie()
+    test_redirect_chain_cookies()
+    test_script_page_needs_browser()
+
+    logger.info("All HTTP collector tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+from src.browsers.chrome.chrome_browser import ChromeBrowser
+import itertools
+import logging
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window_handle = handle
+
+    def new_window(self, kind):
+        self.driver.current_window_handle = f"window{next(self.driver._ids)}"
+
+class FakeDriver:
+    """Tracks the browser contexts and tabs created through DevTools"""
+
+    def __init__(self, supports_contexts=True):
+        self.supports_contexts = supports_contexts
+        self.current_window_handle = "main"
+        self.switch_to = FakeSwitchTo(self)
+        self.contexts = set()
+        self.targets = {}
+        self.cleared = 0
+        self.domain_cleared = 0
+        self._ids = itertools.count(1)
+
+    def execute_cdp_cmd(self, method, params):
+        if method == "Target.createBrowserContext":
+            if not self.supports_contexts:
+                raise Exception("'Target.createBrowserContext' wasn't found")
+            context_id = f"ctx{next(self._ids)}"
+            self.contexts.add(context_id)
+            return {"browserContextId": context_id}
+        if method == "Target.createTarget":
+            target_id = f"tab{next(self._ids)}"
+            self.targets[target_id] = params["browserContextId"]
+            return {"targetId": target_id}
+        if method == "Target.closeTarget":
+            assert self.current_window_handle != params["targetId"]
+            del self.targets[params["targetId"]]
+        elif method == "Target.disposeBrowserContext":
+            self.contexts.remove(params["browserContextId"])
+        elif method == "Network.clearBrowserCookies":
+            self.cleared += 1
+        return {}
+
+    def delete_all_cookies(self):
+        self.domain_cleared += 1
+
+    def get(self, url):
+        pass
+
+class FakeChrome(ChromeBrowser):
+    def __init__(self, driver, isolation, headless=True):
+        self._fake_driver = driver
+        # Window handles the per-tab DevTools setup ran in
+        self.hooked = []
+        super().__init__(headless=headless, kill_existing=False, isolation=isolation)
+
+    def setup_driver(self):
+        self.driver = self._fake_driver
+
+    def _install_tab_hooks(self):
+        self.hooked.append(self.driver.current_window_handle)
+
+def test_url_isolation():
+    """Test that every URL gets a new context and the old one is disposed"""
+    driver = FakeDriver()
+    browser = FakeChrome(driver, "url")
+    browser._enter_context("https://example.com/a")
+    first = browser._context
+    assert driver.current_window_handle == first[1]
+    assert driver.targets[first[1]] == first[0]
+
+    browser._enter_context("https://example.com/b")
+    assert browser._context[0] != first[0]
+    assert driver.contexts == {browser._context[0]}
+
+    browser._leave_context()
+    assert browser._context is None
+    assert not driver.contexts and not driver.targets
+    assert driver.current_window_handle == "main"
+
+def test_site_isolation():
+    """Test that consecutive URLs of one site share a context"""
+    driver = FakeDriver()
+    browser = FakeChrome(driver, "site")
+    browser._enter_context("https://www.example.com/a")
+    first = browser._context
+    browser._enter_context("https://shop.example.com/b")
+    assert browser._context == first
+
+    browser._enter_context("https://other.org/")
+    assert browser._context[0] != first[0]
+    assert len(driver.contexts) == 1
+
+def test_fallback_without_contexts():
+    """Test that browsers without contexts share the jar, clearing it only on their own profile"""
+    driver = FakeDriver(supports_contexts=False)
+    browser = FakeChrome(driver, "url")
+    browser._enter_context("https://example.com/")
+    browser._enter_context("https://example.org/")
+    assert browser.isolation == "url" and browser._context is None
+    assert browser._contexts_unavailable
+    assert driver.cleared == 2
+
+    # A visible browser runs on the user's profile, whose cookies must survive
+    driver = FakeDriver(supports_contexts=False)
+    browser = FakeChrome(driver, "url", headless=False)
+    browser._enter_context("https://example.com/")
+    assert driver.cleared == 0
+
+def test_reset_keeps_user_profile():
+    """Test that only browsers owning their profile clear the whole cookie jar"""
+    driver = FakeDriver()
+    FakeChrome(driver, None).reset()
+    assert driver.cleared == 1 and driver.domain_cleared == 0
+
+    driver = FakeDriver()
+    FakeChrome(driver, None, headless=False).reset()
+    assert driver.cleared == 0 and driver.domain_cleared == 1
+
+def test_devtools_capture_on_user_profile():
+    """Test that devtools capture on the user's profile uses a throwaway context instead of clearing"""
+    driver = FakeDriver()
+    browser = FakeChrome(driver, None, headless=False)
+    driver.get_cookies = lambda: []
+    driver.execute_script = lambda *args: True
+    browser.get_all_cookies = lambda: []
+    browser.get_cookies_from_url("https://example.com/", wait_time=0, capture_mode="devtools")
+    assert driver.cleared == 0
+    # A context was created for the page and disposed after it
+    assert browser._home_handle == "main"
+    assert not driver.contexts and browser._context is None
+
+def test_consent_presets_only_in_own_jar():
+    """Test that consent presets are never written into the user's profile"""
+    assert FakeChrome(FakeDriver(), None)._presets_allowed(False)
+    visible = FakeChrome(FakeDriver(), None, headless=False)
+    assert not visible._presets_allowed(False)
+    assert visible._presets_allowed(True)
+
+class TabDriver(FakeDriver):
+    """Serves pages that are complete at once and a devtools cookie per tab context"""
+
+    def execute_script(self, script, *args):
+        if "readyState" in script:
+            return {"stale": False, "readyState": "complete", "resources": 0, "inflight": 0}
+        if "getEntriesByType" in script:
+            return ["https://example.com/"]
+        return None
+
+    def execute_cdp_cmd(self, method, params):
+        if method == "Network.getCookies":
+            owner = self.targets.get(self.current_window_handle, "shared")
+            return {"cookies": [{"name": "jar", "value": owner, "domain": "example.com"}]}
+        return super().execute_cdp_cmd(method, params)
+
+def collect_tabs(driver):
+    from src.readiness import PageReadiness
+    browser = FakeChrome(driver, None)
+    readiness = PageReadiness(network_idle_ms=None, cookie_stable_ms=None)
+    urls = [f"https://example.com/{i}" for i in range(4)]
+    return dict(browser.iter_cookies_from_tabs(urls, tabs=2, readiness=readiness, capture_mode="devtools"))
+
+def test_devtools_tabs_get_own_jar():
+    """Test that devtools capture in tabs gives every page its own jar, or flags the shared one"""
+    driver = TabDriver()
+    results = collect_tabs(driver)
+    jars = [result["cookies"][0]["value"] for result in results.values()]
+    assert len(results) == 4 and len(set(jars)) == 4 and "shared" not in jars
+    assert not any(result.get("shared_jar") for result in results.values())
+    assert not driver.contexts and not driver.targets
+
+    results = collect_tabs(TabDriver(supports_contexts=False))
+    assert len(results) == 4 and all(result["shared_jar"] for result in results.values())
+
+class FixedStatsProfile:
+    """A load profile whose network log always holds one blocked request"""
+
+    def page_stats(self, driver):
+        return {"blocked_requests": 1, "estimated_bytes_saved": 100, "bytes_loaded": 0}
+
+def test_new_tabs_get_hooks():
+    """Test that every tab opened gets the per-tab setup and load stats are totalled per stream"""
+    from src.readiness import PageReadiness
+    driver = TabDriver()
+    driver.get_cookies = lambda: []
+    driver.close = lambda: None
+    browser = FakeChrome(driver, None)
+    browser.load_profile = FixedStatsProfile()
+    readiness = PageReadiness(network_idle_ms=None, cookie_stable_ms=None)
+    urls = [f"https://example.com/{i}" for i in range(5)]
+    results = dict(browser.iter_cookies_from_tabs(urls, tabs=3, readiness=readiness))
+    assert len(results) == 5
+    assert browser.hooked == ["window1", "window2"]
+    # The shared network log is reported once for the stream, never per page
+    assert not any("load" in result for result in results.values())
+    assert browser.last_load_stats["pages"] == 5
+    assert browser.last_load_stats["blocked_requests"] == 6
+
+def main():
+    logger.info("Starting browser context isolation tests...")
+
+    test_url_isolation()
+    test_site_isolation()
+    test_fallback_without_contexts()
+    test_reset_keeps_user_profile()
+    test_devtools_capture_on_user_profile()
+    test_consent_presets_only_in_own_jar()
+    test_devtools_tabs_get_own_jar()
+    test_new_tabs_get_hooks()
+
+    logger.info("All browser context isolation tests completed!")
+
+if __name__ == "__main__":
+    main()
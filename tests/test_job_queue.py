@@ -0,0 +1,91 @@
+from src.database import DatabaseManager
+from src.job_queue import JobQueue
+import logging
+import os
+import tempfile
+import threading
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def make_database():
+    """Create a throwaway database file"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    return DatabaseManager(f"sqlite:///{path}"), path
+
+def test_concurrent_workers_share_batch():
+    """Test that parallel workers finish every job exactly once"""
+    db, path = make_database()
+    try:
+        urls = [f"https://site{i}.example" for i in range(60)]
+        assert JobQueue(db, "nightly").add(urls) == 60
+        assert JobQueue(db, "nightly").add(urls[:10]) == 0
+
+        processed = []
+        lock = threading.Lock()
+
+        def worker():
+            queue = JobQueue(db, "nightly")
+            with queue.heartbeating():
+                for url in queue.claims(batch_size=4):
+                    with lock:
+                        processed.append(url)
+                    queue.complete(url, {"count": 1})
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(processed) == sorted(urls)
+        assert JobQueue(db, "nightly").counts() == {"pending": 0, "in_flight": 0, "done": 60, "failed": 0}
+    finally:
+        db.engine.dispose()
+        os.remove(path)
+
+def test_resume_after_crash():
+    """Test that jobs of a crashed worker are picked up once their lease expires"""
+    db, path = make_database()
+    try:
+        crashed = JobQueue(db, "resume", lease_seconds=0.2)
+        crashed.add(["https://a.example", "https://b.example", "https://c.example"])
+        assert crashed.claim(2) == ["https://a.example", "https://b.example"]
+        crashed.complete("https://a.example", {"count": 3})
+        # The crashed worker never finishes b.example
+
+        restarted = JobQueue(db, "resume")
+        assert restarted.claim(5) == ["https://c.example"]
+        time.sleep(0.3)
+        assert restarted.claim(5) == ["https://b.example"]
+        assert restarted.complete("https://b.example")
+        assert restarted.fail("https://c.example", "timeout")
+
+        # A late result from the crashed worker does not overwrite the finished job
+        assert not crashed.complete("https://b.example")
+        assert restarted.counts() == {"pending": 0, "in_flight": 0, "done": 2, "failed": 1}
+
+        assert restarted.retry_failed() == 1
+        assert restarted.claim(5) == ["https://c.example"]
+        assert restarted.release() == 1
+        assert restarted.counts()["pending"] == 1
+    finally:
+        db.engine.dispose()
+        os.remove(path)
+
+def main():
+    logger.info("Starting job queue tests...")
+
+    test_concurrent_workers_share_batch()
+    test_resume_after_crash()
+
+    logger.info("All job queue tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from src.load_profile import DEFAULT_ALLOW, DEFAULT_BLOCK_TYPES, LoadProfile, TYPICAL_BYTES
+import json
+import logging
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeDriver:
+    """Records DevTools calls, optionally rejecting ordered block patterns, and serves a network log"""
+
+    def __init__(self, ordered_patterns=True, log=()):
+        self.ordered_patterns = ordered_patterns
+        self.log = list(log)
+        self.calls = []
+
+    def execute_cdp_cmd(self, method, params):
+        if method == "Network.setBlockedURLs" and "urlPatterns" in params and not self.ordered_patterns:
+            raise Exception("Invalid parameters: Failed to deserialize params.urls")
+        self.calls.append((method, params))
+        return {}
+
+    def get_log(self, log_type):
+        entries, self.log = self.log, []
+        return entries
+
+def network_event(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+def test_from_settings():
+    """Test that the settings select the profile and its lists"""
+    assert LoadProfile.from_settings({}) is None
+    assert LoadProfile.from_settings({"load_profile": "full"}) is None
+    profile = LoadProfile.from_settings({"load_profile": "lean"})
+    assert profile.block_types == DEFAULT_BLOCK_TYPES and profile.allow == DEFAULT_ALLOW
+
+    profile = LoadProfile.from_settings({"load_profile": "lean", "lean_block": ["font"],
+                                         "lean_allow": [], "lean_block_urls": ["*://widgets.example/*"]})
+    assert profile.block_types == ["font"] and profile.allow == []
+    assert profile.key() != LoadProfile().key()
+    for settings in ({"load_profile": "tiny"}, {"load_profile": "lean", "lean_block": ["script"]}):
+        try:
+            LoadProfile.from_settings(settings)
+            assert False, f"{settings} must be rejected"
+        except ValueError:
+            pass
+
+def test_block_patterns():
+    """Test that allowed patterns come first and blocked ones cover every extension of a type"""
+    profile = LoadProfile(block_types=["font"], allow=["*://*.google-analytics.com/*"],
+                          block_urls=["*://widgets.example/*"])
+    driver = FakeDriver()
+    profile.apply(driver)
+    patterns = driver.calls[-1][1]["urlPatterns"]
+    assert patterns[0] == {"urlPattern": "*://*.google-analytics.com/*", "block": False}
+    blocked = [p["urlPattern"] for p in patterns if p["block"]]
+    assert "*://*/*.woff2" in blocked and "*://widgets.example/*" in blocked
+    assert not any(pattern.endswith(".png") for pattern in blocked)
+
+def test_plain_block_list_keeps_pixels():
+    """Test that without ordered patterns images stay unblocked when an allow-list is set"""
+    driver = FakeDriver(ordered_patterns=False)
+    LoadProfile().apply(driver)
+    urls = driver.calls[-1][1]["urls"]
+    assert "*.woff" in urls and "*.mp4?*" in urls
+    assert "*.png" not in urls
+
+    driver = FakeDriver(ordered_patterns=False)
+    LoadProfile(allow=[]).apply(driver)
+    assert "*.png" in driver.calls[-1][1]["urls"]
+
+def test_page_stats():
+    """Test that page stats drain the log and estimate bytes of blocked requests"""
+    driver = FakeDriver(log=[
+        network_event("Network.loadingFailed", blockedReason="inspector", type="Image"),
+        network_event("Network.loadingFailed", blockedReason="inspector", type="Font"),
+        network_event("Network.loadingFailed", errorText="net::ERR_FAILED", type="Script"),
+        network_event("Network.loadingFinished", encodedDataLength=5000),
+        {"message": "not json"},
+    ])
+    stats = LoadProfile().page_stats(driver)
+    assert stats == {"blocked_requests": 2,
+                     "estimated_bytes_saved": TYPICAL_BYTES["image"] + TYPICAL_BYTES["font"],
+                     "bytes_loaded": 5000}
+    assert LoadProfile().page_stats(driver)["blocked_requests"] == 0
+
+def main():
+    logger.info("Starting load profile tests...")
+
+    test_from_settings()
+    test_block_patterns()
+    test_plain_block_list_keeps_pixels()
+    test_page_stats()
+
+    logger.info("All load profile tests completed!")
+
+if __name__ == "__main__":
+    main()
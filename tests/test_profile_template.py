@@ -0,0 +1,78 @@
+from src.profile_template import ProfileTemplate
+import logging
+import os
+import shutil
+import tempfile
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def fake_chrome_launch(user_data_dir):
+    """Leave behind what a first Chrome run writes to its profile"""
+    os.makedirs(os.path.join(user_data_dir, "Default", "Cache"))
+    with open(os.path.join(user_data_dir, "Local State"), "w") as f:
+        f.write('{"browser": {"has_seen_welcome_page": true}}')
+    with open(os.path.join(user_data_dir, "Default", "Preferences"), "w") as f:
+        f.write("{}")
+    with open(os.path.join(user_data_dir, "Default", "Cookies"), "w") as f:
+        f.write("cookie database")
+    with open(os.path.join(user_data_dir, "Default", "Cache", "data_0"), "w") as f:
+        f.write("cached")
+    os.symlink("host-1234", os.path.join(user_data_dir, "SingletonLock"))
+
+def test_build_and_clone():
+    """Test that the template is built once, stripped, and cloned independently"""
+    root = tempfile.mkdtemp()
+    try:
+        template = ProfileTemplate("test", root=root)
+        builds = []
+        template.ensure(lambda path: (builds.append(path), fake_chrome_launch(path)))
+        template.ensure(lambda path: builds.append(path))
+        assert len(builds) == 1 and template.ready
+
+        clone = template.clone()
+        assert os.path.exists(os.path.join(clone, "Local State"))
+        assert os.path.exists(os.path.join(clone, "Default", "Preferences"))
+        for stripped in ("SingletonLock", os.path.join("Default", "Cookies"), os.path.join("Default", "Cache")):
+            assert not os.path.lexists(os.path.join(clone, stripped))
+
+        # Writes to a clone never reach the template
+        with open(os.path.join(clone, "Default", "Preferences"), "w") as f:
+            f.write('{"changed": true}')
+        with open(os.path.join(template.path, "Default", "Preferences")) as f:
+            assert f.read() == "{}"
+
+        template.release(clone)
+        assert not os.path.exists(clone)
+        assert template.stats["clones"] == 1
+    finally:
+        shutil.rmtree(root)
+
+def test_stale_clones_removed():
+    """Test that clones left by a dead process are deleted when a template is opened"""
+    root = tempfile.mkdtemp()
+    try:
+        stale = os.path.join(root, "clones", "99999999-deadbeef")
+        live = os.path.join(root, "clones", f"{os.getpid()}-cafebabe")
+        os.makedirs(stale)
+        os.makedirs(live)
+        ProfileTemplate("test", root=root)
+        assert not os.path.exists(stale)
+        assert os.path.exists(live)
+    finally:
+        shutil.rmtree(root)
+
+def main():
+    logger.info("Starting profile template tests...")
+
+    test_build_and_clone()
+    test_stale_clones_removed()
+
+    logger.info("All profile template tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from src.readiness import PageReadiness
+import logging
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeDriver:
+    """Answers readiness polls from a page state the test changes between polls"""
+
+    def __init__(self, ready_state="complete", resources=0, inflight=0, stale=False):
+        self.state = {"stale": stale, "readyState": ready_state, "resources": resources, "inflight": inflight}
+        self.cookies = []
+        self.polls = 0
+        self.fail = False
+
+    def execute_script(self, script):
+        self.polls += 1
+        if self.fail:
+            raise Exception("javascript error: document unloaded while waiting for result")
+        return dict(self.state)
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+def poll_until_fired(tracker, driver, on_poll=None, interval=0.01):
+    while tracker.check(driver) is None:
+        if on_poll:
+            on_poll(driver)
+        time.sleep(interval)
+    return tracker.result()
+
+def test_network_idle():
+    """Test that resources still finishing keep a page busy past the 250-entry timing buffer"""
+    readiness = PageReadiness(network_idle_ms=50, cookie_stable_ms=None, max_wait=5)
+    driver = FakeDriver(resources=240)
+    tracker = readiness.tracker()
+    started = time.monotonic()
+
+    def keep_loading(driver):
+        # The observer's count keeps growing where the buffer would stop at 250
+        if time.monotonic() - started < 0.2:
+            driver.state["resources"] += 5
+
+    result = poll_until_fired(tracker, driver, keep_loading)
+    assert result["criterion"] == "network_idle"
+    assert driver.state["resources"] > 250
+    assert result["elapsed"] >= 0.2
+
+    # Requests in flight also count as network activity
+    driver = FakeDriver(inflight=1)
+    tracker = readiness.tracker()
+    for _ in range(8):
+        assert tracker.check(driver) is None
+        time.sleep(0.01)
+    driver.state["inflight"] = 0
+    assert poll_until_fired(tracker, driver)["criterion"] == "network_idle"
+
+def test_ready_state_and_stale_document():
+    """Test that the old document and incomplete pages are never released"""
+    readiness = PageReadiness(network_idle_ms=None, cookie_stable_ms=None, max_wait=5)
+    driver = FakeDriver(ready_state="complete", stale=True)
+    tracker = readiness.tracker()
+    assert tracker.check(driver) is None
+    driver.state.update(stale=False, readyState="interactive")
+    assert tracker.check(driver) is None
+    driver.fail = True
+    assert tracker.check(driver) is None
+    driver.fail = False
+    driver.state["readyState"] = "complete"
+    assert tracker.check(driver) == "ready_state"
+    # A fired tracker stops polling the page
+    polls = driver.polls
+    assert tracker.check(driver) == "ready_state" and driver.polls == polls
+
+def test_cookie_stable_and_timeout():
+    """Test the cookie stability criterion, its partial cookies and the hard timeout"""
+    readiness = PageReadiness(network_idle_ms=None, cookie_stable_ms=50, max_wait=5)
+    driver = FakeDriver()
+    driver.cookies = [{"name": "a", "domain": "example.com", "path": "/"}]
+    tracker = readiness.tracker()
+    assert poll_until_fired(tracker, driver)["criterion"] == "cookie_stable"
+    assert tracker.last_cookies == driver.cookies
+
+    readiness = PageReadiness(max_wait=0.1)
+    driver = FakeDriver(ready_state="loading")
+    result = readiness.wait(driver)
+    assert result["criterion"] == "timeout" and result["elapsed"] >= 0.1
+
+def main():
+    logger.info("Starting readiness tests...")
+
+    test_network_idle()
+    test_ready_state_and_stale_document()
+    test_cookie_stable_and_timeout()
+
+    logger.info("All readiness tests completed!")
+
+if __name__ == "__main__":
+    main()
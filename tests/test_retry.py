@@ -0,0 +1,102 @@
+from src.retry import (
+    CIRCUIT_OPEN, CRASH, DNS, OTHER, TIMEOUT,
+    CircuitBreaker, CircuitOpenError, RetryPolicy, classify_error,
+)
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+from src.watchdog import DeadlineExceeded
+import logging
+import os
+import tempfile
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_classify_error():
+    """Test that WebDriver errors are sorted into retry classes"""
+    assert classify_error(TimeoutException("timeout: Timed out receiving message from renderer")) == TIMEOUT
+    assert classify_error(WebDriverException("unknown error: net::ERR_NAME_NOT_RESOLVED")) == DNS
+    assert classify_error(InvalidSessionIdException("invalid session id")) == CRASH
+    assert classify_error(WebDriverException("chrome not reachable")) == CRASH
+    assert classify_error(ConnectionRefusedError("[Errno 111] Connection refused")) == CRASH
+    assert classify_error(CircuitOpenError("skipped")) == CIRCUIT_OPEN
+    assert classify_error(ValueError("something else")) == OTHER
+
+def test_backoff():
+    """Test exponential backoff with jitter and per-kind attempt budgets"""
+    policy = RetryPolicy(attempts={TIMEOUT: 4}, base_delay=1.0, max_delay=3.0)
+    for attempt, full_delay in ((1, 1.0), (2, 2.0), (3, 3.0)):
+        delay = policy.next_delay(TIMEOUT, attempt)
+        assert full_delay / 2 <= delay <= full_delay
+    assert policy.next_delay(TIMEOUT, 4) is None
+    assert policy.next_delay(DNS, 1) is None
+    assert policy.next_delay(CRASH, 2) is not None
+
+def test_circuit_breaker():
+    """Test that a failing domain is paused and probed after the cooldown"""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.2)
+    breaker.record_failure("example.com")
+    assert breaker.allow("example.com")
+    breaker.record_failure("example.com")
+    assert not breaker.allow("example.com")
+    assert breaker.allow("other.com")
+
+    time.sleep(0.25)
+    # Only one probe gets through, and its failure reopens the circuit
+    assert breaker.allow("example.com")
+    assert not breaker.allow("example.com")
+    breaker.record_failure("example.com")
+    assert not breaker.allow("example.com")
+
+    time.sleep(0.25)
+    assert breaker.allow("example.com")
+    breaker.record_success("example.com")
+    assert breaker.allow("example.com")
+    assert breaker.open_domains() == []
+
+class KilledBrowser:
+    """A browser the watchdog killed"""
+    broken = True
+
+    def is_alive(self):
+        return False
+
+def test_deadline_is_a_retried_failure():
+    """Test that a URL past its deadline fails as a timeout, carrying its partial cookies unsaved"""
+    from src.gui.controller import BrowserController
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            controller = BrowserController()
+            controller.retry_policy = RetryPolicy(attempts={TIMEOUT: 2}, base_delay=0.01)
+            url = "https://hang.example/"
+            error = DeadlineExceeded("hang.example exceeded its deadline", [{"name": "a", "value": "1"}])
+            assert controller._retry_delay(KilledBrowser(), url, error, 1) is not None
+            assert controller._retry_delay(KilledBrowser(), url, error, 2) is None
+
+            result = controller._failed_result(url, error)
+            assert not result["success"] and result["error_kind"] == TIMEOUT
+            assert result["partial"] and result["count"] == 1
+            assert controller.db_manager.get_cookies(url) is None
+            controller.db_manager.engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+def main():
+    logger.info("Starting retry tests...")
+
+    test_classify_error()
+    test_backoff()
+    test_circuit_breaker()
+    test_deadline_is_a_retried_failure()
+
+    logger.info("All retry tests completed!")
+
+if __name__ == "__main__":
+    main()
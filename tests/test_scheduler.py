@@ -0,0 +1,85 @@
+from src.database import DatabaseManager
+from src.scheduler import ExpiryScheduler
+import logging
+import os
+import tempfile
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+
+class FakeController:
+    """Stands in for BrowserController, returning canned cookies"""
+
+    def __init__(self, db_manager, cookies):
+        self.db_manager = db_manager
+        self.cookies = cookies
+        self.rounds = []
+
+    def _normalize_url(self, url):
+        return url
+
+    def collect_cookies(self, urls, callback=None):
+        self.rounds.append(list(urls))
+        results = {}
+        for url in urls:
+            self.db_manager.save_cookies(url, self.cookies[url])
+            results[url] = {"success": True, "cookies": self.cookies[url], "count": len(self.cookies[url])}
+        return True, results
+
+def test_due_times():
+    """Test that sites are due before their important cookies expire, within the interval bounds"""
+    scheduler = ExpiryScheduler(FakeController(None, {}), [], lead_time_hours=1, min_interval_hours=2,
+                                max_interval_hours=48, important_cookies=["session*"])
+    last = time.time()
+
+    assert scheduler.due_time(last, [("session_id", last + 10 * HOUR)]) == last + 9 * HOUR
+    # Unimportant cookies do not count
+    assert scheduler.due_time(last, [("_ga", last + 5 * HOUR), ("session_id", last + 10 * HOUR)]) == last + 9 * HOUR
+    assert scheduler.due_time(last, [("session_id", last + HOUR)]) == last + 2 * HOUR
+    assert scheduler.due_time(last, [("session_id", last + 100 * HOUR)]) == last + 48 * HOUR
+    assert scheduler.due_time(last, []) == last + 48 * HOUR
+
+def test_rounds_follow_expiry_order():
+    """Test that new sites run first, capped by the concurrency budget, and come back by expiry"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    db = DatabaseManager(f"sqlite:///{path}")
+    try:
+        now = time.time()
+        urls = [f"https://site{i}.example" for i in range(3)]
+        cookies = {url: [{"name": "id", "value": "1", "expiry": int(now + (i + 2) * HOUR)}]
+                   for i, url in enumerate(urls)}
+        controller = FakeController(db, cookies)
+        scheduler = ExpiryScheduler(controller, urls, lead_time_hours=1, min_interval_hours=0, concurrency=1)
+
+        scheduler.load()
+        assert scheduler.next_round() == urls
+        scheduler.run_round(urls)
+        assert scheduler.stats["collected"] == 3
+        assert scheduler.next_round() == []
+        assert HOUR - 5 < scheduler.seconds_until_due() <= HOUR
+
+        # Reloading from the database restores the same order
+        scheduler.load()
+        assert [url for _, _, url in sorted(scheduler._heap)] == urls
+    finally:
+        db.engine.dispose()
+        os.remove(path)
+
+def main():
+    logger.info("Starting scheduler tests...")
+
+    test_due_times()
+    test_rounds_follow_expiry_order()
+
+    logger.info("All scheduler tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+from src.browser_pool import BrowserPool
+from src.supervisor import BrowserSupervisor
+import gc
+import logging
+import subprocess
+import sys
+import time
+import weakref
+import psutil
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Parent process that starts a long-running child, like a WebDriver starting Chrome
+SPAWNER = ("import subprocess, sys, time; "
+           "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+           "time.sleep(60)")
+
+class FakeBrowser:
+    """Stand-in browser whose process tree is a real parent and child process"""
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, "-c", SPAWNER])
+        self.broken = False
+        parent = psutil.Process(self.process.pid)
+        for _ in range(50):
+            if parent.children():
+                break
+            time.sleep(0.1)
+
+    def process_ids(self):
+        return [self.process.pid]
+
+    def is_alive(self):
+        return True
+
+    def reset(self):
+        pass
+
+    def close(self):
+        # Only the parent exits, leaving its child behind as an orphan
+        self.process.kill()
+        self.process.wait()
+
+def test_orphans_are_reaped():
+    """Test that processes outliving their browser are killed"""
+    supervisor = BrowserSupervisor()
+    browser = FakeBrowser()
+    supervisor.register(browser)
+    child_pids = [child.pid for child in psutil.Process(browser.process.pid).children()]
+    assert child_pids
+
+    assert supervisor.rss_mb(browser) > 0
+    supervisor.unregister(browser)
+    browser.close()
+    assert psutil.pid_exists(child_pids[0])
+
+    assert supervisor.reap_orphans() == len(child_pids)
+    assert supervisor.stats()["orphans_reaped"] == len(child_pids)
+
+def test_pool_recycles_on_memory():
+    """Test that the pool replaces a browser above the memory limit"""
+    supervisor = BrowserSupervisor(max_rss_mb=0.001)
+    pool = BrowserPool(FakeBrowser, max_size=1, supervisor=supervisor)
+    try:
+        first = pool.checkout()
+        second = pool.renew(first)
+        assert second is not first
+        stats = pool.stats()
+        logger.info(f"Pool stats: {stats}")
+        assert stats["recycled_memory"] == 1
+        assert stats["peak_rss_mb"] > 0
+        pool.checkin(second)
+    finally:
+        pool.close()
+    assert pool.stats()["orphans_reaped"] >= 2
+
+def test_supervisors_are_not_kept_alive():
+    """Test that discarded supervisors are freed instead of piling up exit handlers"""
+    supervisor = BrowserSupervisor()
+    ref = weakref.ref(supervisor)
+    del supervisor
+    gc.collect()
+    assert ref() is None
+
+def main():
+    logger.info("Starting supervisor tests...")
+
+    test_orphans_are_reaped()
+    test_pool_recycles_on_memory()
+    test_supervisors_are_not_kept_alive()
+
+    logger.info("All supervisor tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from src.job_queue import JobQueue
+from src.url_utils import canonicalize_url, dedupe_urls, group_by_domain, hostname, registrable_domain
+import logging
+import os
+import tempfile
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_canonicalize_url():
+    """Test that spellings of the same page map to one URL"""
+    for url in ("https://example.com", "example.com/", "HTTPS://Example.com", "https://example.com:443/#top"):
+        assert canonicalize_url(url) == "https://example.com"
+
+    assert canonicalize_url("http://Shop.Example.com:80/cart/?utm_source=mail&id=7&fbclid=abc") == \
+        "http://shop.example.com/cart?id=7"
+    # Non-default ports and meaningful queries are kept as they are
+    assert canonicalize_url("http://localhost:8080/?q=a%20b&page=2") == "http://localhost:8080/?q=a%20b&page=2"
+    # A URL inside the query is not mistaken for a scheme
+    assert canonicalize_url("example.com/login?next=https://foo.com") == \
+        "https://example.com/login?next=https://foo.com"
+    assert hostname("example.com/login?next=https://foo.com") == "example.com"
+
+def test_dedupe_and_group():
+    """Test that duplicates are counted and URLs grouped by registrable domain"""
+    urls, removed = dedupe_urls([
+        "https://example.com", "example.com/", "HTTPS://Example.com",
+        "news.bbc.co.uk/world?utm_medium=social", "https://www.example.com/about", "https://news.bbc.co.uk/world",
+    ])
+    assert removed == 3
+    assert urls == ["https://example.com", "https://news.bbc.co.uk/world", "https://www.example.com/about"]
+
+    groups = group_by_domain(urls)
+    assert list(groups) == ["example.com", "bbc.co.uk"]
+    assert groups["example.com"] == ["https://example.com", "https://www.example.com/about"]
+    assert registrable_domain("https://news.bbc.co.uk/world") == "bbc.co.uk"
+
+def test_invalid_urls():
+    """Test that empty and unparseable URLs raise ValueError"""
+    for url in ("", "   ", "https://", "example.com:abc/x", "http://[::1", "example.com:99999"):
+        try:
+            canonicalize_url(url)
+            assert False, f"{url!r} must be rejected"
+        except ValueError:
+            pass
+    assert canonicalize_url("http://[::1]:8080/a") == "http://[::1]:8080/a"
+
+class FakePool:
+    """Lends one placeholder browser"""
+    max_size = 1
+
+    def warm(self, count):
+        return count
+
+    def checkout(self, timeout=None):
+        return object()
+
+    def checkin(self, browser):
+        pass
+
+    def renew(self, browser, pages=1):
+        return browser
+
+    def stats(self):
+        return {}
+
+def test_invalid_url_fails_alone():
+    """Test that one bad URL fails on its own instead of failing the whole run"""
+    from src.async_collector import AsyncCookieCollector
+    import asyncio
+
+    class Collector(AsyncCookieCollector):
+        def _collect_url(self, browser, url, progress_callback):
+            return {"cookies": [], "backend": "browser"}
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            controller = Collector(FakePool())
+            settings = {"browser": "chrome", "headless": True, "wait_time": 1, "save_cookies": False}
+            assert controller.initialize_browser(settings)[0]
+            success, results = controller.collect_cookies(["https://a.com", "example.com:abc/x", "", "b.com"])
+            assert success
+            assert results["https://a.com"]["success"] and results["https://b.com"]["success"]
+            assert not results["example.com:abc/x"]["success"] and not results[""]["success"]
+            success, counts = controller.collect_batch("nightly", ["https://a.com", "example.com:abc/x"])
+            assert success and counts["done"] == 1 and counts["invalid"] == 1
+            # Failed jobs are only collected again when asked to
+            failed = JobQueue(controller.db_manager, "nightly")
+            failed.add(["https://c.com"])
+            failed.claim(1)
+            failed.fail("https://c.com", "timeout")
+            success, counts = controller.collect_batch("nightly", retry_failed=True)
+            assert success and counts["done"] == 2 and counts["failed"] == 0
+
+            async def collect():
+                await controller.initialize(settings)
+                result = await controller.collect("http://[::1")
+                await controller.aclose()
+                return result
+
+            result = asyncio.run(collect())
+            assert not result["success"] and "Invalid URL" in result["error"]
+            controller.db_manager.engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+def main():
+    logger.info("Starting URL utility tests...")
+
+    test_canonicalize_url()
+    test_dedupe_and_group()
+    test_invalid_urls()
+    test_invalid_url_fails_alone()
+
+    logger.info("All URL utility tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from src.watchdog import Watchdog, kill_process_tree
+import logging
+import subprocess
+import sys
+import threading
+import time
+import psutil
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_deadline_fires():
+    """Test that an expired deadline runs its callback and a disarmed one does not"""
+    watchdog = Watchdog(poll_interval=0.05)
+    fired = threading.Event()
+    kept = threading.Event()
+
+    expired_token = watchdog.arm(0.1, fired.set, "slow page")
+    kept_token = watchdog.arm(5, kept.set, "fast page")
+    assert watchdog.disarm(kept_token)
+
+    assert fired.wait(2)
+    assert not kept.is_set()
+    # Disarming after expiry reports that the deadline already fired
+    assert not watchdog.disarm(expired_token)
+    assert watchdog.expired_count == 1
+
+def test_touch_extends_deadline():
+    """Test that touching a deadline keeps it from firing"""
+    watchdog = Watchdog(poll_interval=0.05)
+    fired = threading.Event()
+    token = watchdog.arm(0.3, fired.set)
+    for _ in range(5):
+        assert not fired.wait(0.1)
+        watchdog.touch(token, 0.3)
+    assert watchdog.disarm(token)
+
+def test_kill_process_tree():
+    """Test that a process and its children are all killed"""
+    script = "import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); time.sleep(60)"
+    parent = subprocess.Popen([sys.executable, "-c", script])
+    try:
+        process = psutil.Process(parent.pid)
+        for _ in range(50):
+            if process.children():
+                break
+            time.sleep(0.1)
+        child_pids = [child.pid for child in process.children(recursive=True)]
+        assert child_pids
+
+        assert kill_process_tree(parent.pid) == len(child_pids) + 1
+        parent.wait(timeout=5)
+        assert not any(psutil.pid_exists(pid) and psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+                       for pid in child_pids)
+    finally:
+        if parent.poll() is None:
+            parent.kill()
+
+def main():
+    logger.info("Starting watchdog tests...")
+
+    test_deadline_fires()
+    test_touch_extends_deadline()
+    test_kill_process_tree()
+
+    logger.info("All watchdog tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from src.database import DatabaseManager
+from src.web_storage import WebStorageCapture
+import logging
+import os
+import tempfile
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeDriver:
+    """Returns a fixed capture from the storage script, or fails"""
+
+    def __init__(self, storage=None):
+        self.storage = storage
+        self.calls = []
+
+    def execute_async_script(self, script, *args):
+        self.calls.append(args)
+        if self.storage is None:
+            raise Exception("javascript error: document unloaded")
+        return self.storage
+
+def test_capture():
+    """Test that capture passes its limits in one call and survives script errors"""
+    storage = {"origin": "https://example.com", "local": [], "session": [], "indexeddb": []}
+    driver = FakeDriver(storage)
+    capture = WebStorageCapture.from_settings({"web_storage": {"max_value_length": 100, "max_items": 10}})
+    assert capture.capture(driver) == storage
+    assert driver.calls == [(100, 10)]
+
+    assert WebStorageCapture.from_settings({}) is None
+    assert WebStorageCapture.from_settings({"web_storage": True}).max_value_length == 4096
+    assert WebStorageCapture().capture(FakeDriver()) is None
+
+def test_save_storage():
+    """Test storing, limiting, replacing and removing web storage"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        db = DatabaseManager(f"sqlite:///{path}")
+        url = "https://example.com"
+        db.save_cookies(url, [{"name": "sid", "value": "1", "domain": "example.com"}])
+        db.save_storage(url, {
+            "origin": url,
+            "local": [{"key": "prefs", "value": "x" * 50, "size": 50, "truncated": False},
+                      {"key": "cache", "value": "y" * 20, "size": 9000, "truncated": True},
+                      {"key": "extra", "value": "z", "size": 1, "truncated": False}],
+            "session": [{"key": "tab", "value": "1", "size": 1, "truncated": False}],
+            "indexeddb": [{"name": "keyval-store", "version": 1}],
+        }, max_value_length=10, max_items=2)
+
+        storage = db.get_storage(url)
+        assert storage["origin"] == url
+        assert [item["key"] for item in storage["local"]] == ["prefs", "cache"]
+        assert storage["local"][0] == {"key": "prefs", "value": "x" * 10, "size": 50, "truncated": True}
+        assert storage["local"][1]["size"] == 9000 and storage["local"][1]["truncated"]
+        assert storage["session"][0]["value"] == "1"
+        assert storage["indexeddb"] == [{"name": "keyval-store", "version": 1}]
+        # Cookies are untouched
+        assert len(db.get_cookies(url)) == 1
+
+        db.save_storage(url, {"origin": url, "local": [], "session": [], "indexeddb": []})
+        assert db.get_storage(url)["local"] == []
+        assert db.get_storage("https://unknown.example") is None
+
+        db.save_storage(url, {"origin": url, "local": [{"key": "a", "value": "b", "size": 1}]})
+        assert db.remove_website(url)
+        assert db.get_storage(url) is None
+        db.engine.dispose()
+    finally:
+        os.remove(path)
+
+def main():
+    logger.info("Starting web storage tests...")
+
+    test_capture()
+    test_save_storage()
+
+    logger.info("All web storage tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from src.worker_pool import WorkerPool
+import itertools
+import logging
+import threading
+import time
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeBrowsers:
+    """Hands out numbered fake browsers and tracks which are still checked out"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.out = set()
+        self.started = 0
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def acquire(self):
+        if self.fail:
+            raise RuntimeError("chrome failed to start")
+        with self.lock:
+            browser = f"browser{next(self._ids)}"
+            self.out.add(browser)
+            self.started += 1
+        return browser
+
+    def release(self, browser):
+        with self.lock:
+            self.out.remove(browser)
+
+def test_event_order():
+    """Test that every URL reports progress before its single result and browsers are released"""
+    browsers = FakeBrowsers()
+
+    def task(browser, url, progress):
+        progress(0.5, f"Loading {url}")
+        time.sleep(0.01)
+        return f"{url} on {browser}"
+
+    urls = [f"https://site{i}.example/" for i in range(12)]
+    pool = WorkerPool(browsers.acquire, browsers.release, num_workers=3)
+    events = list(pool.run(iter(urls), task))
+
+    done = [url for event, url, _ in events if event == "done"]
+    assert sorted(done) == sorted(urls)
+    for url in urls:
+        kinds = [event for event, event_url, _ in events if event_url == url]
+        assert kinds == ["progress", "done"]
+    assert all(payload[0] == 0.5 for event, _, payload in events if event == "progress")
+    assert browsers.started == 3 and not browsers.out
+
+def test_errors_and_retries():
+    """Test that task errors are reported per URL and retried URLs get a second attempt"""
+    browsers = FakeBrowsers()
+    attempts = {}
+    retried = []
+
+    def task(browser, url, progress):
+        attempts[url] = attempts.get(url, 0) + 1
+        if "broken" in url or ("flaky" in url and attempts[url] == 1):
+            raise ValueError(f"{url} failed")
+        return url
+
+    def retry(browser, url, error, attempt):
+        retried.append((url, attempt))
+        return 0.01 if "flaky" in url else None
+
+    pool = WorkerPool(browsers.acquire, browsers.release, num_workers=2, retry=retry)
+    urls = ["https://ok.example/", "https://broken.example/", "https://flaky.example/"]
+    results = {url: (event, payload) for event, url, payload in pool.run(urls, task) if event != "progress"}
+
+    assert results["https://ok.example/"] == ("done", "https://ok.example/")
+    event, error = results["https://broken.example/"]
+    assert event == "error" and isinstance(error, ValueError)
+    assert results["https://flaky.example/"] == ("done", "https://flaky.example/")
+    assert attempts["https://flaky.example/"] == 2
+    assert ("https://broken.example/", 1) in retried and ("https://flaky.example/", 1) in retried
+    assert not browsers.out
+
+def test_no_browsers():
+    """Test that URLs fail instead of hanging when no worker could start a browser"""
+    pool = WorkerPool(FakeBrowsers(fail=True).acquire, lambda browser: None, num_workers=2)
+    urls = [f"https://site{i}.example/" for i in range(5)]
+    events = list(pool.run(urls, lambda browser, url, progress: url))
+    assert sorted(url for event, url, _ in events if event == "error") == sorted(urls)
+    assert all("No browser workers available" in str(payload) for _, _, payload in events)
+
+def test_stop_early():
+    """Test that leaving the event loop early stops the workers and releases their browsers"""
+    browsers = FakeBrowsers()
+    started = []
+
+    def task(browser, url, progress):
+        started.append(url)
+        time.sleep(0.02)
+        return url
+
+    def endless():
+        for i in itertools.count():
+            yield f"https://site{i}.example/"
+
+    pool = WorkerPool(browsers.acquire, browsers.release, num_workers=2)
+    events = pool.run(endless(), task)
+    for event, url, payload in events:
+        if event == "done":
+            break
+    events.close()
+    assert not browsers.out
+    count = len(started)
+    time.sleep(0.1)
+    # No worker picked up another URL after the stop
+    assert len(started) == count and count < 10
+
+def test_stream_errors():
+    """Test that stream-mode tasks report failed URLs and are called again for later chunks"""
+    browsers = FakeBrowsers()
+    calls = []
+
+    def stream_task(browser, url_source, progress):
+        calls.append(browser)
+        for url in url_source:
+            progress(url, 1.0, f"Completed {url}")
+            yield url, (ValueError("page crashed") if "broken" in url else url)
+
+    urls = [f"https://site{i}.example/" for i in range(7)] + ["https://broken.example/"]
+    pool = WorkerPool(browsers.acquire, browsers.release, num_workers=1)
+    results = [(event, url) for event, url, _ in pool.run(urls, stream_task, stream=True, chunk_size=3)
+               if event != "progress"]
+    assert sorted(url for event, url in results if event == "done") == sorted(urls[:-1])
+    assert ("error", "https://broken.example/") in results
+    assert len(calls) >= 3 and not browsers.out
+
+def test_stream_worker_gives_up():
+    """Test that URLs a stream worker still holds get a result when its browser cannot be replaced"""
+    browsers = FakeBrowsers()
+    renewals = []
+
+    def renew(browser, pages):
+        renewals.append(browser)
+        if len(renewals) > 1:
+            raise RuntimeError("chrome failed to start")
+        return browser
+
+    def stream_task(browser, url_source, progress):
+        for url in url_source:
+            if "dropped" in url:
+                # A task that loses a URL without reporting it
+                continue
+            yield url, ValueError("page crashed")
+
+    urls = ["https://flaky.example/", "https://dropped.example/"]
+    pool = WorkerPool(browsers.acquire, browsers.release, num_workers=1, renew=renew,
+                      retry=lambda browser, url, error, attempt: 0.01 if "flaky" in url else None)
+    results = {url: payload for event, url, payload in pool.run(urls, stream_task, stream=True, chunk_size=5)
+               if event == "error"}
+    assert set(results) == set(urls)
+    assert "chrome failed to start" in str(results["https://flaky.example/"])
+    assert "got no result" in str(results["https://dropped.example/"])
+
+def main():
+    logger.info("Starting worker pool tests...")
+
+    test_event_order()
+    test_errors_and_retries()
+    test_no_browsers()
+    test_stop_early()
+    test_stream_errors()
+    test_stream_worker_gives_up()
+
+    logger.info("All worker pool tests completed!")
+
+if __name__ == "__main__":
+    main()